@@ -0,0 +1,13 @@
+exports.up = function(knex) {
+    return knex.schema.table('telemetry', function(table) {
+      // Add the 'source' column (receiver/channel tag sent by the multi-channel decoder)
+      table.string('source');
+    });
+  };
+  
+  exports.down = function(knex) {
+    return knex.schema.table('telemetry', function(table) {
+      // Remove the 'source' column if rolling back
+      table.dropColumn('source');
+    });
+  };
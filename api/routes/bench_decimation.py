@@ -0,0 +1,70 @@
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+from filters import decimate, sos_bandpass
+from stream_demod import StreamingDemodulator
+from tone_power import tone_powers
+from bitbuf import BitBuffer
+
+# CPU time of filter + Goertzel demodulation at the recorded rate versus after
+# the decimation front-end, and whether the bit decisions change. Run from the
+# repo root:
+#     python api/routes/bench_decimation.py [wav ...]
+
+BAUD_RATE = 50
+TARGET_RATES = [12000, 9600]
+
+
+def demodulate(audio_data, sample_rate, target_rate=None):
+    audio_data, sample_rate = decimate(audio_data, sample_rate, target_rate)
+    filtered = sos_bandpass(audio_data, sample_rate, 1000, 2500)
+    _, (pm, ps) = tone_powers(filtered, sample_rate, [1200, 2200], int(sample_rate / BAUD_RATE))
+    return str(BitBuffer(pm > ps))
+
+
+def stream_bits(audio_data, sample_rate, target_rate=None, block=1024):
+    demod = StreamingDemodulator(sample_rate, baud_rate=BAUD_RATE, decimate_to=target_rate)
+    for i in range(0, len(audio_data), block):
+        demod.feed(audio_data[i:i+block])
+    demod.flush()
+    return str(demod.bits)
+
+
+def cpu_time(fn, *args, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.process_time()
+        out = fn(*args)
+        best = min(best, time.process_time() - t0)
+    return out, best
+
+
+def diff(a, b):
+    if len(a) != len(b):
+        return f"len {len(a)}/{len(b)}"
+    return f"{sum(x != y for x, y in zip(a, b))} bits differ" if a != b else "same"
+
+
+def main(paths):
+    for path in paths:
+        audio_data, sample_rate = sf.read(path, dtype='float32')
+        if len(audio_data) == 0 or audio_data.ndim > 1 or sample_rate <= max(TARGET_RATES):
+            continue
+        name = os.path.basename(path)
+        ref, ref_t = cpu_time(demodulate, audio_data, sample_rate)
+        ref_stream, ref_stream_t = cpu_time(stream_bits, audio_data, sample_rate)
+        print(f"{name}: {sample_rate} Hz  offline {ref_t * 1e3:6.2f} ms  streaming {ref_stream_t * 1e3:6.2f} ms")
+        for target in TARGET_RATES:
+            bits, t = cpu_time(demodulate, audio_data, sample_rate, target)
+            sbits, st = cpu_time(stream_bits, audio_data, sample_rate, target)
+            print(f"  -> {target:5d} Hz  offline {t * 1e3:6.2f} ms ({ref_t / t:4.1f}x, {diff(ref, bits)})"
+                  f"  streaming {st * 1e3:6.2f} ms ({ref_stream_t / st:4.1f}x, {diff(ref_stream, sbits)})")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or sorted(glob.glob("*.wav") + glob.glob("api/*.wav") + glob.glob("api/routes/*.wav")))
@@ -0,0 +1,226 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import signal
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("MPLBACKEND", "Agg")  # the try scripts import pyplot
+
+import numpy as np
+
+from bitbuf import BitBuffer
+from filters import decimate
+from stream_demod import StreamingDemodulator
+from synth import message_bits, synthesize, uart_bits
+from uart import uart_decode
+
+# Speed and accuracy of every demodulator generation on synthetic AFSK with
+# a known message. For each (baud, sample rate, SNR) case the message is sent
+# MSB-first UART framed between '$' and '#', with idle mark around it and a
+# fractional-bit start offset, plus white noise at the given SNR.
+#
+# Reported per variant and case:
+#   samplesPerSecond  input samples / best CPU time (filter + demodulation)
+#   peakMemory        tracemalloc peak during one run, bytes
+#   ber               bit errors in the message frames, after aligning the
+#                     output (missing bits count as errors)
+#   cer               edit distance of the message within the UART decode of
+#                     the output, per message character
+#
+# Run from the repo root; results are saved as JSON for comparing versions:
+#     python api/routes/bench_demodulators.py -o bench_results.json
+#     python api/routes/bench_demodulators.py --variants try14 stream --baud 300 1200 --snr 6
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+API = os.path.dirname(HERE)
+
+MESSAGE = "V12 3 volts"
+MARK_FREQ = 1200
+SPACE_FREQ = 2200
+BAUD_RATES = [50, 300, 1200]
+SAMPLE_RATES = [48000, 12000]
+SNRS = [20, 10, 3]
+
+
+# --- test signal ---
+
+def test_signal(sample_rate, baud_rate, snr_db, seed=0):
+    idle = '1' * max(8, baud_rate // 4)
+    payload = uart_bits(MESSAGE.encode('latin1'))
+    bits = message_bits(MESSAGE, frame=True, preamble=idle, postamble=idle)
+    silence = np.zeros(int(0.37 * sample_rate / baud_rate))  # fractional-bit start offset
+    wave = np.concatenate((silence, synthesize(bits, sample_rate, baud_rate, MARK_FREQ, SPACE_FREQ)))
+    noise_power = 0.5 / (10 ** (snr_db / 10))  # unit sine has power 0.5
+    noise = np.random.default_rng(seed).standard_normal(len(wave)) * np.sqrt(noise_power)
+    return (0.5 * (wave + noise)).astype(np.float32), payload
+
+
+# --- error rates ---
+
+def bit_error_rate(decoded, reference):
+    """Errors in reference after the best alignment against decoded (either may be longer)."""
+    d = BitBuffer(decoded).bits.astype(np.int64) * 2 - 1
+    r = BitBuffer(reference).bits.astype(np.int64) * 2 - 1
+    if len(d) == 0:
+        return 1.0
+    corr = np.correlate(d, r, mode='full')
+    lag = int(np.argmax(corr)) - (len(r) - 1)  # reference[i] lines up with decoded[i + lag]
+    lo, hi = max(0, -lag), min(len(r), len(d) - lag)
+    overlap = max(0, hi - lo)
+    mismatches = int(np.sum(d[lo + lag:hi + lag] != r[lo:hi])) if overlap else 0
+    return (mismatches + len(r) - overlap) / len(r)
+
+
+def char_error_rate(text, message):
+    """Edit distance of message against its best-matching stretch of text, per character."""
+    prev = np.zeros(len(text) + 1, dtype=np.int64)  # free start anywhere in text
+    for i, ch in enumerate(message, 1):
+        cur = np.empty_like(prev)
+        cur[0] = i
+        for j, tc in enumerate(text, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (tc != ch))
+        prev = cur
+    return int(prev.min()) / len(message)
+
+
+# --- variants ---
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def variant_try9(m, audio, sr, baud):
+    return m.demodulate_afsk(m.bandpass_filter(audio, sr), sr, baud_rate=baud)
+
+
+def variant_try11_legacy(m, audio, sr, baud):
+    return m.demodulate_afsk(m.bandpass_filter(m.normalize_audio(audio), sr), sr, baud_rate=baud)
+
+
+def variant_testbao2(m, audio, sr, baud):
+    return m.demodulate_afsk(m.bandpass_filter(audio, 1000, 2500, sr), sr, baud_rate=baud)
+
+
+def variant_try_routes(m, audio, sr, baud):
+    return m.demodulate_afsk(m.bandpass_filter(m.normalize_audio(audio), sr), sr, baud_rate=baud)
+
+
+def variant_try15(m, audio, sr, baud):
+    return m.demodulate_afsk_fft(m.bandpass_filter(m.normalize_audio(audio), sr), sr, baud_rate=baud)
+
+
+def variant_try14(m, audio, sr, baud):
+    audio, sr = decimate(audio, sr, m.decimate_rate)
+    bits, _ = m.demodulate_afsk(m.bandpass_filter(m.normalize_audio(audio), sr), sr, baud_rate=baud)
+    return bits
+
+
+def variant_stream(m, audio, sr, baud, block=1024):
+    demod = StreamingDemodulator(sr, baud_rate=baud, decimate_to=12000)
+    for i in range(0, len(audio), block):
+        demod.feed(audio[i:i + block])
+    demod.flush()
+    return demod.bits
+
+
+# name -> (file to load, module name, adapter)
+VARIANTS = {
+    "try9": (os.path.join(API, "try9.py"), "bench_try9", variant_try9),
+    "try11-legacy": (os.path.join(API, "try11.py"), "bench_try11_legacy", variant_try11_legacy),
+    "testbao2": (os.path.join(API, "testbao2.py"), "bench_testbao2", variant_testbao2),
+    "try10": (os.path.join(HERE, "try10.py"), "bench_try10", variant_try_routes),
+    "try11": (os.path.join(HERE, "try11.py"), "bench_try11", variant_try_routes),
+    "try12": (os.path.join(HERE, "try12.py"), "bench_try12", variant_try_routes),
+    "try15-fft": (os.path.join(HERE, "try15.py"), "bench_try15", variant_try15),
+    "try14": (os.path.join(HERE, "try14.py"), "bench_try14", variant_try14),
+    "stream": (None, None, variant_stream),
+}
+
+
+def load_variants(names):
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)}
+    loaded = {}
+    for name in names:
+        path, module_name, adapter = VARIANTS[name]
+        try:
+            module = load_module(module_name, path) if path else None
+        except Exception as e:  # e.g. sounddevice missing on this machine
+            print(f"skipping {name}: {type(e).__name__}: {e}", file=sys.stderr)
+            continue
+        if module is not None and hasattr(module, "plot_renderer"):
+            module.plot_renderer.enabled = False
+        loaded[name] = (module, adapter)
+    for sig, handler in handlers.items():  # the scripts install their own Ctrl-C handlers
+        signal.signal(sig, handler)
+    return loaded
+
+
+def run_case(module, adapter, audio, sr, baud, repeat):
+    quiet = io.StringIO()
+    with contextlib.redirect_stdout(quiet):
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.process_time()
+            bits = adapter(module, audio, sr, baud)
+            best = min(best, time.process_time() - t0)
+        tracemalloc.start()
+        adapter(module, audio, sr, baud)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return BitBuffer(bits), best, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the AFSK demodulators on synthetic signals.")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument("--baud", type=int, nargs="+", default=BAUD_RATES)
+    parser.add_argument("--rates", type=int, nargs="+", default=SAMPLE_RATES)
+    parser.add_argument("--snr", type=float, nargs="+", default=SNRS, help="dB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    variants = load_variants(args.variants)
+    results = []
+    for sr in args.rates:
+        for baud in args.baud:
+            for snr in args.snr:
+                audio, payload = test_signal(sr, baud, snr)
+                print(f"\n{baud} baud, {sr} Hz, SNR {snr:g} dB ({len(audio)} samples)")
+                for name, (module, adapter) in variants.items():
+                    try:
+                        bits, seconds, peak = run_case(module, adapter, audio, sr, baud, args.repeat)
+                    except Exception as e:
+                        print(f"  {name:13s} failed: {type(e).__name__}: {e}")
+                        results.append({"variant": name, "baudRate": baud, "sampleRate": sr, "snr": snr,
+                                        "error": f"{type(e).__name__}: {e}"})
+                        continue
+                    ber = bit_error_rate(bits, payload)
+                    cer = char_error_rate(uart_decode(bits), MESSAGE)
+                    rate = len(audio) / seconds if seconds > 0 else float('inf')
+                    print(f"  {name:13s} {rate / 1e6:8.2f} Msamples/s  {peak / 2**20:7.2f} MiB"
+                          f"  BER {ber:6.3f}  CER {cer:5.2f}")
+                    results.append({"variant": name, "baudRate": baud, "sampleRate": sr, "snr": snr,
+                                    "samples": len(audio), "seconds": seconds, "samplesPerSecond": rate,
+                                    "peakMemory": peak, "ber": ber, "cer": cer, "bits": len(bits)})
+
+    if args.output:
+        report = {"created": datetime.now().isoformat(timespec='seconds'), "message": MESSAGE,
+                  "python": platform.python_version(), "numpy": np.__version__, "results": results}
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+from filters import sos_bandpass
+from tone_power import goertzel, tone_powers
+
+# Compares the per-sample Goertzel loop against the batched tone_powers engine
+# on the checked-in WAVs. Run from the repo root:
+#     python api/routes/bench_goertzel.py [wav ...]
+
+BAUD_RATE = 50
+MARK_FREQ = 1200
+SPACE_FREQ = 2200
+
+
+def loop_bits(audio_data, sample_rate, samples_per_bit):
+    bits = []
+    for i in range(0, len(audio_data), samples_per_bit):
+        chunk = audio_data[i:i+samples_per_bit]
+        if len(chunk) < samples_per_bit // 2:
+            break
+        pm = goertzel(chunk, sample_rate, MARK_FREQ)
+        ps = goertzel(chunk, sample_rate, SPACE_FREQ)
+        bits.append('1' if pm > ps else '0')
+    return ''.join(bits)
+
+
+def batch_bits(audio_data, sample_rate, samples_per_bit):
+    _, (pm, ps) = tone_powers(audio_data, sample_rate, [MARK_FREQ, SPACE_FREQ], samples_per_bit)
+    return ''.join(np.where(pm > ps, '1', '0'))
+
+
+def timed(fn, *args, repeat=1):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def main(paths):
+    for path in paths:
+        audio_data, sample_rate = sf.read(path, dtype='float32')
+        if audio_data.ndim > 1:
+            audio_data = audio_data[:, 0]
+        if len(audio_data) == 0:
+            continue
+        samples_per_bit = int(sample_rate / BAUD_RATE)
+        filtered = sos_bandpass(audio_data, sample_rate, 1000, 2500)
+
+        loop_out, loop_t = timed(loop_bits, filtered, sample_rate, samples_per_bit)
+        batch_out, batch_t = timed(batch_bits, filtered, sample_rate, samples_per_bit, repeat=5)
+        n = len(filtered)
+        print(f"{os.path.basename(path):28s} {n:8d} samples  "
+              f"loop {n / loop_t / 1e6:7.2f} Msamp/s  "
+              f"batch {n / batch_t / 1e6:8.2f} Msamp/s  "
+              f"x{loop_t / batch_t:6.1f}  bits {'match' if loop_out == batch_out else 'DIFFER'}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or sorted(glob.glob("*.wav") + glob.glob("api/*.wav") + glob.glob("api/routes/*.wav")))
@@ -0,0 +1,125 @@
+import numpy as np
+
+
+# Bit stream type for the decoders: one uint8 (0/1) per bit instead of a
+# Python '0'/'1' string, so inversion, run removal, pattern search and byte
+# packing are array operations. Text is only produced at the edges
+# (printing, the binaryData field posted to the backend).
+
+
+class BitBuffer:
+    __slots__ = ('bits',)
+
+    def __init__(self, bits=()):
+        if isinstance(bits, BitBuffer):
+            bits = bits.bits
+        elif isinstance(bits, str):
+            bits = np.frombuffer(bits.encode('ascii'), dtype=np.uint8) - ord('0')
+        self.bits = np.asarray(bits, dtype=np.uint8)
+
+    @classmethod
+    def from_str(cls, text):
+        return cls(text)
+
+    @classmethod
+    def from_bytes(cls, data, n_bits=None, msb_first=True):
+        """Inverse of to_bytes."""
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder='big' if msb_first else 'little')
+        return cls(bits[:n_bits] if n_bits is not None else bits)
+
+    @classmethod
+    def concat(cls, parts):
+        parts = [BitBuffer(p).bits for p in parts]
+        return cls(np.concatenate(parts) if parts else ())
+
+    # --- text / serialization (edges only) ---
+
+    def __str__(self):
+        return (self.bits + ord('0')).tobytes().decode('ascii')
+
+    def __repr__(self):
+        text = str(self)
+        return f"BitBuffer('{text[:64]}{'...' if len(text) > 64 else ''}', len={len(self)})"
+
+    def to_bytes(self, msb_first=True):
+        """Pack 8 bits per byte (last byte zero-padded)."""
+        return np.packbits(self.bits, bitorder='big' if msb_first else 'little').tobytes()
+
+    # --- sequence behaviour ---
+
+    def __len__(self):
+        return len(self.bits)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.bits if dtype is None else self.bits.astype(dtype)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return BitBuffer(self.bits[index])  # view, no copy
+        return int(self.bits[index])
+
+    def __eq__(self, other):
+        if isinstance(other, (BitBuffer, str)):
+            other = BitBuffer(other)
+            return len(self) == len(other) and bool(np.array_equal(self.bits, other.bits))
+        return NotImplemented
+
+    # Unhashable, like the array it wraps: the bits can change in place, and a
+    # BitBuffer equals its '0'/'1' string, which a hash of the bits could not match.
+    # Use str(bits) or bits.to_bytes() as a key.
+    __hash__ = None
+
+    def __add__(self, other):
+        return BitBuffer.concat([self, other])
+
+    # --- transforms ---
+
+    def __invert__(self):
+        return BitBuffer(self.bits ^ 1)
+
+    def invert(self):
+        return ~self
+
+    def offset(self, n):
+        """View starting n bits in (bit-slip / alignment trials)."""
+        return self[n:]
+
+    def runs(self):
+        """Run-length encoding: (run values, run lengths, run starts)."""
+        if len(self.bits) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty.astype(np.uint8), empty, empty
+        starts = np.flatnonzero(np.diff(self.bits, prepend=self.bits[0] ^ 1))
+        lengths = np.diff(np.append(starts, len(self.bits)))
+        return self.bits[starts], lengths, starts
+
+    def drop_runs(self, min_len=8):
+        """Remove every run of min_len or more equal bits (like re.sub(r'1{8,}|0{8,}', ''))."""
+        _, lengths, _ = self.runs()
+        if len(lengths) == 0:
+            return BitBuffer(self.bits)
+        return BitBuffer(self.bits[np.repeat(lengths < min_len, lengths)])
+
+    def find(self, pattern, start=0):
+        """Index of the first exact occurrence of pattern at or after start, or -1."""
+        pattern = BitBuffer(pattern).bits
+        m = len(pattern)
+        hay = self.bits[start:]
+        if m == 0:
+            return start
+        if len(hay) < m:
+            return -1
+        windows = np.lib.stride_tricks.sliding_window_view(hay, m)
+        hits = np.flatnonzero((windows == pattern).all(axis=1))
+        return int(hits[0]) + start if len(hits) else -1
+
+    def pack(self, offset=0, width=8, msb_first=True):
+        """Consecutive width-bit groups starting at offset, as integers (no framing bits)."""
+        n = (len(self.bits) - offset) // width
+        if n <= 0:
+            return np.zeros(0, dtype=np.int64)
+        groups = self.bits[offset:offset + n * width].reshape(n, width).astype(np.int64)
+        weights = 1 << np.arange(width)
+        if msb_first:
+            weights = weights[::-1]
+        return groups @ weights
@@ -0,0 +1,129 @@
+import threading
+
+import numpy as np
+import soundfile as sf
+
+from rtlog import status_bits, status_names
+
+
+# Audio capture that keeps disk I/O out of the PortAudio callback.
+# The callback only copies each block into a preallocated ring buffer; a
+# writer thread drains the ring to the WAV file in large blocks (and hands the
+# same blocks to an optional consumer such as the live decoder).
+# Given an rtlog.RealtimeLog, stream status flags and ring overflows are
+# logged through it instead of being printed from the callback.
+
+
+class RingBufferRecorder:
+    def __init__(self, path, sample_rate, channels=1, dtype='float32', subtype='PCM_16',
+                 seconds=30, write_frames=None, on_block=None, log=None):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.dtype = dtype
+        self.subtype = subtype
+        self.capacity = int(seconds * sample_rate)
+        self.write_frames = write_frames or sample_rate // 2  # ~0.5 s per disk write
+        self.on_block = on_block
+        self.ring = np.zeros((self.capacity, channels), dtype=dtype)
+        # only the callback advances head, only the writer advances tail
+        self.head = 0
+        self.tail = 0
+        self.blocks = 0
+        self.input_overflows = 0
+        self.input_underflows = 0
+        self.ring_overflows = 0
+        self.dropped_frames = 0
+        self.frames_written = 0
+        self._data_ready = threading.Event()
+        self._stopping = False
+        self._writer = None
+        self._file = None
+        self._log = None
+        if log is not None:
+            self._log = log.ring("capture")
+            self._status_code = log.register("stream_status", lambda a, b: status_names(a))
+            self._overflow_code = log.register("ring_overflow", "capture ring full, dropped {a} frames")
+
+    def callback(self, indata, frames, time, status):
+        self.blocks += 1
+        if status:
+            if status.input_overflow:
+                self.input_overflows += 1
+            if status.input_underflow:
+                self.input_underflows += 1
+            if self._log:
+                self._log.post(self._status_code, status_bits(status))
+        free = self.capacity - (self.head - self.tail)
+        n = frames
+        if n > free:
+            self.ring_overflows += 1
+            self.dropped_frames += n - free
+            if self._log:
+                self._log.post(self._overflow_code, n - free)
+            n = free
+        if n <= 0:
+            return
+        start = self.head % self.capacity
+        first = min(n, self.capacity - start)
+        self.ring[start:start + first] = indata[:first]
+        if first < n:
+            self.ring[:n - first] = indata[first:n]
+        self.head += n
+        if self.head - self.tail >= self.write_frames:
+            self._data_ready.set()
+
+    def start(self):
+        self._file = sf.SoundFile(self.path, mode='w', samplerate=self.sample_rate,
+                                  channels=self.channels, subtype=self.subtype)
+        self._stopping = False
+        self._writer = threading.Thread(target=self._drain_loop, daemon=True)
+        self._writer.start()
+
+    def stop(self):
+        """Drain what is left, close the file and return the capture counters."""
+        self._stopping = True
+        self._data_ready.set()
+        if self._writer:
+            self._writer.join()
+            self._writer = None
+        if self._file:
+            self._file.close()
+            self._file = None
+        return self.stats()
+
+    def stats(self):
+        return {
+            "blocks": self.blocks,
+            "framesWritten": self.frames_written,
+            "inputOverflows": self.input_overflows,
+            "inputUnderflows": self.input_underflows,
+            "ringOverflows": self.ring_overflows,
+            "droppedFrames": self.dropped_frames,
+        }
+
+    def _drain_loop(self):
+        while True:
+            self._data_ready.wait(timeout=0.25)
+            self._data_ready.clear()
+            stopping = self._stopping
+            self._drain()
+            if stopping:
+                break
+
+    def _drain(self):
+        available = self.head - self.tail
+        if available <= 0:
+            return
+        while available > 0:
+            start = self.tail % self.capacity
+            n = min(available, self.capacity - start)
+            block = self.ring[start:start + n]
+            self._file.write(block)
+            if self.on_block:
+                self.on_block(block[:, 0] if self.channels == 1 else block)
+            self.tail += n
+            self.frames_written += n
+            available -= n
+        if self._file:
+            self._file.flush()  # keeps the WAV header current for readers
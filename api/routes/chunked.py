@@ -0,0 +1,134 @@
+import numpy as np
+import soundfile as sf
+
+from bitbuf import BitBuffer
+from filters import StreamingDecimator, decimator_design, sos_bandpass
+from timing import symbol_timing
+
+
+# Constant-memory decoding of long recordings.
+# The whole-file path (sf.read -> decimate -> normalize -> sosfiltfilt ->
+# symbol timing) holds several float copies of the pass at once. Here the
+# file is read block by block through SoundFile.blocks and decimated on the
+# fly, and the filter and timing recovery run on overlapping windows: each
+# window is one core stretch plus a margin on both sides, long enough for
+# the zero-phase filter and the clock loop to settle, and only the symbol
+# centres inside the core are kept. Only the per-bit decisions and powers
+# are accumulated, so memory is set by the window length, not the recording.
+#
+#   reader = BlockReader("pass.wav", target_rate=12000)
+#   demod = demodulate_file(reader, [50, 100])
+#   bits = demod[50].bits
+
+
+class BlockReader:
+    """Mono blocks of a sound file, decimated to target_rate while reading."""
+
+    def __init__(self, path, target_rate=None, block_size=1 << 16):
+        self.path = path
+        self.block_size = block_size
+        self.input_rate = sf.info(path).samplerate
+        self.sample_rate = self.input_rate
+        if target_rate and self.input_rate > target_rate:
+            up, _, _ = decimator_design(self.input_rate, target_rate)
+            if up == 1:  # the block-wise decimator needs an integer factor
+                self.sample_rate = target_rate
+
+    def __iter__(self):
+        decimator = None
+        if self.sample_rate != self.input_rate:
+            decimator = StreamingDecimator(self.input_rate, self.sample_rate)
+        with sf.SoundFile(self.path) as f:
+            for block in f.blocks(self.block_size, dtype='float32', always_2d=True):
+                block = block[:, 0]
+                yield decimator.process(block) if decimator else block
+        if decimator:
+            yield decimator.flush()
+
+    def peak(self):
+        """Largest absolute sample, as normalize_audio would see it."""
+        return max((float(np.max(np.abs(block))) for block in self if len(block)), default=0.0)
+
+
+def overlapping_windows(blocks, core, margin):
+    """(offset, window, lo, hi): window starts at sample offset; window[lo:hi] is its core.
+
+    Consecutive cores tile the signal. Every window reaches margin samples
+    past its core on both sides, except where the signal starts or ends.
+    """
+    pending, pending_len = [], 0
+    buf, buf_start = np.zeros(0), 0
+    core_start = 0
+    for block in blocks:
+        pending.append(block)
+        pending_len += len(block)
+        if buf_start + len(buf) + pending_len < core_start + core + margin:
+            continue
+        buf = np.concatenate([buf] + pending)
+        pending, pending_len = [], 0
+        while buf_start + len(buf) >= core_start + core + margin:
+            yield buf_start, buf, core_start - buf_start, core_start + core - buf_start
+            core_start += core
+            drop = max(0, core_start - margin - buf_start)
+            buf, buf_start = buf[drop:], buf_start + drop
+    buf = np.concatenate([buf] + pending)
+    if buf_start + len(buf) > core_start:
+        yield buf_start, buf, core_start - buf_start, len(buf)
+
+
+class BitTrack:
+    """Bit decisions at one baud rate, appended window by window."""
+
+    def __init__(self, baud_rate):
+        self.baud_rate = baud_rate
+        self.times, self.marks, self.spaces = [], [], []
+        self.last = -np.inf  # last kept symbol centre
+
+    def add(self, centres, mark, space):
+        self.times.append(centres)
+        self.marks.append(mark)
+        self.spaces.append(space)
+        if len(centres):
+            self.last = centres[-1]
+
+    @property
+    def bit_times(self):
+        return np.concatenate(self.times) if self.times else np.zeros(0)
+
+    @property
+    def mark_powers(self):
+        return np.concatenate(self.marks) if self.marks else np.zeros(0)
+
+    @property
+    def space_powers(self):
+        return np.concatenate(self.spaces) if self.spaces else np.zeros(0)
+
+    @property
+    def bits(self):
+        return BitBuffer(self.mark_powers > self.space_powers)
+
+
+def demodulate_file(reader, baud_rates, mark_freq=1200, space_freq=2200, low_cutoff=1000, high_cutoff=2500,
+                    chunk_seconds=30, margin_bits=200, peak=None):
+    """Normalize, bandpass and recover bits at every baud rate, one window at a time.
+
+    Returns {baud_rate: BitTrack}; matches the whole-file path up to the
+    settling of the filters at window edges, which the margin absorbs.
+    """
+    sample_rate = reader.sample_rate
+    if peak is None:
+        peak = reader.peak()
+    scale = 4 / (peak + 1e-6)  # normalize_audio
+    core = max(int(chunk_seconds * sample_rate), 1)
+    margin = int(max(0.1 * sample_rate, margin_bits * sample_rate / min(baud_rates)))
+    tracks = {baud: BitTrack(baud) for baud in baud_rates}
+    for offset, window, lo, hi in overlapping_windows(reader, core, margin):
+        filtered = sos_bandpass(window * scale, sample_rate, low_cutoff, high_cutoff)
+        for baud, track in tracks.items():
+            period = sample_rate / baud
+            centres, mark, space = symbol_timing(filtered, sample_rate, baud, mark_freq, space_freq)
+            # keep the core's centres; the previous window's last one decides the seam
+            keep = ((centres >= lo - period / 2) & (centres < hi)
+                    & (centres + offset > track.last + period / 2))
+            track.add(centres[keep] + offset, mark[keep], space[keep])
+    return tracks
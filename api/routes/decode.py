@@ -0,0 +1,165 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+import try14
+from hypotheses import HypothesisDecoder
+from stream_demod import MultiChannelDemodulator
+
+
+# Offline batch decoding of archived passes.
+# Runs the try14 pipeline (decimate -> bandpass -> hypotheses -> demod ->
+# UART -> $...# payload) on every file in a process pool and writes one JSON
+# line per file. Nothing is posted to the backend and no plots are rendered
+# unless asked for.
+#
+#   python decode.py ../../recorded_audio*.wav archive/2024-05-01/ -j 4 -o passes.jsonl
+#   python decode.py "passes/**/*.wav" --baud 50 100 --plots static/plots
+#
+# With --together, files recorded at the same time by different receivers
+# (same sample rate) are decoded side by side in one vectorized pass, one
+# channel per receiver, and each record is tagged with its source.
+#
+#   python decode.py rx_north.wav rx_south.wav --together
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg')
+
+
+def expand_inputs(inputs):
+    """Files, directories (their audio files) and glob patterns -> sorted unique paths."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            found = [os.path.join(item, name) for name in os.listdir(item)
+                     if name.lower().endswith(AUDIO_EXTENSIONS)]
+        elif os.path.exists(item):
+            found = [item]
+        else:
+            found = glob.glob(item, recursive=True)
+            if not found:
+                print(f"No files match {item}", file=sys.stderr)
+        paths.extend(sorted(found))
+    return list(dict.fromkeys(paths))
+
+
+_options = {}
+
+
+def _init_worker(options):
+    _options.update(options)
+    try14.plot_renderer.enabled = options["plot_dir"] is not None
+    try14.hypothesis_decoder = HypothesisDecoder(max_workers=1)  # the batch pool is the parallelism
+
+
+def decode_file(path):
+    t0 = time.perf_counter()
+    record = {"file": path}
+    try:
+        # the pipeline prints as it goes; keep stdout for the JSON lines
+        with contextlib.redirect_stdout(sys.stderr if _options["verbose"] else io.StringIO()):
+            stem = os.path.splitext(os.path.basename(path))[0]
+            result = try14.process_recorded_audio(path, post=_options["post"],
+                                                  possible_baud_rates=_options["baud_rates"],
+                                                  plot_dir=_options["plot_dir"] or 'static/plots',
+                                                  plot_prefix=f"{stem}_")
+            try14.plot_renderer.wait()
+        if result is None:
+            record["error"] = "no audio in file"
+        else:
+            record.update(result)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["decodeTime"] = time.perf_counter() - t0
+    return record
+
+
+def decode_together(paths, baud_rate, block_size=65536):
+    """One MultiChannelDemodulator over every channel of every file; one record per source."""
+    t0 = time.perf_counter()
+    files = [sf.SoundFile(path) for path in paths]
+    try:
+        rates = {f.samplerate for f in files}
+        if len(rates) != 1:
+            raise ValueError(f"--together needs one sample rate, got {sorted(rates)}")
+        sources = [path if f.channels == 1 else f"{path}#{ch}"
+                   for path, f in zip(paths, files) for ch in range(f.channels)]
+        demod = MultiChannelDemodulator(rates.pop(), len(sources), baud_rate=baud_rate,
+                                        sources=sources, decimate_to=try14.decimate_rate)
+        while True:
+            blocks = [f.read(block_size, dtype='float64', always_2d=True) for f in files]
+            longest = max(len(b) for b in blocks)
+            if longest == 0:
+                break
+            # sources that already ended are padded with silence
+            demod.feed(np.hstack([np.pad(b, ((0, longest - len(b)), (0, 0))) for b in blocks]))
+        demod.flush()
+    finally:
+        for f in files:
+            f.close()
+    elapsed = time.perf_counter() - t0
+    records = []
+    for source, result in demod.results().items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            clean = try14.extract_clean(result["decodedUart"])
+        records.append({"file": source.split('#')[0], "source": source, **result,
+                        "clean": clean, "decodeTime": elapsed})
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decode recorded AFSK passes to JSON lines.")
+    parser.add_argument("inputs", nargs="+", help="audio files, directories or glob patterns")
+    parser.add_argument("-o", "--output", help="JSONL file to write (default: stdout)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--baud", type=int, nargs="+", default=[50], help="baud rates to try")
+    parser.add_argument("--plots", metavar="DIR", help="render diagnostic plots into DIR")
+    parser.add_argument("--post", action="store_true", help="also post each result to the backend")
+    parser.add_argument("--together", action="store_true",
+                        help="decode simultaneous recordings as channels of one pass (first --baud only)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the pipeline's output on stderr")
+    args = parser.parse_args(argv)
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        parser.error("no audio files found")
+    if args.plots:
+        os.makedirs(args.plots, exist_ok=True)
+    options = {"plot_dir": args.plots, "post": args.post, "baud_rates": tuple(args.baud),
+               "verbose": args.verbose}
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    t0 = time.perf_counter()
+    failed = 0
+    try:
+        if args.together:
+            records = decode_together(paths, args.baud[0])
+            for record in records:
+                out.write(json.dumps(record) + "\n")
+            print(f"Decoded {len(records)} sources together in {time.perf_counter() - t0:.1f} s",
+                  file=sys.stderr)
+            return 0
+        with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(paths))),
+                                 initializer=_init_worker, initargs=(options,)) as pool:
+            for record in pool.map(decode_file, paths):
+                failed += "error" in record
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Decoded {len(paths) - failed}/{len(paths)} files in {time.perf_counter() - t0:.1f} s",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
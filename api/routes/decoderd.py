@@ -0,0 +1,166 @@
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import try14
+
+# Long-lived decoder service for recording.js.
+# Importing try14 once keeps numpy/scipy/matplotlib/requests loaded, so stop
+# only pays for the decode itself instead of a fresh Python start-up.
+#
+#   POST /start   start capturing (?stream=1 also decodes live, for /status)
+#   POST /stop    stop capturing, decode the recording, post to backend, return the result
+#   POST /reset   stop capturing and discard the recording
+#   GET  /status  recording state, characters decoded so far, telemetry delivery
+#   GET  /result  result of the last decode
+#   GET  /metrics stage timings and counters (Prometheus text format)
+#
+# python decoderd.py [--no-plots]
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("DECODER_PORT", 8890))
+
+state_lock = threading.Lock()
+capture_thread = None
+started_at = None
+last_result = None
+last_error = None
+
+
+def start(query):
+    global capture_thread, started_at, last_error
+    with state_lock:
+        if capture_thread and capture_thread.is_alive():
+            return 409, {"success": False, "error": "Recording already going"}
+        try14.live_decode = query.get("stream", ["0"])[0] == "1"
+        try14.live_demod = None
+        capture_thread = threading.Thread(target=try14.start_recording, daemon=True)
+        capture_thread.start()
+        started_at = time.time()
+        last_error = None
+    return 200, {"success": True, "message": "Recording started", "pid": os.getpid()}
+
+
+def end_capture():
+    global capture_thread
+    if not (capture_thread and capture_thread.is_alive()):
+        return False
+    try14.request_stop()
+    capture_thread.join()
+    capture_thread = None
+    return True
+
+
+def stop(query):
+    global last_result, last_error
+    with state_lock:
+        if not end_capture():
+            return 400, {"success": False, "error": "No recording active"}
+        # the live decode is only a preview: the recording gets the full offline decode
+        if os.path.exists(try14.stream_result):
+            os.remove(try14.stream_result)
+        t0 = time.perf_counter()
+        try:
+            last_result = try14.stop_recording(settle=0)
+        except Exception as e:
+            traceback.print_exc()
+            last_error = str(e)
+            return 500, {"success": False, "error": last_error}
+        decode_time = time.perf_counter() - t0
+    return 200, {"success": True, "message": "Recording stopped and processed",
+                 "result": last_result, "decodeTime": decode_time}
+
+
+def reset(query=None):
+    with state_lock:
+        end_capture()
+        if os.path.exists(try14.stream_result):
+            os.remove(try14.stream_result)
+    return 200, {"success": True, "message": "Recording reset"}
+
+
+def status(query):
+    demod = try14.live_demod
+    recording = bool(capture_thread and capture_thread.is_alive())
+    return 200, {
+        "recording": recording,
+        "pid": os.getpid(),
+        "startedAt": started_at,
+        "liveText": demod.decoded_uart if demod else "",
+        "lastError": last_error,
+        "delivery": try14.backend.stats(),
+    }
+
+
+def result(query):
+    if last_result is None:
+        return 404, {"success": False, "error": "No result yet"}
+    return 200, {"success": True, "result": last_result}
+
+
+def metrics(query):
+    try14.backend.stats()  # refreshes the delivery gauges
+    return 200, try14.metrics.prometheus()
+
+
+ROUTES = {
+    ("POST", "/start"): start,
+    ("POST", "/stop"): stop,
+    ("POST", "/reset"): reset,
+    ("GET", "/status"): status,
+    ("GET", "/result"): result,
+    ("GET", "/metrics"): metrics,
+}
+
+
+class DecoderHandler(BaseHTTPRequestHandler):
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        handler = ROUTES.get((method, url.path))
+        if handler is None:
+            code, body = 404, {"success": False, "error": "Not found"}
+        else:
+            code, body = handler(parse_qs(url.query))
+        if isinstance(body, str):
+            data, content_type = body.encode(), "text/plain; version=0.0.4"
+        else:
+            data, content_type = json.dumps(body).encode(), "application/json"
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        pass  # keep stdout for decoder output
+
+
+def main():
+    try14.plot_renderer.enabled = "--no-plots" not in sys.argv[1:]
+    server = ThreadingHTTPServer((HOST, PORT), DecoderHandler)
+
+    def shutdown(signum, frame):
+        reset()
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    # try14 installs handlers that only stop capture; the service should exit
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    print(f"Decoder service listening on http://{HOST}:{PORT}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+import contextlib
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process spool lock
+    fcntl = None
+
+
+# Telemetry delivery to the Express backend.
+# One keep-alive session is shared by every post, with timeouts and retries
+# on connection errors and 502/503/504. send() posts a pass right away and
+# returns the backend's reply (try14 needs the row id for the plot paths).
+# submit() queues a frame for a background thread, which posts frames in
+# batches to /afsk/audio/batch. Anything that cannot be delivered goes to an
+# append-only spool file under DATA_DIR, opened the first time it is needed.
+# The spool is replayed in order before new frames whenever the backend is
+# reachable again, so a backend restart loses nothing and does not reorder
+# anything. Only connection errors, timeouts
+# and 5xx answers are retried; a frame the backend refuses (4xx) would be
+# refused forever, so it is set aside in <spool>.bad instead.
+#
+#   backend = default_client(metrics)   # what the decoder scripts use
+#   body = backend.send({"binaryData": ..., "decodedUart": ...})
+#   backend.submit(frame)          # batched, from a streaming decoder
+#   backend.stats()                # queue depth, spool backlog, latency (also set as metrics gauges)
+#   backend.close()                # flush the queue before exiting
+
+BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:8888/api")
+# where the spool lives, whatever directory a script is started from
+DATA_DIR = os.environ.get("AFSK_DATA_DIR",
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data'))
+
+
+class Spool:
+    """Undelivered payloads as JSON lines; <path>.offset holds how many bytes were delivered.
+
+    Several processes can share one spool (decode.py workers, decoderd, the
+    try scripts started from the same directory), so every change is made
+    under an flock on <path>.lock, with the offset and line count re-read
+    from disk. A torn last line left by a crash, or a line that does not
+    parse, is moved to <path>.bad rather than blocking the rest.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset_path = path + '.offset'
+        self.lock_path = path + '.lock'
+        self.bad_path = path + '.bad'
+        self.offset = 0
+        self.pending = 0
+        self.unreadable = []  # lines read() skipped, quarantined by commit()
+        with self.locked():
+            self._refresh()
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Hold the spool lock (across processes, and across threads of this one)."""
+        with open(self.lock_path, 'a') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def waiting(self):
+        """Whether any process has spooled something (cheap, no lock)."""
+        return os.path.exists(self.path)
+
+    def append(self, payloads):
+        with self.locked():
+            self._repair()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for payload in payloads:
+                    f.write(json.dumps(payload) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._refresh()
+
+    def read(self, limit):
+        """Up to limit payloads from the oldest undelivered one, and the offset after them.
+
+        Call with the lock held. Lines that do not parse are skipped, and
+        quarantined when the batch is committed.
+        """
+        self.offset = self._read_offset()
+        self.unreadable = []
+        payloads = []
+        end = self.offset
+        if not self.waiting():
+            return payloads, end
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b'\n'):  # torn last line from a crash
+                    break
+                end += len(line)
+                try:
+                    payloads.append(json.loads(line))
+                except ValueError:
+                    self.unreadable.append(line)
+                    continue
+                if len(payloads) >= limit:
+                    break
+        return payloads, end
+
+    def commit(self, end):
+        """Mark everything before end as delivered. Call with the lock held."""
+        for line in self.unreadable:
+            self._quarantine(line)
+        self.unreadable = []
+        if not self.waiting() or end >= os.path.getsize(self.path):
+            for path in (self.path, self.offset_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        else:
+            tmp = self.offset_path + '.tmp'
+            with open(tmp, 'w') as f:
+                f.write(str(end))
+            os.replace(tmp, self.offset_path)
+        self._refresh()
+
+    def _read_offset(self):
+        if not os.path.exists(self.offset_path):
+            return 0
+        with open(self.offset_path) as f:
+            return int(f.read() or 0)
+
+    def _refresh(self):
+        self.offset = self._read_offset()
+        self.pending = 0
+        if self.waiting():
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                self.pending = sum(1 for line in f if line.endswith(b'\n'))
+
+    def _repair(self):
+        """Cut a torn last line off so the next append starts on a fresh line."""
+        if not self.waiting():
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+            if tail.endswith(b'\n'):
+                return
+            cut = size - len(tail) + tail.rfind(b'\n') + 1 if b'\n' in tail else 0
+            f.seek(cut)
+            self._quarantine(f.read())
+            f.truncate(cut)
+
+    def reject(self, payloads):
+        """Set aside payloads the backend refused (4xx); retrying them would never succeed."""
+        for payload in payloads:
+            self._quarantine(json.dumps(payload).encode(), "rejected spool frame")
+
+    def _quarantine(self, line, what="unreadable spool line"):
+        print(f"Moving {what} to {self.bad_path}")
+        with open(self.bad_path, 'ab') as f:
+            f.write(line.rstrip(b'\n') + b'\n')
+
+
+def rejected(error):
+    """True for a 4xx answer: the backend refuses the payload itself, so it is not retried."""
+    response = getattr(error, 'response', None)
+    return isinstance(error, requests.exceptions.HTTPError) and response is not None \
+        and 400 <= response.status_code < 500
+
+
+def default_client(metrics=None):
+    """The client every decoder script uses: BACKEND_URL, keep-alive session, spool under DATA_DIR."""
+    return TelemetryClient(metrics=metrics)
+
+
+class TelemetryClient:
+    def __init__(self, base_url=BACKEND_URL, spool_path=None, timeout=(3.05, 10),
+                 retries=3, backoff=0.5, batch_size=32, linger=0.5, max_queue=10000, metrics=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.linger = linger  # seconds a batch waits for more frames
+        self.session = requests.Session()
+        retry = Retry(total=retries, connect=retries, read=0, status=retries, backoff_factor=backoff,
+                      status_forcelist=(502, 503, 504), allowed_methods=None, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.spool_path = spool_path or os.path.join(DATA_DIR, 'telemetry_spool.jsonl')
+        self._spool_file = None  # opened on first use, so importing a script touches no files
+        self.queue = queue.Queue(max_queue)
+        self._lock = threading.RLock()  # one delivery at a time keeps the order
+        self._worker = None
+        self._closing = False
+        self.delivered = 0
+        self.failed = 0
+        self.latencies = np.zeros(1024)  # most recent delivery latencies, seconds
+        self.latency_count = 0
+        self.metrics = metrics  # optional metrics.Metrics: post timing, bytes and frames posted
+
+    @property
+    def spool(self):
+        if self._spool_file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.spool_path)), exist_ok=True)
+            self._spool_file = Spool(self.spool_path)
+        return self._spool_file
+
+    def spooled(self):
+        """Whether any process has spooled something, without opening the spool."""
+        return os.path.exists(self.spool_path)
+
+    def post(self, path, payload):
+        """POST through the shared session; raises for HTTP errors."""
+        data = json.dumps(payload).encode()
+        t0 = time.perf_counter()
+        resp = self.session.post(self.base_url + path, data=data, timeout=self.timeout,
+                                 headers={"Content-Type": "application/json"})
+        if self.metrics:
+            self.metrics.observe("post", time.perf_counter() - t0)
+        resp.raise_for_status()
+        if self.metrics:
+            self.metrics.count("bytes_posted", len(data))
+        return resp
+
+    def send(self, payload):
+        """Deliver one payload now; returns the backend's JSON reply, or None if it was spooled."""
+        t0 = time.perf_counter()
+        self.flush()  # frames submitted earlier go first
+        with self._lock:
+            try:
+                if not self.replay():
+                    self._spool([payload])
+                    return None
+                body = self.post('/afsk/audio', payload).json()
+            except requests.exceptions.RequestException as e:
+                if rejected(e):
+                    print(f"Backend rejected frame: {e}")
+                    self._reject([payload])
+                    return None
+                print(f"Error sending data to backend: {e} (spooled)")
+                self._spool([payload])
+                return None
+            except ValueError as e:
+                print(f"Error sending data to backend: {e} (spooled)")
+                self._spool([payload])
+                return None
+        self._delivered([t0])
+        return body
+
+    def submit(self, payload):
+        """Queue a payload for batched delivery in the background."""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, daemon=True)
+            self._worker.start()
+        try:
+            self.queue.put_nowait((payload, time.perf_counter()))
+        except queue.Full:  # backend far behind: straight to disk rather than dropping
+            with self._lock:
+                self._spool([payload])
+
+    def replay(self):
+        """Post spooled payloads, oldest first; True once the spool is empty."""
+        if not self.spooled():
+            return True
+        # the spool lock is held throughout, so two processes never replay the same lines
+        with self._lock, self.spool.locked():
+            while True:
+                payloads, end = self.spool.read(self.batch_size)
+                if end == self.spool.offset:
+                    break
+                if payloads:
+                    try:
+                        refused = self._post_batch(payloads)
+                    except requests.exceptions.RequestException:
+                        return False
+                    self.spool.reject(refused)
+                    payloads = [p for p in payloads if not any(p is r for r in refused)]
+                self.spool.commit(end)
+                if not payloads:  # only quarantined or refused lines
+                    continue
+                self.delivered += len(payloads)
+                if self.metrics:
+                    self.metrics.count("frames_posted", len(payloads))
+                print(f"Replayed {len(payloads)} spooled frames ({self.spool.pending} left)")
+            return True
+
+    def flush(self):
+        """Wait until every submitted payload is delivered or spooled."""
+        if self._worker is not None:
+            self.queue.join()
+
+    def close(self):
+        self.flush()
+        self._closing = True
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self.session.close()
+
+    def stats(self):
+        recent = self.latencies[:min(self.latency_count, len(self.latencies))]
+        stats = {
+            "queueDepth": self.queue.qsize(),
+            "spooled": self._spool_file.pending if self._spool_file else 0,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "latencyMeanMs": 1000 * float(recent.mean()) if len(recent) else 0.0,
+            "latencyP95Ms": 1000 * float(np.percentile(recent, 95)) if len(recent) else 0.0,
+            "latencyMaxMs": 1000 * float(recent.max()) if len(recent) else 0.0,
+        }
+        if self.metrics:
+            self.metrics.gauge("delivery_queue_depth", stats["queueDepth"])
+            self.metrics.gauge("delivery_spooled", stats["spooled"])
+            self.metrics.gauge("delivery_latency_mean_seconds", stats["latencyMeanMs"] / 1000)
+            self.metrics.gauge("delivery_latency_p95_seconds", stats["latencyP95Ms"] / 1000)
+            self.metrics.gauge("delivery_latency_max_seconds", stats["latencyMaxMs"] / 1000)
+        return stats
+
+    def _run(self):
+        while not self._closing:
+            try:
+                batch = [self.queue.get(timeout=self.linger)]
+            except queue.Empty:
+                if self.spooled():
+                    self.replay()  # backend may be back
+                continue
+            deadline = time.perf_counter() + self.linger
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.perf_counter())))
+                except queue.Empty:
+                    break
+            try:
+                self._deliver(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _deliver(self, batch):
+        payloads = [payload for payload, _ in batch]
+        with self._lock:
+            if not self.replay():
+                self._spool(payloads)
+                return
+            try:
+                refused = self._post_batch(payloads)
+            except requests.exceptions.RequestException as e:
+                print(f"Error sending batch to backend: {e} (spooled)")
+                self._spool(payloads)
+                return
+            self._reject(refused)
+        self._delivered([t0 for payload, t0 in batch if not any(payload is r for r in refused)])
+
+    def _post_batch(self, payloads):
+        """POST a batch; returns the payloads the backend refused (4xx).
+
+        A refused batch is retried one frame at a time so that only the bad
+        frames are set aside. Connection errors, timeouts and 5xx raise.
+        """
+        try:
+            self.post('/afsk/audio/batch', {"frames": payloads})
+            return []
+        except requests.exceptions.RequestException as e:
+            if not rejected(e):
+                raise
+            if len(payloads) == 1:
+                print(f"Backend rejected frame: {e}")
+                return list(payloads)
+        return [p for payload in payloads for p in self._post_batch([payload])]
+
+    def _reject(self, payloads):
+        if payloads:
+            self.spool.reject(payloads)
+            self.failed += len(payloads)
+
+    def _spool(self, payloads):
+        self.spool.append(payloads)
+        self.failed += len(payloads)
+        if self.metrics:
+            self.metrics.count("frames_spooled", len(payloads))
+
+    def _delivered(self, submitted):
+        now = time.perf_counter()
+        for t0 in submitted:
+            self.latencies[self.latency_count % len(self.latencies)] = now - t0
+            self.latency_count += 1
+        self.delivered += len(submitted)
+        if self.metrics:
+            self.metrics.count("frames_posted", len(submitted))
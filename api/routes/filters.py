@@ -0,0 +1,114 @@
+from functools import lru_cache
+
+import numpy as np
+import scipy.signal as sp_signal
+
+from tone_power import bit_windows
+
+
+# Shared bandpass filtering for the decoders.
+# Designs are cached per (order, band, sample rate) and kept in
+# second-order-sections form, which stays stable at order 6 where (b, a)
+# polynomials start losing precision.
+
+
+@lru_cache(maxsize=None)
+def bandpass_sos(order, low_cutoff, high_cutoff, sample_rate):
+    nyquist = 0.5 * sample_rate
+    sos = sp_signal.butter(order, [low_cutoff / nyquist, high_cutoff / nyquist], btype='band', output='sos')
+    return sos  # shared between callers - do not modify in place
+
+
+def sos_bandpass(data, sample_rate, low_cutoff=1000, high_cutoff=2500, order=6, zero_phase=True):
+    """Filter a whole signal: zero-phase (sosfiltfilt) or causal (sosfilt)."""
+    sos = bandpass_sos(order, low_cutoff, high_cutoff, sample_rate)
+    if zero_phase:
+        return sp_signal.sosfiltfilt(sos, data)
+    return sp_signal.sosfilt(sos, data)
+
+
+class StreamingBandpass:
+    """Causal bandpass that carries filter state (zi) from block to block.
+
+    With channels set, blocks are (frames, channels) and every channel is
+    filtered in the same call with its own state.
+    """
+
+    def __init__(self, sample_rate, low_cutoff=1000, high_cutoff=2500, order=6, channels=None):
+        self.sos = bandpass_sos(order, low_cutoff, high_cutoff, sample_rate)
+        self.channels = channels
+        self.reset()
+
+    def reset(self):
+        self.zi = np.zeros((self.sos.shape[0], 2) + ((self.channels,) if self.channels else ()))
+
+    def process(self, block):
+        if len(block) == 0:  # sosfilt cannot take an empty block along axis 0
+            return np.asarray(block, dtype=np.float64)
+        filtered, self.zi = sp_signal.sosfilt(self.sos, block, axis=0, zi=self.zi)
+        return filtered
+
+
+# Decimation front-end. The AFSK tones sit below 2.5 kHz, so 48 kHz captures
+# can be brought down to ~12 kHz before filtering and tone detection.
+# Taps match what resample_poly designs by default, cached per rate pair.
+
+@lru_cache(maxsize=None)
+def decimator_design(in_rate, out_rate):
+    g = np.gcd(int(in_rate), int(out_rate))
+    up, down = int(out_rate) // g, int(in_rate) // g
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    taps = sp_signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', 5.0)) * up
+    return up, down, taps
+
+
+def decimate(data, sample_rate, target_rate):
+    """Resample data down to target_rate; returns (data, rate). No-op if already at or below it."""
+    if not target_rate or sample_rate <= target_rate:
+        return data, sample_rate
+    up, down, taps = decimator_design(sample_rate, target_rate)
+    return sp_signal.resample_poly(data, up, down, window=taps), target_rate
+
+
+class StreamingDecimator:
+    """Block-wise integer-factor polyphase decimator; output matches decimate() on the whole signal.
+
+    With channels set, blocks are (frames, channels), decimated along axis 0.
+    """
+
+    def __init__(self, sample_rate, target_rate, channels=None):
+        up, down, taps = decimator_design(sample_rate, target_rate)
+        if up != 1:
+            raise ValueError(f"streaming decimation needs an integer factor, got {sample_rate}->{target_rate}")
+        self.factor = down
+        self.kernel = taps[::-1].copy()
+        self.delay = (len(taps) - 1) // 2  # resample_poly output is centred on the taps
+        self.frame_shape = (channels,) if channels else ()
+        self.history = np.zeros((len(taps) - 1,) + self.frame_shape)  # last input samples (zero state at start)
+        self.n_in = 0  # input samples seen
+        self.n_out = 0  # output samples produced
+
+    def process(self, block):
+        # output m is the FIR evaluated at input index delay + m*factor; only
+        # those points are computed, as windows strided by the factor
+        ext = np.concatenate((self.history, block))
+        first = self.delay + self.n_out * self.factor - self.n_in
+        self.n_in += len(block)
+        self.history = ext[len(ext) - len(self.history):]
+        if first < 0 or len(ext) - first < len(self.kernel):
+            out = np.zeros((0,) + self.frame_shape)
+        elif self.frame_shape:
+            windows = np.lib.stride_tricks.sliding_window_view(ext[first:], len(self.kernel), axis=0)
+            out = windows[::self.factor] @ self.kernel  # (outputs, channels, taps) @ taps
+        else:
+            out = bit_windows(ext[first:], len(self.kernel), hop=self.factor) @ self.kernel
+        self.n_out += len(out)
+        return out
+
+    def flush(self):
+        """Outputs still owed for the end of the signal (resample_poly pads with zeros)."""
+        owed = -(-self.n_in // self.factor) - self.n_out  # whole-signal length is ceil(n_in / factor)
+        if owed <= 0:
+            return np.zeros((0,) + self.frame_shape)
+        return self.process(np.zeros((self.delay + self.factor,) + self.frame_shape))[:owed]
@@ -1,6 +1,6 @@
-import numpy as np
-import wave
-import struct
+import argparse
+
+from synth import message_bits, write_wav
 
 # Parameters
 mark_freq = 1200       # Hz (bit 1)
@@ -11,36 +11,26 @@ preamble_duration = 1  # seconds
 
 # Message to encode
 message = "$$$??????###"
-
-# Convert message to bit string (LSB first per byte)
-def ascii_to_bits_lsb_first(msg):
-    return ''.join(f"{ord(c):08b}"[::-1] for c in msg)
-
-bit_string = ascii_to_bits_lsb_first(message)
-
-# Optional: Add preamble of alternating bits ("101010...")
-preamble_bits = "10101010" * int((preamble_duration * baud_rate) / 8)
-full_bits = preamble_bits + bit_string
-
-# Generate AFSK waveform
-samples_per_bit = int(sample_rate / baud_rate)
-waveform = np.array([], dtype=np.float32)
-
-for bit in full_bits:
-    freq = mark_freq if bit == '1' else space_freq
-    t = np.arange(samples_per_bit) / sample_rate
-    tone = np.sin(2 * np.pi * freq * t)
-    waveform = np.concatenate((waveform, tone))
-
-# Normalize to int16 range
-waveform_int16 = np.int16(waveform / np.max(np.abs(waveform)) * 32767)
-
-# Save to .wav file
 output_filename = "afsk_50baud_message.wav"
-with wave.open(output_filename, 'w') as wf:
-    wf.setnchannels(1)
-    wf.setsampwidth(2)  # 16-bit
-    wf.setframerate(sample_rate)
-    wf.writeframes(struct.pack('<' + 'h' * len(waveform_int16), *waveform_int16))
 
-print(f"AFSK audio saved to '{output_filename}' with message: {message}")
+# Defaults reproduce the original test file: raw bytes LSB first after an
+# alternating "101010..." preamble, now phase-continuous. For test corpora:
+#   python genzz.py --uart --msb-first --frame -m "V12 3 volts" -o v12.wav
+parser = argparse.ArgumentParser(description="Generate an AFSK test signal.")
+parser.add_argument("-m", "--message", default=message)
+parser.add_argument("-o", "--output", default=output_filename)
+parser.add_argument("--baud", type=int, default=baud_rate)
+parser.add_argument("--rate", type=int, default=sample_rate, help="sample rate")
+parser.add_argument("--preamble", type=float, default=preamble_duration, help="seconds of alternating bits")
+parser.add_argument("--uart", action="store_true", help="add start/stop bits to every byte")
+parser.add_argument("--msb-first", action="store_true")
+parser.add_argument("--frame", action="store_true", help="wrap the message in $...# with ESC stuffing")
+args = parser.parse_args()
+
+preamble_bits = "10101010" * int((args.preamble * args.baud) / 8)
+full_bits = message_bits(args.message, uart=args.uart, msb_first=args.msb_first, frame=args.frame,
+                         preamble=preamble_bits)
+
+frames = write_wav(args.output, full_bits, args.rate, args.baud, mark_freq, space_freq)
+
+print(f"AFSK audio saved to '{args.output}' ({frames / args.rate:.1f} s) with message: {args.message}")
@@ -0,0 +1,128 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bitbuf import BitBuffer
+from chunked import BitTrack
+from scoring import score_candidate
+from timing import symbol_timing
+from tone_power import tone_powers
+from uart import frame_uart, printable
+
+
+# Multi-hypothesis decoding for when the satellite's configuration is not
+# known. Each task demodulates the filtered signal at one baud rate (with
+# recovered symbol timing, or at fixed bit phases if asked) and then tries
+# both polarities and both bit orders on the bits it got, which is cheap
+# next to the demodulation. Tasks run on a process pool;
+# the signal is written once to a .npy file that the workers memory-map, so
+# it is not pickled to every task.
+#
+#   decoder = HypothesisDecoder()
+#   candidates = decoder.decode(filtered_data, sample_rate, [50, 100, 300, 1200])
+#   best = candidates[0]    # {"baudRate", "phase", "inverted", "msbFirst", "score", "text"}
+#
+# decode_tracks() also returns the bit decisions and tone powers behind each
+# candidate, so the winner does not have to be demodulated a second time.
+
+
+def demodulate_track(signal, sample_rate, baud_rate, phase=None, mark_freq=1200, space_freq=2200):
+    """Mark/space powers and decision per bit, as a BitTrack.
+
+    phase None recovers the symbol timing from the signal; a number slices
+    fixed bit windows starting that fraction of a bit into the signal.
+    """
+    signal = np.asarray(signal)
+    track = BitTrack(baud_rate)
+    if phase is None:
+        track.add(*symbol_timing(signal, sample_rate, baud_rate, mark_freq, space_freq))
+        return track
+    samples_per_bit = int(sample_rate / baud_rate)
+    start = int(round(phase * samples_per_bit))
+    starts, (mark_powers, space_powers) = tone_powers(signal[start:], sample_rate,
+                                                      [mark_freq, space_freq], samples_per_bit)
+    track.add(start + starts + samples_per_bit // 2, mark_powers, space_powers)
+    return track
+
+
+def demodulate_bits(signal, sample_rate, baud_rate, phase=None, mark_freq=1200, space_freq=2200):
+    """Mark/space decision per bit (see demodulate_track)."""
+    return demodulate_track(signal, sample_rate, baud_rate, phase, mark_freq, space_freq).bits
+
+
+def decode_hypothesis(signal, sample_rate, baud_rate, phase=None, expected_words=(),
+                      mark_freq=1200, space_freq=2200):
+    """All polarity / bit order candidates for one (baud rate, phase), and the BitTrack they came from."""
+    track = demodulate_track(signal, sample_rate, baud_rate, phase, mark_freq, space_freq)
+    return score_bits(track.bits, baud_rate, phase, expected_words), track
+
+
+def score_bits(bits, baud_rate, phase=None, expected_words=()):
+    """Polarity / bit order candidates for bits already demodulated at baud_rate."""
+    bits = BitBuffer(bits)
+    candidates = []
+    for inverted in (False, True):
+        trial = ~bits if inverted else bits
+        for msb_first in (True, False):
+            data, offsets = frame_uart(trial, msb_first)
+            text = printable(data)
+            framing = len(offsets) * 10 / len(trial) if len(trial) else 0.0
+            candidates.append({"baudRate": baud_rate, "phase": phase, "inverted": inverted,
+                               "msbFirst": msb_first, "text": text,
+                               "score": score_candidate(data, text, expected_words, framing)})
+    return candidates
+
+
+def _run_task(path, sample_rate, baud_rate, phase, expected_words, mark_freq, space_freq):
+    signal = np.load(path, mmap_mode='r')  # shared through the page cache, not copied per task
+    return decode_hypothesis(signal, sample_rate, baud_rate, phase, expected_words,
+                             mark_freq, space_freq)
+
+
+class HypothesisDecoder:
+    """Keeps a process pool around so repeated decodes do not pay for start-up."""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+
+    def decode(self, signal, sample_rate, baud_rates, phases=(None,),
+               expected_words=(), mark_freq=1200, space_freq=2200, top=None):
+        """Score every (baud, phase, polarity, bit order) combination; best first."""
+        candidates, _ = self.decode_tracks(signal, sample_rate, baud_rates, phases, expected_words,
+                                           mark_freq, space_freq, top)
+        return candidates
+
+    def decode_tracks(self, signal, sample_rate, baud_rates, phases=(None,),
+                      expected_words=(), mark_freq=1200, space_freq=2200, top=None):
+        """decode(), plus {(baudRate, phase): BitTrack} for the bits behind the candidates."""
+        tasks = [(baud, phase) for baud in baud_rates for phase in phases]
+        if self.max_workers <= 1 or len(tasks) <= 1:
+            results = [decode_hypothesis(signal, sample_rate, baud, phase, expected_words,
+                                         mark_freq, space_freq) for baud, phase in tasks]
+        else:
+            results = self._decode_pooled(signal, sample_rate, tasks, expected_words, mark_freq, space_freq)
+        candidates = [c for result, _ in results for c in result]
+        candidates.sort(key=lambda c: c["score"], reverse=True)
+        tracks = {task: track for task, (_, track) in zip(tasks, results)}
+        return (candidates[:top] if top else candidates), tracks
+
+    def _decode_pooled(self, signal, sample_rate, tasks, expected_words, mark_freq, space_freq):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        fd, path = tempfile.mkstemp(suffix='.npy', prefix='hypotheses-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.asarray(signal))
+            futures = [self._pool.submit(_run_task, path, sample_rate, baud, phase, tuple(expected_words),
+                                         mark_freq, space_freq) for baud, phase in tasks]
+            return [f.result() for f in futures]
+        finally:
+            os.remove(path)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
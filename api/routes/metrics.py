@@ -0,0 +1,145 @@
+import bisect
+import contextlib
+import threading
+import time
+
+
+# Counters, gauges and per-stage timing histograms for the decoders.
+# Stages are timed with time.perf_counter (monotonic). Each stage keeps a
+# fixed-bucket histogram, like a Prometheus histogram, so recording costs a
+# lock, a bisect and a few additions. Totals build up over the life of the
+# process: one decode of the CLI, or every pass handled by decoderd. They can be
+# read as Prometheus text (decoderd GET /metrics) or as JSON. A decode
+# result's "metrics" field holds only that decode's figures: they come from a
+# fresh registry that recording() attaches for the length of the decode.
+#
+#   metrics = Metrics()
+#   with metrics.timer("filter", timings):   # also stores the seconds in timings["filter"]
+#       filtered = bandpass_filter(audio, sr)
+#   metrics.count("samples_filtered", len(filtered))
+#   metrics.gauge("delivery_queue_depth", backend.queue.qsize())
+#   metrics.snapshot()      # JSON-able dict
+#   metrics.prometheus()    # text exposition format
+#   with metrics.recording() as this_decode:
+#       ...                 # this_decode.snapshot() covers just the with-block
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self):
+        """(upper bound, observations <= it) per bucket, ending with +Inf."""
+        total, out = 0, []
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class Metrics:
+    def __init__(self, prefix='afsk', buckets=BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.counters = {}
+        self.gauges = {}
+        self.stages = {}
+        self.children = []  # registries from recording() that see every update too
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            for child in self.children:
+                child.count(name, value)
+
+    def gauge(self, name, value):
+        """Set a current value (queue depth, backlog, ...)."""
+        with self._lock:
+            self.gauges[name] = value
+            for child in self.children:
+                child.gauge(name, value)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = Histogram(self.buckets)
+            hist.observe(seconds)
+            for child in self.children:
+                child.observe(stage, seconds)
+
+    @contextlib.contextmanager
+    def recording(self):
+        """A fresh Metrics that also receives every update made here until the with-block ends."""
+        child = Metrics(self.prefix, self.buckets)
+        with self._lock:
+            self.children.append(child)
+        try:
+            yield child
+        finally:
+            with self._lock:
+                self.children.remove(child)
+
+    @contextlib.contextmanager
+    def timer(self, stage, timings=None):
+        """Time the with-block as one run of stage; the seconds also go to timings[stage] if given."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            self.observe(stage, seconds)
+            if timings is not None:
+                timings[stage] = seconds
+
+    def timed(self, stage, fn):
+        """fn wrapped so every call is timed as stage (for callbacks and executor jobs)."""
+        def wrapper(*args, **kwargs):
+            with self.timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "stages": {name: {"count": h.count, "totalSeconds": h.sum, "maxSeconds": h.max,
+                                  "buckets": [[bound if bound != float('inf') else "+Inf", n]
+                                              for bound, n in h.cumulative()]}
+                           for name, h in self.stages.items()},
+            }
+
+    def prometheus(self):
+        p = self.prefix
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {p}_{name}_total counter")
+                lines.append(f"{p}_{name}_total {value}")
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE {p}_{name} gauge")
+                lines.append(f"{p}_{name} {value}")
+            if self.stages:
+                lines.append(f"# HELP {p}_stage_seconds Time spent in each decoder stage.")
+                lines.append(f"# TYPE {p}_stage_seconds histogram")
+            for stage, h in sorted(self.stages.items()):
+                for bound, n in h.cumulative():
+                    le = "+Inf" if bound == float('inf') else repr(float(bound))
+                    lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {n}')
+                lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {h.sum}')
+                lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,205 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+# asyncio pipeline for the realtime decoders: capture -> stage -> stage ...
+# Stages are connected by bounded queues. Each stage runs as its own task
+# and handles one item at a time, so stateful stages (filters, framers) see
+# their input in order. CPU-heavy stages run on a thread pool instead of
+# the event loop (numpy releases the GIL for the heavy parts).
+#
+# What a full queue does is set per stage:
+#   block        the upstream stage waits (backpressure)
+#   drop-oldest  the oldest queued item is discarded to make room
+#   drop-newest  the new item is discarded
+# The audio thread can never wait, so 'block' on the first stage acts as
+# drop-newest. A stage may also have a degraded function, which is used
+# instead of the normal one while its backlog is at or above its high-water mark.
+#
+# offer() makes no system call and takes no lock. It copies the samples
+# into a preallocated BlockRing (single writer, like rtlog.RecordRing), and
+# a task on the event loop moves them to the first stage every poll
+# seconds. If the ring is full, the block is dropped and counted in lost.
+#
+#   pipeline = Pipeline()
+#   pipeline.stage("filter", bandpass.process, offload=True, policy="drop-oldest")
+#   pipeline.stage("demod", demod.process, offload=True)
+#   runner = asyncio.create_task(pipeline.run())
+#   ...  pipeline.offer(indata[:, 0]) from the audio callback
+#   await pipeline.close(); await runner
+
+POLICIES = ('block', 'drop-oldest', 'drop-newest')
+_END = object()  # end of stream; never dropped
+
+
+class Stage:
+    def __init__(self, name, fn, maxsize=16, policy='block', offload=False, degraded=None, high_water=None):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown queue policy {policy!r}, expected one of {POLICIES}")
+        self.name = name
+        self.fn = fn
+        self.queue = asyncio.Queue(maxsize)
+        self.policy = policy
+        self.offload = offload
+        self.degraded = degraded
+        self.high_water = high_water or max(1, (maxsize * 3) // 4)
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.degraded_runs = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.busy = 0.0  # seconds spent in fn
+
+    def put_nowait(self, item):
+        """Queue item without waiting, applying the drop policy when full."""
+        self.received += 1
+        if self.queue.full():
+            self.dropped += 1
+            if self.policy != 'drop-oldest':
+                return
+            self.queue.get_nowait()
+        self.queue.put_nowait(item)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    async def put(self, item):
+        if self.policy != 'block':
+            self.put_nowait(item)
+            return
+        self.received += 1
+        await self.queue.put(item)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def stats(self):
+        return {"depth": self.queue.qsize(), "maxDepth": self.max_depth, "capacity": self.queue.maxsize,
+                "received": self.received, "processed": self.processed, "dropped": self.dropped,
+                "degraded": self.degraded_runs, "errors": self.errors, "busySeconds": self.busy}
+
+
+class BlockRing:
+    """Single-writer ring of sample blocks. put() is the only method the writer calls.
+
+    Each slot holds up to slot_size samples; a longer block takes several
+    consecutive slots and comes out of take() in pieces.
+    """
+
+    def __init__(self, slots=256, slot_size=4096, dtype='float32'):
+        self.samples = np.zeros((slots, slot_size), dtype=dtype)
+        self.lengths = np.zeros(slots, dtype=np.int64)
+        self.head = 0  # slots written; only put() moves it, after the samples are in place
+        self.tail = 0  # slots read; only take() moves it
+        self.blocks = 0  # blocks offered, stored or not
+        self.lost = 0  # blocks dropped because the ring was full
+
+    def put(self, block):
+        slots, slot_size = self.samples.shape
+        n = len(block)
+        self.blocks += 1
+        needed = -(-n // slot_size)
+        if self.head + needed - self.tail > slots:
+            self.lost += 1
+            return False
+        head = self.head
+        for start in range(0, n, slot_size):
+            piece = block[start:start + slot_size]
+            slot = head % slots
+            self.samples[slot, :len(piece)] = piece
+            self.lengths[slot] = len(piece)
+            head += 1
+        self.head = head
+        return True
+
+    def take(self):
+        """Copies of the blocks written since the last take(), oldest first."""
+        head = self.head
+        slots = len(self.samples)
+        out = []
+        for i in range(self.tail, head):
+            slot = i % slots
+            out.append(self.samples[slot, :self.lengths[slot]].copy())
+        self.tail = head
+        return out
+
+
+class Pipeline:
+    def __init__(self, executor=None, metrics=None, ring_slots=256, slot_size=4096, poll=0.01):
+        self.stages = []
+        self.metrics = metrics  # optional metrics.Metrics: every item's run time goes to its stage
+        self.executor = executor or ThreadPoolExecutor(max_workers=2, thread_name_prefix='pipeline')
+        self.ring = BlockRing(ring_slots, slot_size)
+        self.poll = poll  # seconds between moves from the ring to the first stage
+        self._closing = False
+
+    def stage(self, name, fn, **options):
+        """Append a stage; fn(item) returns the item for the next stage, or None for nothing."""
+        stage = Stage(name, fn, **options)
+        self.stages.append(stage)
+        return stage
+
+    @property
+    def lost(self):
+        """Blocks offered while the ring was full."""
+        return self.ring.lost
+
+    def offer(self, block):
+        """Copy a block of samples in for the first stage; safe from the audio callback (no lock, no syscall)."""
+        return self.ring.put(block)
+
+    async def run(self):
+        """Run every stage until close() has pushed the end of the stream through."""
+        await asyncio.gather(self._feed(), *(self._run_stage(i) for i in range(len(self.stages))))
+
+    async def close(self):
+        """End the stream: blocks already offered or queued are still processed."""
+        self._closing = True
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    async def _feed(self):
+        """Move offered blocks from the ring to the first stage until close()."""
+        first = self.stages[0]
+        while True:
+            closing = self._closing  # read first, so nothing offered before close() is left behind
+            for block in self.ring.take():
+                first.put_nowait(block)
+            if closing:
+                await first.queue.put(_END)
+                return
+            await asyncio.sleep(self.poll)
+
+    async def _run_stage(self, index):
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await stage.queue.get()
+            if item is _END:
+                if downstream:
+                    await downstream.queue.put(_END)
+                return
+            fn = stage.fn
+            if stage.degraded is not None and stage.queue.qsize() >= stage.high_water:
+                fn = stage.degraded
+                stage.degraded_runs += 1
+            t0 = time.perf_counter()
+            try:
+                if stage.offload:
+                    result = await loop.run_in_executor(self.executor, fn, item)
+                else:
+                    result = fn(item)
+            except Exception as e:  # one bad block must not stop the stream
+                stage.errors += 1
+                print(f"{stage.name} stage error: {type(e).__name__}: {e}")
+                continue
+            finally:
+                elapsed = time.perf_counter() - t0
+                stage.busy += elapsed
+                if self.metrics:
+                    self.metrics.observe(stage.name, elapsed)
+            stage.processed += 1
+            if result is not None and downstream:
+                await downstream.put(result)
@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+# Diagnostic plots rendered off the decode path.
+# Uses the object-oriented Figure/Agg API instead of pyplot so rendering is
+# safe from a worker thread and never opens a window (no plt.show()).
+
+
+def render_signal_plot(filtered_data, sample_rate, path):
+    fig = Figure(figsize=(12, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(np.arange(len(filtered_data)) / sample_rate, filtered_data)
+    ax.set_title("Filtered AFSK Signal")
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel("Amplitude")
+    ax.grid(True)
+    fig.savefig(path)
+    return path
+
+
+def render_goertzel_plot(bit_t, mark_powers, space_powers, path, mark_freq=1200, space_freq=2200):
+    fig = Figure(figsize=(14, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(bit_t, mark_powers, label=f"{mark_freq} Hz (Mark) Power", color='green', marker='o')
+    ax.plot(bit_t, space_powers, label=f"{space_freq} Hz (Space) Power", color='red', marker='x')
+    ax.fill_between(bit_t, mark_powers, space_powers, where=mark_powers > space_powers,
+                    color='green', alpha=0.2)
+    ax.fill_between(bit_t, space_powers, mark_powers, where=space_powers > mark_powers,
+                    color='red', alpha=0.2)
+    ax.set_title("Goertzel Tone Power per Bit Window")
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel("Power")
+    ax.legend()
+    ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(path)
+    return path
+
+
+class PlotRenderer:
+    """Single background thread that renders plots; disabled means no-op."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._pool = None
+
+    def submit(self, fn, *args, **kwargs):
+        if not self.enabled:
+            return None
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plots")
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def when_done(self, futures, callback):
+        """Call callback(paths) once every submitted future has finished.
+
+        paths lines up with futures; a None future (plot not drawn) gives a None path.
+        """
+        if all(f is None for f in futures):
+            return None
+
+        def run():
+            try:
+                paths = [f.result() if f is not None else None for f in futures]
+            except Exception as e:
+                print(f"Plot rendering failed: {e}")
+                return
+            try:
+                callback(paths)
+            except Exception as e:  # would otherwise vanish inside the future
+                print(f"Plot callback failed: {type(e).__name__}: {e}")
+
+        # same single worker, so this runs after the plots it waits on
+        return self._pool.submit(run)
+
+    def wait(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -3,200 +3,137 @@ const router = express.Router();
 const path = require('path');
 const { spawn } = require('child_process');
 const db = require('./../dbConfig');
-const { time } = require('console');
+const axios = require('axios');
 
 
 
 
-// Store recording process reference
-let recordingProcess = null;
+// Resident Python decoder service (decoderd.py) - spawned once and reused,
+// so stop does not pay python + numpy/scipy start-up on every recording
+const DECODER_PORT = process.env.DECODER_PORT || 8890;
+const DECODER_URL = `http://127.0.0.1:${DECODER_PORT}`;
+let decoderProcess = null;
+let decoderStarting = null;
 
 
 
 
-//if recording active - kill 
-router.get("/reset-recording", (req, res) => { //terminates ongoing recording process if one exists
-    if (recordingProcess) {
-        try {
-            recordingProcess.kill('SIGTERM'); // Stop the process
-        } catch (err) {
-            console.error("Error killing process:", err);
+//send a command to the decoder service and return its json body (also for 4xx/5xx)
+const callDecoder = async (method, route) => {
+    try {
+        const response = await axios({ method, url: `${DECODER_URL}${route}`, timeout: 120000 });
+        return { status: response.status, data: response.data };
+    } catch (err) {
+        if (err.response) {
+            return { status: err.response.status, data: err.response.data };
         }
-        recordingProcess = null; // Clear the reference
+        throw err;
     }
-    res.json({ success: true, message: "Recording reset" });
-});
-
-///run python script 
+};
 
-const runPythonScript = (scriptPath, args = []) => {
-    return new Promise((resolve, reject) => {
+const waitForDecoder = async (timeoutMs = 30000) => {
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
         try {
-            const absolutePath = path.resolve(scriptPath);
-            console.log(`Running Python script: ${absolutePath}`, args);
-
-            //spawn - used to create/run new 'child' process - ie python scrpt
-            //streams data as it is produced
-            const process = spawn('python', [absolutePath, ...args],
-                {
-                    stdio: 'pipe', // Allow capturing output
-                    detached: args[0] === 'start', // Detach process if it's 'start'
-                    shell: true
-                }
-            ); //construct absolute file path to script
-            //spawns python process to run python script
-            let stdout = '';
-            let stderr = '';
-             
-            //handle output
+            await callDecoder('get', '/status');
+            return;
+        } catch (err) {
+            await new Promise(resolve => setTimeout(resolve, 250));
+        }
+    }
+    throw new Error("Decoder service did not come up");
+};
 
-            //listens to output and returns result to client
-            //captures standard output 
-            process.stdout.on('data', (data) => {
-                const message = data.toString();
-                stdout += message;
+//start decoder service if it is not already running
+const ensureDecoder = async () => {
+    try {
+        await callDecoder('get', '/status');
+        return; // already up (ours or started separately)
+    } catch (err) {
+        // not running - spawn below
+    }
+    if (!decoderStarting) {
+        decoderStarting = (async () => {
+            const scriptPath = path.join(__dirname, "decoderd.py");
+            console.log(`Starting decoder service: ${scriptPath}`);
+            decoderProcess = spawn('python', [scriptPath], {
+                stdio: 'pipe',
+                env: { ...process.env, DECODER_PORT: String(DECODER_PORT) }
             });
-
-
-            //captrures error output
-            process.stderr.on('data', (data) => {
-                const message = data.toString();
-                stderr += message;
+            decoderProcess.stdout.on('data', (data) => console.log(`[decoder] ${data.toString().trimEnd()}`));
+            decoderProcess.stderr.on('data', (data) => console.error(`[decoder] ${data.toString().trimEnd()}`));
+            decoderProcess.once('close', (code) => {
+                console.log(`Decoder service exited with code ${code}`);
+                decoderProcess = null;
             });
+            await waitForDecoder();
+        })().finally(() => { decoderStarting = null; });
+    }
+    await decoderStarting;
+};
 
-            //script starts recording - does not wait for finish to give output
-            if (args[0] === 'start') {
-                recordingProcess = process;
-                // For start command, resolve immediately since the process needs to keep running
-                resolve({ success: true, output: "Recording started"});
-            } else {
-                //for other commands it waits to for process to finish and then gives output
-                process.once('close', (code) => {
-                    if (code === 0 || code === null) {
-                        resolve({ success: true, output: stdout });
-                    } else {
-                        reject(new Error(`Process exited with code ${code}\n${stderr}`));
-                    }
-                });
-            }
 
-            process.once('error', (err) => {
-                console.error('Process error:', err);
-                reject(err);
-            });
 
-        } catch (err) {
-            console.error('Error:', err);
-            reject(err);
-        }
-    });
-};
 
-//use async bc cal asynchronous function - runPythonScript
-//starts recording process w python script
+//if recording active - discard it
+router.get("/reset-recording", async (req, res) => { //terminates ongoing recording if one exists
+    try {
+        await callDecoder('post', '/reset');
+    } catch (err) {
+        console.error("Error resetting recording:", err.message); // service not running - nothing to reset
+    }
+    res.json({ success: true, message: "Recording reset" });
+});
+
+//starts recording in the decoder service (?stream=1 also shows characters live in /status)
 router.get("/start-recording", async (req, res) => {
     try {
-        // check if thre is a lraedy a recording happening
-        if (recordingProcess) {
-            try {
-                // Check if process is actually running
-                process.kill(recordingProcess.pid, 0); // does not terminate process but checks if it exits
-                return res.status(400).json({ // bad req - recording already in progress
-                    success: false,
-                    error: "Recording already going"
-                });
-            } catch (e) {
-                // Process doesn't exist, clean up the reference
-                recordingProcess = null;
-            }
+        await ensureDecoder();
+        const { status, data } = await callDecoder('post', req.query.stream === '1' ? '/start?stream=1' : '/start');
+        if (status === 409) {
+            return res.status(400).json({ // bad req - recording already in progress
+                success: false,
+                error: "Recording already going"
+            });
         }
-
-        //start python script
-        //_dirname - directory where node.js script running
-        const scriptPath = path.join(__dirname, "try14.py");
-        //wait for scirpt to start before contiuing
-        const result = await runPythonScript(scriptPath, ['start']); // send start to python
-
-            //if reording process still null - then it failed to start
-        if (!recordingProcess) {
-            throw new Error("Couldn't start");
+        if (!data.success) {
+            throw new Error(data.error || "Couldn't start");
         }
 
-
         res.json({ 
             success: true, //successful recording start
             message: "Recording started", 
-            output: result.output,//output from python script
-            pid: recordingProcess.pid
+            output: data.message,
+            pid: data.pid
         });
     } catch (error) {
         console.error("Error starting ", error);
-        // Clean up if something went wrong
-        //if error occurred after recording started - terminate process
-        if (recordingProcess) {
-            try {
-                //SIGTERM - signal termination - terminates process- allows for cleanup (like saving data and closing files)
-                recordingProcess.kill('SIGTERM');
-            } catch (e) {
-                console.error("Error cleaning :", e);
-            }
-            recordingProcess = null;
-        }
         res.status(500).json({ success: false, error: error.message });
     }
 });
 
-//stop recording process by sending SIGTERM signal to rynning python script
+//stop recording - decoder service decodes and posts telemetry before answering
 router.get("/stop-recording", async (req, res) => {
-    // try {
-    //     const { timestamp } = req.body;
-    //     console.log("Frontend timestamp:", timestamp); 
-
-    //     if (!recordingProcess) {
-    //         return res.status(400).json({ 
-    //             success: false, 
-    //             error: "No recording active" 
-    //         });
-    //     }
-
-    
     try {
-        //checks if recording is running else error
-        if (!recordingProcess) {
+        const { status, data } = await callDecoder('post', '/stop');
+        if (status === 400) {
             return res.status(400).json({ 
                 success: false, 
                 error: "No recording active" 
             });
         }
+        if (!data.success) {
+            throw new Error(data.error);
+        }
 
-        
-        // Send SIGTERM to the process
-        recordingProcess.kill('SIGTERM');
-       // process.kill(-recordingProcess.pid, 'SIGTERM');
-        // Wait for the process to handle the signal
-        await new Promise(resolve => setTimeout(resolve, 1000));
-        
-        const scriptPath = path.join(__dirname, "try14.py");
-        const result = await runPythonScript(scriptPath, ['stop']); //run stop command to pyton script
-        
-        // Clear the recording process reference
-        recordingProcess = null;
-        
         res.json({ 
             success: true, 
             message: "Recording stopped and processed",
-            output: result.output
+            output: data.result,
+            decodeTime: data.decodeTime
         });
     } catch (error) {
         console.error("Error stopping", error);
-        if (recordingProcess) {
-            try {
-                recordingProcess.kill('SIGTERM');
-            } catch (e) {
-                console.error("Error cleaning:", e);
-            }
-            recordingProcess = null;
-        }
         res.status(500).json({ 
             success: false, 
             error: error.message 
@@ -254,13 +191,20 @@ router.get('/recording-status', (req, res) => {
 });
 
 // Update the status endpoint
-router.get("/status", (req, res) => {
+router.get("/status", async (req, res) => {
     //retrieve current recording status from the map
     const currentStatus = recordingStatuses.get('current');
+    let decoder = null;
+    try {
+        decoder = (await callDecoder('get', '/status')).data;
+    } catch (err) {
+        // decoder service not running
+    }
     res.json({//json response
-        recording: !!recordingProcess && currentStatus?.status === 'recording',//returns true if active recoridng else false
+        recording: !!decoder?.recording,//returns true if active recoridng else false
         status: currentStatus?.status || 'idle', //returns current sttus -default idle
-        pid: recordingProcess?.pid, //if recording in proress returns process id (pid)
+        pid: decoder?.pid, //decoder service process id
+        liveText: decoder?.liveText || '', //characters decoded so far in this pass
         lastUpdate: currentStatus?.timestamp//returns timestamp
     });
 });
@@ -0,0 +1,165 @@
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+# Logging from the PortAudio callback without ever blocking it.
+# A print() in the callback writes to a pipe read by the Node parent. When
+# that pipe backs up, the write blocks, the callback misses its deadline and
+# audio is dropped. Here the callback only stores a fixed-size record
+# (time, message code, two integers) in a preallocated ring. Each ring has
+# one writer, and nothing locks. A background thread drains the rings,
+# formats the records and writes logfmt lines. A message that repeats
+# within the summary interval is written once, then summarised with its
+# repeat count when the interval ends. If a ring is full, records are
+# dropped and counted, and the callback carries on.
+#
+#   log = RealtimeLog(sys.stderr)
+#   STATUS = log.register("stream_status", lambda a, b: status_names(a))
+#   ring = log.ring("capture")             # one per callback thread
+#   ...  ring.post(STATUS, status_bits(status))   # in the callback
+#   log.start(); ...; log.close()          # close() writes what is left
+
+RECORD = np.dtype([('time', 'f8'), ('code', 'i4'), ('a', 'i8'), ('b', 'i8')])
+STATUS_FLAGS = ('input_underflow', 'input_overflow', 'output_underflow', 'output_overflow', 'priming_output')
+
+
+def status_bits(status):
+    """sounddevice CallbackFlags as an int, one bit per STATUS_FLAGS entry."""
+    bits = 0
+    for i, name in enumerate(STATUS_FLAGS):
+        if getattr(status, name, False):
+            bits |= 1 << i
+    return bits
+
+
+def status_names(bits):
+    return '|'.join(name for i, name in enumerate(STATUS_FLAGS) if bits >> i & 1) or 'none'
+
+
+class RecordRing:
+    """Single-writer ring of log records. post() is the only method the writer calls."""
+
+    def __init__(self, capacity=1024):
+        self.records = np.zeros(capacity, dtype=RECORD)
+        self.head = 0  # records written; only post() moves it, after the record is in place
+        self.tail = 0  # records read; only the log thread moves it
+        self.lost = 0
+
+    def post(self, code, a=0, b=0):
+        if self.head - self.tail >= len(self.records):
+            self.lost += 1
+            return
+        self.records[self.head % len(self.records)] = (time.time(), code, a, b)
+        self.head += 1
+
+    def take(self):
+        """Records written since the last take(), oldest first."""
+        head = self.head
+        n = len(self.records)
+        start, end = self.tail % n, head % n
+        if head - self.tail == 0:
+            out = self.records[:0].copy()
+        elif start < end:
+            out = self.records[start:end].copy()
+        else:  # wrapped (or exactly full)
+            out = np.concatenate((self.records[start:], self.records[:end]))
+        self.tail = head
+        return out
+
+
+class RealtimeLog:
+    def __init__(self, out=None, interval=5.0, poll=0.1, capacity=1024):
+        self.out = out or sys.stdout
+        self.interval = interval  # seconds over which repeats are summarised
+        self.poll = poll
+        self.capacity = capacity
+        self.messages = []  # (event name, fmt) by code
+        self.codes = {}  # event name -> code
+        self.rings = {}  # name -> RecordRing
+        self.repeats = {}  # code -> [repeat count, last a, last b] for the current interval
+        self.lost_reported = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, event, fmt):
+        """Add a message (once per event name); returns its code.
+
+        fmt is a format string over {a} and {b}, or fn(a, b) -> str.
+        """
+        if event not in self.codes:
+            self.codes[event] = len(self.messages)
+            self.messages.append((event, fmt))
+        return self.codes[event]
+
+    def ring(self, name):
+        """The ring called name, created on first use. Only one thread may post to a ring at a time."""
+        if name not in self.rings:
+            self.rings[name] = RecordRing(self.capacity)
+        return self.rings[name]
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='rtlog')
+            self._thread.start()
+
+    def close(self):
+        """Stop the thread after writing every pending record and summary."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        next_summary = time.monotonic() + self.interval
+        while not self._stop.wait(self.poll):
+            self._drain()
+            if time.monotonic() >= next_summary:
+                self._summarise()
+                next_summary = time.monotonic() + self.interval
+        self._drain()
+        self._summarise()
+
+    def _drain(self):
+        if not self.rings:
+            return
+        rings = list(self.rings.values())
+        records = np.concatenate([ring.take() for ring in rings])
+        for t, code, a, b in np.sort(records, order='time').tolist():
+            entry = self.repeats.get(code)
+            if entry is None:  # first time this interval: write it now
+                self.repeats[code] = [0, a, b]
+                self._write(t, code, a, b)
+            else:
+                entry[0] += 1
+                entry[1], entry[2] = a, b
+        lost = sum(ring.lost for ring in rings)
+        if lost > self.lost_reported:
+            self._line(time.time(), 'log_overrun', f"{lost - self.lost_reported} records dropped")
+            self.lost_reported = lost
+
+    def _summarise(self):
+        now = time.time()
+        for code, (count, a, b) in self.repeats.items():
+            if count:
+                self._write(now, code, a, b, repeats=count)
+        self.repeats.clear()
+
+    def _write(self, t, code, a, b, repeats=None):
+        event, fmt = self.messages[code]
+        msg = fmt(a, b) if callable(fmt) else fmt.format(a=a, b=b)
+        self._line(t, event, msg, repeats)
+
+    def _line(self, t, event, msg, repeats=None):
+        stamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(t)) + f".{int(t * 1000) % 1000:03d}"
+        line = f'time={stamp} event={event} msg="{msg}"'
+        if repeats:
+            line += f" repeats={repeats} window={self.interval:g}s"
+        try:
+            self.out.write(line + "\n")
+            self.out.flush()
+        except (OSError, ValueError):  # closed or broken pipe: never take the log thread down
+            pass
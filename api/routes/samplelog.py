@@ -0,0 +1,90 @@
+import os
+import struct
+import time
+
+import numpy as np
+
+
+# Append-only raw sample log, so a recorder can hand audio to another
+# process without rewriting the whole recording on every block.
+#
+#   <path>      32-byte header, then the samples as raw interleaved frames
+#   <path>.idx  one (frames so far, unix time) record per appended block
+#
+# A block is written to the data file first and only then indexed, so a
+# reader that trusts the index never sees a half-written block. Writes are
+# unbuffered, which makes them visible to other processes right away. The
+# reader memory-maps the committed samples instead of loading them.
+#
+#   log = SampleLog.create('audio_data.log', 44100)
+#   log.append(block)            # from the audio callback, O(len(block))
+#   samples = read_samples('audio_data.log')
+
+MAGIC = b'SLOG'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI8s12x')  # magic, version, channels, sample rate, dtype
+INDEX_RECORD = struct.Struct('<qd')  # frames after the block, time it was appended
+
+
+class SampleLog:
+    def __init__(self, path, sample_rate, channels=1, dtype='float32'):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.frames = 0
+        self._data = None
+        self._index = None
+
+    @classmethod
+    def create(cls, path, sample_rate, channels=1, dtype='float32'):
+        """Start a new log at path, replacing any previous one."""
+        log = cls(path, sample_rate, channels, dtype)
+        log._data = open(path, 'wb', buffering=0)
+        log._index = open(path + '.idx', 'wb', buffering=0)
+        log._data.write(HEADER.pack(MAGIC, VERSION, channels, sample_rate, log.dtype.str.encode('ascii')))
+        return log
+
+    def append(self, block):
+        """Add a block of frames ((frames,) or (frames, channels)); cost is the block's size only."""
+        block = np.ascontiguousarray(block, dtype=self.dtype)
+        self._data.write(block.data)
+        self.frames += block.size // self.channels
+        self._index.write(INDEX_RECORD.pack(self.frames, time.time()))
+
+    def close(self):
+        for f in (self._data, self._index):
+            if f is not None:
+                f.close()
+        self._data = self._index = None
+
+
+def read_header(path):
+    """(sample_rate, channels, dtype) of a log."""
+    with open(path, 'rb') as f:
+        magic, version, channels, sample_rate, dtype = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} sample log")
+    return sample_rate, channels, np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+
+
+def read_index(path):
+    """Structured array of the index records (fields 'frames' and 'time')."""
+    index_path = path + '.idx'
+    if not os.path.exists(index_path):
+        return np.zeros(0, dtype=[('frames', '<i8'), ('time', '<f8')])
+    with open(index_path, 'rb') as f:
+        raw = f.read()
+    usable = len(raw) - len(raw) % INDEX_RECORD.size  # a record still being written is ignored
+    return np.frombuffer(raw[:usable], dtype=[('frames', '<i8'), ('time', '<f8')])
+
+
+def read_samples(path):
+    """Committed samples as a read-only memory map ((frames,) mono, else (frames, channels))."""
+    sample_rate, channels, dtype = read_header(path)
+    index = read_index(path)
+    frames = int(index['frames'][-1]) if len(index) else 0
+    if frames == 0:
+        return np.zeros((0,) if channels == 1 else (0, channels), dtype=dtype)
+    shape = (frames,) if channels == 1 else (frames, channels)
+    return np.memmap(path, dtype=dtype, mode='r', offset=HEADER.size, shape=shape)
@@ -0,0 +1,81 @@
+import numpy as np
+
+from bitbuf import BitBuffer
+from uart import printable
+
+
+# How plausible a decoded byte string is as telemetry text. Used to rank
+# decode hypotheses (baud, polarity, phase, bit order) against each other.
+#
+#   printable   fraction of bytes in the printable ASCII range
+#   words       number of EXPECTED_WORDS found (case-insensitive)
+#   framing     fraction of the bits covered by valid UART frames (1.0 when
+#               the candidate has no framing to check)
+#   frame       whether a '$' ... '#' frame shows up in the text
+
+
+def printable_ratio(data):
+    values = np.frombuffer(data, dtype=np.uint8)
+    if len(values) == 0:
+        return 0.0
+    return float(np.mean((values >= 32) & (values <= 126)))
+
+
+def word_hits(text, expected_words=()):
+    lowered = text.lower()
+    return sum(1 for word in expected_words if word.lower() in lowered)
+
+
+def score_candidate(data, text, expected_words=(), framing=1.0):
+    """Single score for a decoded candidate; higher is better."""
+    if not data:
+        return 0.0
+    return printable_ratio(data) + word_hits(text, expected_words) + framing
+
+
+def frame_markers(text, start='$', end='#'):
+    """1.0 if the text holds a start ... end frame, else 0.0."""
+    i = text.find(start)
+    return 1.0 if i != -1 and text.find(end, i + 1) != -1 else 0.0
+
+
+def rank_alignments(bits, expected_words=(), msb_first=True):
+    """Score raw 8-bit decodes at every bit offset (0-7) and both polarities.
+
+    The value of the byte starting at every bit position is computed in one
+    pass; offset k is then every 8th of those values from k, and the
+    inverted stream's bytes are 255 minus the normal ones, so nothing is
+    re-inverted or re-decoded per variant. Returns candidates best first:
+    {"offset", "inverted", "text", "score", "printable", "words", "frame"}.
+    """
+    bits = BitBuffer(bits).bits
+    n_values = len(bits) - 7  # positions a whole byte can start at
+    if n_values <= 0:
+        return []
+    weights = 1 << np.arange(8)
+    if msb_first:
+        weights = weights[::-1]
+    windows = np.lib.stride_tricks.sliding_window_view(bits, 8)
+    rows = -(-n_values // 8)
+    values = np.zeros(rows * 8, dtype=np.uint8)
+    values[:n_values] = windows @ weights
+    values = values.reshape(rows, 8)  # column k = bytes at offset k
+    counts = (n_values - np.arange(8) + 7) // 8  # bytes per offset
+    valid = np.arange(rows)[:, np.newaxis] < counts
+
+    candidates = []
+    for inverted in (False, True):
+        table = 255 - values if inverted else values
+        ratios = ((table >= 32) & (table <= 126) & valid).sum(axis=0) / np.maximum(counts, 1)
+        for offset in range(8):
+            if counts[offset] == 0:
+                continue
+            data = table[:counts[offset], offset].tobytes()
+            text = printable(data)
+            words = word_hits(text, expected_words)
+            frame = frame_markers(text)
+            candidates.append({"offset": offset, "inverted": inverted, "text": text,
+                               "score": float(ratios[offset]) + words + frame,
+                               "printable": float(ratios[offset]), "words": words, "frame": frame})
+    candidates.sort(key=lambda c: c["score"], reverse=True)
+    return candidates
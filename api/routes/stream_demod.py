@@ -0,0 +1,197 @@
+import numpy as np
+
+from filters import StreamingBandpass, StreamingDecimator
+from tone_power import channel_tone_powers, tone_powers
+from uart import consumed_bits, frame_uart, printable
+from bitbuf import BitBuffer
+
+
+# Block-by-block version of the try14 pipeline (bandpass -> Goertzel per bit
+# -> UART MSB-first framing). Every stage keeps just enough state to carry
+# over between audio callback blocks, so characters come out while the pass
+# is still being recorded and stop only has to flush the last partial bit.
+
+
+class UartFramer:
+    """Incremental uart_decode(msb_first=True): same output, fed a few bits at a time."""
+
+    def __init__(self, msb_first=True):
+        self.msb_first = msb_first
+        self.pending = np.zeros(0, dtype=np.uint8)  # bits the greedy scan has not got past yet
+        self.chars = []
+
+    def feed(self, bits):
+        buf = np.concatenate((self.pending, np.asarray(bits, dtype=np.uint8)))
+        data, offsets = frame_uart(buf, self.msb_first)
+        self.pending = buf[consumed_bits(len(buf), offsets):]
+        new_chars = printable(data)
+        self.chars.append(new_chars)
+        return new_chars
+
+    @property
+    def text(self):
+        return ''.join(self.chars)
+
+
+class StreamingDemodulator:
+    def __init__(self, sample_rate, baud_rate=50, mark_freq=1200, space_freq=2200,
+                 low_cutoff=1000, high_cutoff=2500, on_chars=None, decimate_to=None):
+        self.decimator = None
+        if decimate_to and sample_rate > decimate_to:
+            self.decimator = StreamingDecimator(sample_rate, decimate_to)
+            sample_rate = decimate_to
+        self.sample_rate = sample_rate
+        self.mark_freq = mark_freq
+        self.space_freq = space_freq
+        self.samples_per_bit = int(sample_rate / baud_rate)
+        self.bandpass = StreamingBandpass(sample_rate, low_cutoff, high_cutoff)
+        self.residual = np.zeros(0)  # filtered samples short of a full bit
+        self.chunks = []  # decided bits, one uint8 array per block
+        self.framer = UartFramer()
+        self.on_chars = on_chars
+        self.samples_in = 0
+        self.samples_filtered = 0
+
+    def _decide(self, samples, final=False):
+        if len(samples) == 0:
+            return None
+        if final:
+            # offline loop keeps a short last window if it is at least half a bit
+            if len(samples) < self.samples_per_bit // 2:
+                return None
+            spb = len(samples)
+        else:
+            spb = self.samples_per_bit
+        _, (pm, ps) = tone_powers(samples, self.sample_rate, [self.mark_freq, self.space_freq], spb)
+        return (pm > ps).astype(np.uint8)
+
+    def _emit(self, bits):
+        if bits is None or len(bits) == 0:
+            return ''
+        self.chunks.append(bits)
+        chars = self.framer.feed(bits)
+        if chars and self.on_chars:
+            self.on_chars(chars)
+        return chars
+
+    def _process(self, block):
+        filtered = self.bandpass.process(block)
+        self.samples_filtered += len(filtered)
+        samples = np.concatenate((self.residual, filtered))
+        n_full = (len(samples) // self.samples_per_bit) * self.samples_per_bit
+        self.residual = samples[n_full:]
+        return self._emit(self._decide(samples[:n_full]))
+
+    def feed(self, block):
+        block = np.asarray(block, dtype=np.float64).reshape(-1)
+        self.samples_in += len(block)
+        if self.decimator:
+            block = self.decimator.process(block)
+        return self._process(block)
+
+    def flush(self):
+        chars = ''
+        if self.decimator:
+            chars += self._process(self.decimator.flush())
+        chars += self._emit(self._decide(self.residual, final=True))
+        self.residual = np.zeros(0)
+        return chars
+
+    @property
+    def bits(self):
+        return BitBuffer.concat(self.chunks)
+
+    @property
+    def decoded_uart(self):
+        return self.framer.text
+
+
+class MultiChannelDemodulator:
+    """StreamingDemodulator for several receivers at once.
+
+    Blocks are (frames, channels), e.g. straight from a multichannel
+    InputStream or several sources stacked side by side. Decimation,
+    filtering and tone detection run on all channels in one pass. Each
+    channel keeps its own UART framer, and its output is tagged with its
+    source name. on_chars(source, chars) is called as characters come out.
+    """
+
+    def __init__(self, sample_rate, channels, baud_rate=50, mark_freq=1200, space_freq=2200,
+                 low_cutoff=1000, high_cutoff=2500, sources=None, on_chars=None, decimate_to=None):
+        self.channels = channels
+        self.sources = list(sources) if sources else [f"ch{i}" for i in range(channels)]
+        if len(self.sources) != channels:
+            raise ValueError(f"{len(self.sources)} source names for {channels} channels")
+        self.decimator = None
+        if decimate_to and sample_rate > decimate_to:
+            self.decimator = StreamingDecimator(sample_rate, decimate_to, channels)
+            sample_rate = decimate_to
+        self.sample_rate = sample_rate
+        self.mark_freq = mark_freq
+        self.space_freq = space_freq
+        self.samples_per_bit = int(sample_rate / baud_rate)
+        self.bandpass = StreamingBandpass(sample_rate, low_cutoff, high_cutoff, channels=channels)
+        self.residual = np.zeros((0, channels))
+        self.chunks = [[] for _ in range(channels)]
+        self.framers = [UartFramer() for _ in range(channels)]
+        self.on_chars = on_chars
+        self.samples_in = 0
+        self.samples_filtered = 0
+
+    def _decide(self, samples, final=False):
+        if len(samples) == 0:
+            return None
+        if final:
+            if len(samples) < self.samples_per_bit // 2:
+                return None
+            spb = len(samples)
+        else:
+            spb = self.samples_per_bit
+        pm, ps = channel_tone_powers(samples, self.sample_rate, [self.mark_freq, self.space_freq], spb)
+        return (pm > ps).astype(np.uint8)  # (channels, bits)
+
+    def _emit(self, bits):
+        if bits is None or bits.shape[1] == 0:
+            return {}
+        emitted = {}
+        for channel, (source, framer) in enumerate(zip(self.sources, self.framers)):
+            self.chunks[channel].append(bits[channel])
+            chars = framer.feed(bits[channel])
+            if chars:
+                emitted[source] = chars
+                if self.on_chars:
+                    self.on_chars(source, chars)
+        return emitted
+
+    def _process(self, block):
+        filtered = self.bandpass.process(block)
+        self.samples_filtered += len(filtered)
+        samples = np.concatenate((self.residual, filtered))
+        n_full = (len(samples) // self.samples_per_bit) * self.samples_per_bit
+        self.residual = samples[n_full:]
+        return self._emit(self._decide(samples[:n_full]))
+
+    def feed(self, block):
+        """Decode a (frames, channels) block; returns {source: new characters}."""
+        block = np.asarray(block, dtype=np.float64).reshape(-1, self.channels)
+        self.samples_in += len(block)
+        if self.decimator:
+            block = self.decimator.process(block)
+        return self._process(block)
+
+    def flush(self):
+        emitted = {}
+        if self.decimator:
+            emitted = self._process(self.decimator.flush())
+        for source, chars in self._emit(self._decide(self.residual, final=True)).items():
+            emitted[source] = emitted.get(source, '') + chars
+        self.residual = np.zeros((0, self.channels))
+        return emitted
+
+    def bits(self, channel):
+        return BitBuffer.concat(self.chunks[channel])
+
+    def results(self):
+        """{source: {"binaryData", "decodedUart"}} so far."""
+        return {source: {"binaryData": str(self.bits(channel)), "decodedUart": self.framers[channel].text}
+                for channel, source in enumerate(self.sources)}
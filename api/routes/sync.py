@@ -0,0 +1,93 @@
+from collections import namedtuple
+
+import numpy as np
+
+from bitbuf import BitBuffer
+from uart import greedy_chain
+
+
+# Sync word search over a whole bitstream in one pass.
+# The Hamming distance at every offset is built up one pattern bit at a
+# time (XOR of a shifted view of the stream against that bit), so the work
+# is m array operations over n bits instead of n*m Python steps. The
+# inverted stream's distance is simply m - distance, so both polarities
+# come out of the same pass.
+
+PREAMBLE = "00100100"  # '$'
+TAIL = "00100011"  # '#'
+
+SyncMatch = namedtuple('SyncMatch', 'index errors inverted')
+POLARITIES = {'normal': (False,), 'inverted': (True,), 'both': (False, True)}
+
+
+def hamming_distances(bits, pattern):
+    """Hamming distance between pattern and the bits at every offset (len(bits) - len(pattern) + 1 values)."""
+    bits = BitBuffer(bits).bits
+    pattern = BitBuffer(pattern).bits
+    m = len(pattern)
+    if m == 0 or len(bits) < m:
+        return np.zeros(0, dtype=np.int64)
+    n = len(bits) - m + 1
+    distances = np.zeros(n, dtype=np.int16)
+    for j, p in enumerate(pattern):
+        distances += bits[j:j + n] ^ p
+    return distances
+
+
+def sync_indices(bits, pattern, max_errors=1, inverted=False):
+    """(offsets, errors) arrays of every match within max_errors, for one polarity."""
+    distances = hamming_distances(bits, pattern)
+    if inverted:
+        distances = len(BitBuffer(pattern)) - distances
+    idx = np.flatnonzero(distances <= max_errors)
+    return idx, distances[idx]
+
+
+def find_sync(bits, pattern, max_errors=1, polarity='both'):
+    """Every offset where pattern matches within max_errors bit errors.
+
+    polarity is 'normal', 'inverted' or 'both'; an inverted match means the
+    pattern appears in ~bits. Matches are sorted by index.
+    """
+    matches = []
+    for inverted in POLARITIES[polarity]:
+        idx, errors = sync_indices(bits, pattern, max_errors, inverted)
+        matches += map(SyncMatch, idx.tolist(), errors.tolist(), [inverted] * len(idx))
+    matches.sort()
+    return matches
+
+
+def best_sync(bits, pattern, search_window=None, polarity='normal'):
+    """Lowest-error match in the first search_window offsets (earliest wins ties), or None."""
+    m = len(BitBuffer(pattern))
+    distances = hamming_distances(bits, pattern)[:search_window]
+    if len(distances) == 0:
+        return None
+    candidates = []
+    for inverted in POLARITIES[polarity]:
+        d = m - distances if inverted else distances
+        i = int(np.argmin(d))
+        candidates.append(SyncMatch(i, int(d[i]), inverted))
+    return min(candidates, key=lambda match: (match.errors, match.index))
+
+
+def find_frames(bits, preamble=PREAMBLE, tail=TAIL, max_errors=1, polarity='both'):
+    """Split a bitstream into preamble ... tail frames.
+
+    Returns (start, end, inverted) for each frame, where bits[start:end] is
+    the payload between a preamble and the first tail of the same polarity
+    after it. Frames do not overlap; preambles inside a frame are skipped.
+    """
+    n_pre, n_tail = len(BitBuffer(preamble)), len(BitBuffer(tail))
+    frames = []
+    for inverted in POLARITIES[polarity]:
+        starts = sync_indices(bits, preamble, max_errors, inverted)[0] + n_pre
+        ends = sync_indices(bits, tail, max_errors, inverted)[0]
+        # each preamble pairs with the next tail; the scan then resumes with
+        # the first preamble after that tail (same greedy chain as the UART framer)
+        k = np.searchsorted(ends, starts)
+        starts, ends = starts[k < len(ends)], ends[k[k < len(ends)]]
+        chain = greedy_chain(np.searchsorted(starts, ends + n_tail + n_pre))
+        frames += zip(starts[chain].tolist(), ends[chain].tolist(), [inverted] * len(chain))
+    frames.sort()
+    return frames
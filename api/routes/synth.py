@@ -0,0 +1,91 @@
+import numpy as np
+import soundfile as sf
+
+from bitbuf import BitBuffer
+
+
+# AFSK signal generator for test corpora and benchmarks.
+# Bits are framed in one go (UART or raw bytes, MSB or LSB first, optional
+# '$' ... '#' framing with ESC stuffing as undone by try14's destuff), and
+# the waveform is phase-continuous: the instantaneous frequency per sample
+# is integrated with a cumulative sum, so nothing restarts at bit edges.
+# The bit period is sample_rate / baud_rate without rounding. Long signals
+# are produced chunk by chunk, carrying the phase across chunks, and can be
+# streamed straight into a WAV file.
+#
+#   bits = message_bits("V12 3 volts", frame=True)
+#   write_wav("test.wav", bits, 48000, 50)
+
+ESC = 0x1B
+FRAME_START = ord('$')
+FRAME_END = ord('#')
+
+
+def stuff(payload):
+    """Escape '$', '#' and ESC: each becomes ESC followed by the byte XOR 0x20."""
+    data = np.frombuffer(bytes(payload), dtype=np.uint8)
+    special = np.isin(data, [FRAME_START, FRAME_END, ESC])
+    escaped = data ^ (special.astype(np.uint8) * 0x20)
+    return np.insert(escaped, np.flatnonzero(special), ESC).tobytes()
+
+
+def frame_payload(payload, stuffing=True):
+    payload = bytes(payload)
+    return bytes([FRAME_START]) + (stuff(payload) if stuffing else payload) + bytes([FRAME_END])
+
+
+def byte_bits(data, msb_first=True):
+    """Raw 8 bits per byte, no start/stop bits."""
+    return np.unpackbits(np.frombuffer(bytes(data), dtype=np.uint8), bitorder='big' if msb_first else 'little')
+
+
+def uart_bits(data, msb_first=True):
+    """UART frames: start bit 0, 8 data bits, stop bit 1."""
+    data_bits = byte_bits(data, msb_first).reshape(-1, 8)
+    frames = np.empty((len(data_bits), 10), dtype=np.uint8)
+    frames[:, 0] = 0
+    frames[:, 1:9] = data_bits
+    frames[:, 9] = 1
+    return frames.reshape(-1)
+
+
+def message_bits(message, uart=True, msb_first=True, frame=False, stuffing=True, preamble='', postamble=''):
+    """Bits for a message: optional $...# framing, UART or raw bytes, and bit strings around it."""
+    data = message.encode('latin1') if isinstance(message, str) else bytes(message)
+    if frame:
+        data = frame_payload(data, stuffing)
+    bits = uart_bits(data, msb_first) if uart else byte_bits(data, msb_first)
+    return BitBuffer.concat([preamble, bits, postamble])
+
+
+def afsk_chunks(bits, sample_rate, baud_rate, mark_freq=1200, space_freq=2200, amplitude=1.0,
+                chunk_size=1 << 16):
+    """Phase-continuous AFSK for bits (1 = mark), yielded chunk_size samples at a time."""
+    bits = BitBuffer(bits).bits
+    period = sample_rate / baud_rate
+    n_samples = int(len(bits) * period)
+    step = np.where(bits == 1, mark_freq, space_freq) * (2 * np.pi / sample_rate)  # phase step per bit
+    phase = 0.0
+    for start in range(0, n_samples, chunk_size):
+        n = np.arange(start, min(start + chunk_size, n_samples))
+        symbol = np.minimum((n / period).astype(np.int64), len(bits) - 1)
+        phases = phase + np.cumsum(step[symbol])
+        phase = phases[-1] % (2 * np.pi)
+        yield (amplitude * np.sin(phases)).astype(np.float32)
+
+
+def synthesize(bits, sample_rate, baud_rate, mark_freq=1200, space_freq=2200, amplitude=1.0):
+    """Whole AFSK waveform for bits as one float32 array."""
+    chunks = list(afsk_chunks(bits, sample_rate, baud_rate, mark_freq, space_freq, amplitude))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+
+def write_wav(path, bits, sample_rate, baud_rate, mark_freq=1200, space_freq=2200, amplitude=1.0,
+              subtype='PCM_16', chunk_size=1 << 16):
+    """Stream the AFSK waveform for bits into a mono WAV file; returns the number of frames."""
+    frames = 0
+    with sf.SoundFile(path, mode='w', samplerate=sample_rate, channels=1, subtype=subtype) as f:
+        for chunk in afsk_chunks(bits, sample_rate, baud_rate, mark_freq, space_freq, amplitude, chunk_size):
+            f.write(chunk)
+            frames += len(chunk)
+    return frames
@@ -27,12 +27,47 @@ function binaryToASCII(binary) {
 
 
 
+//stores one decoded frame - telemetry row plus voltage reading if the text is one
+//trx - run the inserts inside a transaction (batch route), defaults to the plain connection
+async function storeTelemetry({ decodedUart, binaryData, plotPath, goertzelPlotPath, source, timestamp }, trx = db) {
+    // Convert binary to ASCII
+    const asciiText = binaryToASCII(binaryData);
+    console.log("Converted ASCII:", asciiText);//logs ascitext
+
+    const routerTimestamp = new Date().toISOString().slice(0, 19).replace('T', ' ');
+    console.log("Timestamp:", routerTimestamp);  //log for debugging
+
+    // Create a new telemetry entry and store in database
+    console.log("Inserting data:", { plotPath, goertzelPlotPath });
+    const [telemetryId] = await trx('telemetry').insert({
+        message: decodedUart,///asccii text
+        binary_data: binaryData,//binary data
+        plot_path: plotPath,//file path for plot
+        goertzelPlotPath: goertzelPlotPath,
+        source: source,//receiver channel tag, null for single-channel decodes
+        created_at: routerTimestamp//current server timestamp
+
+    });
+
+    if (/^V\d+(\.\d+)?$/.test(asciiText)) {
+        const voltageValue = parseFloat(asciiText.slice(1)); // remove "V" and convert to float
+    
+        await trx('voltages').insert({
+            message: asciiText,
+            volt: voltageValue,
+            created_at: timestamp 
+        });
+    }
+    return { id: telemetryId, ascii: asciiText };
+}
+
+
 //accepts AFSK audio data - coverts to ASCII - stores in database - sneds response back to client
 router.post('/afsk/audio', express.json(), async (req, res) => { //express.json - parses incoming JSOn request body intot javascript obj
     try {
         //receive binary afsk data
         console.log("Received AFSK data:", req.body); //logs request body debgu
-        const { decodedUart, binaryData, plotPath, goertzelPlotPath, timestamp } = req.body; //extract binary data, plotpath, and timestamp from request body
+        const { binaryData, plotPath, goertzelPlotPath, timestamp } = req.body; //extract binary data, plotpath, and timestamp from request body
         console.log("Raw received timestamp:", timestamp); //prints out raw timestamp for debugging
 
         //no binary data 
@@ -41,43 +76,14 @@ router.post('/afsk/audio', express.json(), async (req, res) => { //express.json
             return res.status(400).json({ message: "Binary data is required." });
         }
 
-        // Convert binary to ASCII
-        const asciiText = binaryToASCII(binaryData);
-        console.log("Converted ASCII:", asciiText);//logs ascitext
-        
-        //onst routerTimestamp = new Date().toISOString();//generates timestamp in iso format
-        const routerTimestamp = new Date().toISOString().slice(0, 19).replace('T', ' ');
-        console.log("Timestamp:", routerTimestamp);  //log for debugging
-        const currentDateTime = getCurrentDateTimeLocal();
-
-
-        // Create a new telemetry entry and store in database
-        console.log("Inserting data:", { plotPath, goertzelPlotPath });
-        await db('telemetry').insert({
-            message: decodedUart,///asccii text
-            binary_data: binaryData,//binary data
-            plot_path: plotPath,//file path for plot
-            goertzelPlotPath: goertzelPlotPath,
-            created_at: routerTimestamp//current server timestamp
-
-        });
-        console.log("Request Body:", req.body);
-
-        if (/^V\d+(\.\d+)?$/.test(asciiText)) {
-            const voltageValue = parseFloat(asciiText.slice(1)); // remove "V" and convert to float
-        
-            await db('voltages').insert({
-                message: asciiText,
-                volt: voltageValue,
-                created_at: timestamp 
-            });
-        }
+        const { id, ascii } = await storeTelemetry(req.body);
 
         //success status
         res.status(200).json({ 
             success: true,
+            id: id,//used to attach plot paths once rendering finishes
             message: "Data stored successfully",
-            ascii: asciiText,
+            ascii: ascii,
             plotPath: plotPath,
             goertzelPlotPath: goertzelPlotPath
         });
@@ -92,6 +98,68 @@ router.post('/afsk/audio', express.json(), async (req, res) => { //express.json
 });
 
 
+//several frames in one request (delivery client batches and replays its spool through this) - stored in order
+router.post('/afsk/audio/batch', express.json({ limit: '10mb' }), async (req, res) => {
+    try {
+        const { frames } = req.body;
+        if (!Array.isArray(frames) || frames.some(frame => !frame || !frame.binaryData)) {
+            return res.status(400).json({ message: "frames must be a list of entries with binary data." });
+        }
+
+        //all or nothing - a failed insert rolls back the rows before it, so the client's replay of the batch stores no duplicates
+        const stored = await db.transaction(async trx => {
+            const rows = [];
+            for (const frame of frames) {
+                rows.push(await storeTelemetry(frame, trx));
+            }
+            return rows;
+        });
+        res.status(200).json({
+            success: true,
+            ids: stored.map(entry => entry.id),
+            message: `Stored ${stored.length} frames`
+        });
+    } catch (err) {
+        console.error("Error processing AFSK batch:", err);
+        res.status(500).json({ 
+            success: false, 
+            message: "Error processing AFSK batch",
+            error: err.message
+        });
+    }
+});
+
+
+
+//plots are rendered after the telemetry row is stored - fill in their paths
+router.post('/afsk/audio/:id/plots', express.json(), async (req, res) => {
+    try {
+        const { plotPath, goertzelPlotPath } = req.body;
+        //either path may be missing (long recordings have no signal plot) - only set the ones given
+        const paths = {};
+        if (plotPath) paths.plot_path = plotPath;
+        if (goertzelPlotPath) paths.goertzelPlotPath = goertzelPlotPath;
+        if (!Object.keys(paths).length) {
+            return res.status(400).json({ success: false, message: "No plot paths given." });
+        }
+        const updated = await db('telemetry')
+            .where({ id: req.params.id })
+            .update(paths);
+
+        if (!updated) {
+            return res.status(404).json({ success: false, message: "Telemetry entry not found." });
+        }
+        res.json({ success: true, plotPath, goertzelPlotPath });
+    } catch (err) {
+        console.error("Error updating plot paths:", err);
+        res.status(500).json({ 
+            success: false, 
+            message: "Error updating plot paths",
+            error: err.message
+        });
+    }
+});
+
 
 router.get('/telemetry', async (req, res) => {
     const { start, end } = req.query;
@@ -0,0 +1,85 @@
+import numpy as np
+import scipy.signal as sp_signal
+
+from bitbuf import BitBuffer
+
+
+# Symbol timing recovery for the AFSK demodulators.
+# Instead of slicing bits at i * int(sample_rate / baud_rate) from sample 0,
+# the mark-minus-space power is computed for a one-bit window centred on
+# every sample. Its zero crossings are the bit transitions, at fractional
+# sample positions. Each transition votes for the clock phase (where
+# bit boundaries fall modulo the bit period). The votes are smoothed with a
+# first-order loop run forwards and backwards, so the phase follows slow
+# drift without lag. Bits are then decided at the recovered symbol centres.
+# The bit period stays fractional (sample_rate / baud_rate), so there is no
+# truncation drift over a long pass.
+
+
+def tone_envelopes(signal, sample_rate, freqs, window):
+    """Tone power in a window-long window centred on every sample, one array per frequency."""
+    signal = np.asarray(signal, dtype=np.float64)
+    n = len(signal)
+    t = np.arange(n)
+    lo = np.clip(t - window // 2, 0, n)
+    hi = np.clip(lo + window, 0, n)
+    powers = []
+    for freq in freqs:
+        acc = np.zeros(n + 1, dtype=np.complex128)
+        np.cumsum(signal * np.exp(-2j * np.pi * freq * t / sample_rate), out=acc[1:])
+        powers.append(np.abs(acc[hi] - acc[lo]) ** 2)
+    return powers
+
+
+def transitions(soft):
+    """Fractional positions of the sign changes of soft, and how steep each one is."""
+    i = np.flatnonzero(np.signbit(soft[:-1]) != np.signbit(soft[1:]))
+    step = soft[i] - soft[i + 1]
+    frac = np.divide(soft[i], step, out=np.zeros(len(i)), where=step != 0)
+    return i + frac, np.abs(step)
+
+
+def clock_phase(edges, weights, period, loop_gain=0.05):
+    """Smoothed clock phase (in bit periods, unwrapped) at every transition."""
+    votes = weights * np.exp(2j * np.pi * edges / period)
+    if len(votes) > 6:  # filtfilt needs a few samples past the padding
+        votes = sp_signal.filtfilt([loop_gain], [1, loop_gain - 1], votes)
+    return np.unwrap(np.angle(votes)) / (2 * np.pi)
+
+
+def symbol_timing(signal, sample_rate, baud_rate, mark_freq=1200, space_freq=2200, loop_gain=0.05):
+    """Recovered bit centres (fractional sample positions) and the mark/space power at each."""
+    period = sample_rate / baud_rate
+    window = max(int(round(period)), 1)
+    mark, space = tone_envelopes(signal, sample_rate, [mark_freq, space_freq], window)
+    soft = mark - space
+
+    edges, weights = transitions(soft)
+    if len(edges):
+        phase = clock_phase(edges, weights, period, loop_gain)
+    else:  # no transitions at all: plain grid from sample 0
+        edges, phase = np.zeros(1), np.zeros(1)
+
+    def edge_phase(t):
+        return np.interp(t, edges, phase)
+
+    # boundaries sit at period * (m + phase); centres half a bit later.
+    # phase depends (slowly) on time, so refine each centre a couple of times.
+    n = len(signal)
+    first = int(np.floor(-edge_phase(0))) - 1
+    last = int(np.ceil(n / period - edge_phase(n))) + 1
+    m = np.arange(first, last + 1)
+    centres = period * (m + 0.5)
+    for _ in range(3):
+        centres = period * (m + edge_phase(centres) + 0.5)
+    keep = (centres - period / 2 >= -0.5) & (centres + period / 2 <= n + 0.5)
+    centres = centres[keep]
+
+    t = np.arange(n)
+    return centres, np.interp(centres, t, mark), np.interp(centres, t, space)
+
+
+def recover_bits(signal, sample_rate, baud_rate, mark_freq=1200, space_freq=2200, loop_gain=0.05):
+    """Bits decided at the recovered symbol centres."""
+    _, mark, space = symbol_timing(signal, sample_rate, baud_rate, mark_freq, space_freq, loop_gain)
+    return BitBuffer(mark > space)
@@ -0,0 +1,134 @@
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+# Batched tone power for the AFSK demodulators.
+# The per-sample Goertzel recurrence gives |X[k]|^2 of the k-th DFT bin of a
+# window, so for every window of the same length we can get the same number by
+# projecting the window onto cos/sin of that bin. Doing it for all bit windows
+# at once is two matrix-vector products instead of a Python loop per sample.
+
+
+def goertzel(samples, sample_rate, target_freq):
+    """Reference single-window Goertzel (per-sample recurrence)."""
+    N = len(samples)
+    k = int(0.5 + (N * target_freq / sample_rate))
+    omega = (2.0 * np.pi * k) / N
+    coeff = 2.0 * np.cos(omega)
+    s1, s2 = 0.0, 0.0
+    for sample in samples:
+        s = sample + coeff * s1 - s2
+        s2, s1 = s1, s
+    return s2**2 + s1**2 - coeff * s1 * s2
+
+
+def bit_windows(audio_data, samples_per_bit, hop=None):
+    """Strided (n_windows, samples_per_bit) view of every full bit window."""
+    audio_data = np.ascontiguousarray(audio_data)
+    hop = hop or samples_per_bit
+    if len(audio_data) < samples_per_bit:
+        return audio_data[:0].reshape(0, samples_per_bit)
+    n_windows = (len(audio_data) - samples_per_bit) // hop + 1
+    stride = audio_data.strides[0]
+    return as_strided(audio_data, shape=(n_windows, samples_per_bit),
+                      strides=(hop * stride, stride), writeable=False)
+
+
+def goertzel_windows(windows, sample_rate, target_freq):
+    """Goertzel power of target_freq for every row of windows."""
+    N = windows.shape[-1]
+    k = int(0.5 + (N * target_freq / sample_rate))
+    omega = (2.0 * np.pi * k) / N
+    n = np.arange(N)
+    re = windows @ np.cos(omega * n)
+    im = windows @ np.sin(omega * n)
+    return re * re + im * im
+
+
+def tone_powers(audio_data, sample_rate, freqs, samples_per_bit):
+    """Per-bit-window power for each frequency in freqs.
+
+    Windows start at 0, samples_per_bit, 2*samples_per_bit, ... like the old
+    demodulate_afsk loop, including the short trailing window it kept when at
+    least half a bit was left. Returns (starts, [powers per freq]).
+    """
+    windows = bit_windows(audio_data, samples_per_bit)
+    n_full = windows.shape[0]
+    starts = np.arange(n_full) * samples_per_bit
+    powers = [goertzel_windows(windows, sample_rate, f) for f in freqs]
+
+    tail = audio_data[n_full * samples_per_bit:]
+    if len(tail) > 0 and len(tail) >= samples_per_bit // 2:
+        starts = np.append(starts, n_full * samples_per_bit)
+        powers = [np.append(p, goertzel_windows(tail[np.newaxis, :], sample_rate, f))
+                  for p, f in zip(powers, freqs)]
+    return starts, powers
+
+
+def channel_tone_powers(samples, sample_rate, freqs, samples_per_bit):
+    """Per-bit-window power for (frames, channels) samples; one (channels, n_windows) array per freq.
+
+    Only whole windows from sample 0; all channels go through the same
+    projection in one product.
+    """
+    n_windows = len(samples) // samples_per_bit
+    windows = samples[:n_windows * samples_per_bit].reshape(n_windows, samples_per_bit, -1)
+    n = np.arange(samples_per_bit)
+    ks = [int(0.5 + (samples_per_bit * freq / sample_rate)) for freq in freqs]
+    omega = 2.0 * np.pi * np.array(ks) / samples_per_bit
+    basis = np.hstack((np.cos(np.outer(n, omega)), np.sin(np.outer(n, omega))))  # cos per freq | sin per freq
+    proj = np.moveaxis(windows, 2, 0) @ basis  # (channels, n_windows, 2 * len(freqs))
+    re, im = proj[..., :len(freqs)], proj[..., len(freqs):]
+    powers = re * re + im * im
+    return [powers[..., i] for i in range(len(freqs))]
+
+
+# Frequency-tolerant detection (try12's scan_goertzel_range): Goertzel power
+# of every candidate frequency within +-tolerance of the tone, keeping the
+# strongest. Candidates that round to the same DFT bin share a column, and
+# all bins are one projection matrix applied to every window at once.
+
+@lru_cache(maxsize=None)
+def scan_projection(n_samples, sample_rate, target_freq, tolerance=50, step=10):
+    """(cos|sin projection matrix, column of each candidate, candidate freqs) for one window length."""
+    freqs = np.arange(target_freq - tolerance, target_freq + tolerance + 1, step)
+    ks = np.floor(0.5 + n_samples * freqs / sample_rate).astype(int)
+    bins, column = np.unique(ks, return_inverse=True)
+    phase = np.outer(np.arange(n_samples), 2.0 * np.pi * bins / n_samples)
+    return np.hstack((np.cos(phase), np.sin(phase))), column, freqs
+
+
+def scan_windows(windows, sample_rate, target_freq, tolerance=50, step=10):
+    """Peak power and the frequency it was found at, for every row of windows.
+
+    Same answer as scanning target_freq-tolerance .. target_freq+tolerance in
+    step Hz with goertzel() and keeping the first maximum.
+    """
+    proj, column, freqs = scan_projection(windows.shape[-1], sample_rate, target_freq, tolerance, step)
+    out = windows @ proj
+    n_bins = proj.shape[1] // 2
+    powers = (out[:, :n_bins] ** 2 + out[:, n_bins:] ** 2)[:, column]
+    best = np.argmax(powers, axis=1)
+    peak = powers[np.arange(len(powers)), best]
+    peak_freqs = np.where(peak > 0, freqs[best], target_freq)
+    return np.where(peak > 0, peak, 0.0), peak_freqs
+
+
+def scan_tone_powers(audio_data, sample_rate, freqs, samples_per_bit, tolerance=50, step=10):
+    """Per-bit-window (peak power, peak freq) for each tone in freqs.
+
+    Same windows as tone_powers(). Returns (starts, [(powers, peak freqs) per tone]).
+    """
+    windows = bit_windows(audio_data, samples_per_bit)
+    n_full = windows.shape[0]
+    starts = np.arange(n_full) * samples_per_bit
+    scans = [scan_windows(windows, sample_rate, f, tolerance, step) for f in freqs]
+
+    tail = audio_data[n_full * samples_per_bit:]
+    if len(tail) > 0 and len(tail) >= samples_per_bit // 2:
+        starts = np.append(starts, n_full * samples_per_bit)
+        scans = [tuple(np.append(a, b) for a, b in zip(scan, scan_windows(tail[np.newaxis, :], sample_rate, f, tolerance, step)))
+                 for scan, f in zip(scans, freqs)]
+    return starts, scans
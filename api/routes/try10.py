@@ -2,15 +2,18 @@ import numpy as np
 import sounddevice as sd
 import soundfile as sf
 import sys
-import requests
-import matplotlib.pyplot as plt
 import os
 import traceback
 import time
-import scipy.signal as sp_signal
-import re
 import signal
-import soundfile as sf
+from filters import sos_bandpass
+from capture import RingBufferRecorder
+from tone_power import tone_powers
+from bitbuf import BitBuffer
+from uart import printable
+from scoring import rank_alignments
+from delivery import default_client
+from plots import render_signal_plot
 
 
 
@@ -18,10 +21,12 @@ import soundfile as sf
 audio_data = []
 recording = False
 stream = None
+recorder = None
 sample_rate = 48000
 EXPECTED_WORDS = ["volts", "3 volts", "4 volts", "8 volts", "5 volts", "6 volts", "V12", "???"]
 AUDIO_FILE = "audio_data.npy"  # File to store recorded audio
 recorded_audio = "recorded_audio4.wav"
+backend = default_client()
 
 def signal_handler(signum, frame):
     """Handles termination signals to stop recording safely."""
@@ -35,36 +40,20 @@ def signal_handler(signum, frame):
 signal.signal(signal.SIGTERM, signal_handler)
 signal.signal(signal.SIGINT, signal_handler)
 
-def audio_callback(indata, frames, time, status):
-    """Callback function to write recorded audio into a file."""
-    if status:
-        print(f"Stream status: {status}")
-
-    if recording:
-        try:
-            # Append to the file correctly
-            with sf.SoundFile(recorded_audio, mode='rb+') as file:
-                file.seek(0, sf.SEEK_END)  # Move to end before writing
-                file.write(indata)
-            print(f"Captured {len(indata.flatten())} samples...")
-
-        except sf.LibsndfileError:
-            print("Error: Attempting to write to an invalid or missing WAV file.")
-
 def start_recording():
     """Starts the recording process."""
-    global recording, stream
+    global recording, stream, recorder
     print("Starting recording...")
 
     recording = True  # Set flag to start recording
 
-    # Create the file first to avoid "file not found" error
-    with sf.SoundFile(recorded_audio, mode='w', samplerate=sample_rate, channels=1, subtype='PCM_16') as file:
-        print("WAV file created successfully.")
+    # callback only copies into the ring; a writer thread does the disk I/O
+    recorder = RingBufferRecorder(recorded_audio, sample_rate, channels=1, subtype='PCM_16')
+    recorder.start()
 
     try:
         print("Opening audio input stream...")
-        stream = sd.InputStream(samplerate=sample_rate, channels=1, dtype='float32', callback=audio_callback)
+        stream = sd.InputStream(samplerate=sample_rate, channels=1, dtype='float32', callback=recorder.callback)
         stream.start()
         print("Recording started successfully.")
 
@@ -75,6 +64,8 @@ def start_recording():
         print(f"Error starting recording: {e}")
         traceback.print_exc()
 
+    print(f"Capture stats: {recorder.stop()}")
+
 
 def normalize_audio(audio_data):
     """Normalize and amplify audio data to match previous method."""
@@ -145,14 +136,8 @@ def process_recorded_audio():
     filtered_data = bandpass_filter(audio_data, sample_rate)
     print("Bandpass filter applied.")
 
-    # Plot filtered signal
-    plt.figure(figsize=(12, 5))
-    plt.plot(np.arange(len(filtered_data)) / sample_rate, filtered_data)
-    plt.title("Filtered AFSK Signal")
-    plt.xlabel("Time (s)")
-    plt.ylabel("Amplitude")
-    plt.grid(True)
-    plt.show()
+    # Plot filtered signal (saved, not shown: this runs headless)
+    render_signal_plot(filtered_data, sample_rate, 'audio_analysis.png')
 
     # Perform AFSK demodulation
     possible_baud_rates = [50]  
@@ -165,6 +150,8 @@ def process_recorded_audio():
         filtered_bits = remove_redundant_bits(bit_string)
 
         text = try_all_decoding_variants(bit_string)
+        if text:
+            print(f"Best variant (offset {text[0]['offset']}, inverted {text[0]['inverted']}, score {text[0]['score']:.2f}): {text[0]['text']}")
 
         decoded_text = decode_binary_to_ascii(bit_string)
         print(f"Decoded text: {decoded_text}")
@@ -177,82 +164,21 @@ def process_recorded_audio():
 
         send_to_backend(bit_string, decoded_text, text)
 
-    # Plot filtered signal
-    time = np.arange(len(filtered_data)) / sample_rate
-    plt.figure(figsize=(12, 5))
-    plt.plot(time, filtered_data)
-    plt.title("Filtered AFSK Signal")
-    plt.xlabel("Time (s)")
-    plt.ylabel("Amplitude")
-    plt.grid(True)
-    plt.show()
-
 def bandpass_filter(audio_data, sample_rate, low_cutoff=290, high_cutoff=3000):
     """Apply a bandpass filter to extract AFSK tones."""
-    nyquist = 0.5 * sample_rate
-    low = low_cutoff / nyquist
-    high = high_cutoff / nyquist
-    b, a = sp_signal.butter(6, [low, high], btype='band')
-    return sp_signal.filtfilt(b, a, audio_data)
-
-def goertzel(samples, sample_rate, target_freq):
-    """Goertzel algorithm to detect specific frequencies."""
-    N = len(samples)
-    k = int(0.5 + (N * target_freq / sample_rate))
-    omega = (2.0 * np.pi * k) / N
-    coeff = 2.0 * np.cos(omega)
-    
-    s1, s2 = 0.0, 0.0
-    for sample in samples:
-        s = sample + coeff * s1 - s2
-        s2, s1 = s1, s
-    
-    power = s2**2 + s1**2 - coeff * s1 * s2
-    return power
+    return sos_bandpass(audio_data, sample_rate, low_cutoff, high_cutoff)
 
 def try_all_decoding_variants(bit_string):
-    results = []
-    
-    # Normal bits
-    normal = decode_binary_to_ascii(bit_string)
-    results.append(("Normal", normal))
-    
-    # Inverted bits
-    inverted = decode_binary_to_ascii(''.join('1' if b == '0' else '0' for b in bit_string))
-    results.append(("Inverted", inverted))
-    
-    # Try different offsets (to handle framing issues)
-    for offset in range(8):
-        shifted = decode_binary_to_ascii(bit_string[offset:])
-        results.append((f"Offset {offset}", shifted))
-        
-        # Also with inversion
-        inv_shifted = decode_binary_to_ascii(''.join('1' if b == '0' else '0' for b in bit_string[offset:]))
-        results.append((f"Inverted Offset {offset}", inv_shifted))
-    
-    # Return all results
-    return results
+    """Every bit offset and polarity at once, scored and ranked best first."""
+    return rank_alignments(bit_string, EXPECTED_WORDS)
+
 
 def demodulate_afsk(audio_data, sample_rate, mark_freq=1200, space_freq=2200, baud_rate=50):
     """Demodulate AFSK using Goertzel algorithm and apply majority voting."""
     samples_per_bit = int(sample_rate / baud_rate)
-    binary_data = []
-
-    for i in range(0, len(audio_data), samples_per_bit):
-        chunk = audio_data[i:i + samples_per_bit]
-        if len(chunk) < samples_per_bit // 2:
-            break
+    _, (power_mark, power_space) = tone_powers(audio_data, sample_rate, [mark_freq, space_freq], samples_per_bit)
 
-        power_mark = goertzel(chunk, sample_rate, mark_freq)
-        power_space = goertzel(chunk, sample_rate, space_freq)
-
-        # Majority voting to remove noise
-        if power_mark > power_space:
-            binary_data.append('1')
-        else:
-            binary_data.append('0')
-
-    bit_string = ''.join(binary_data)
+    bit_string = BitBuffer(power_mark > power_space)
 
     # Detect preamble ($ = "00100100") and remove everything before it
     preamble = "00100100"
@@ -275,21 +201,16 @@ def demodulate_afsk(audio_data, sample_rate, mark_freq=1200, space_freq=2200, ba
 
 def remove_redundant_bits(bit_string):
     """Remove long runs of 1s or 0s to reduce noise.""" 
-    return re.sub(r'1{8,}|0{8,}', '', bit_string)  # Remove runs of 8+ bits
+    return BitBuffer(bit_string).drop_runs(8)  # Remove runs of 8+ bits
 
 def decode_binary_to_ascii(bit_string):
     """Convert binary string to ASCII text by testing different bit alignments."""
     possible_texts = []
     
+    bit_string = BitBuffer(bit_string)
     for offset in range(8):  # Try different bit alignments
-        raw_text = ""
-        for i in range(offset, len(bit_string) - 7, 8):
-            char_code = int(bit_string[i:i+8], 2)
-            if 32 <= char_code <= 126:  # Printable ASCII range
-                raw_text += chr(char_code)
-            else:
-                raw_text += "."
-
+        # 8-bit groups from this offset, non-printable bytes shown as "."
+        raw_text = printable(bit_string.pack(offset).astype(np.uint8).tobytes())
         possible_texts.append((offset, raw_text))
 
     # Pick the longest valid text
@@ -299,17 +220,15 @@ def decode_binary_to_ascii(bit_string):
 
 def try_inverted_bits(bit_string):
     """Invert binary and decode again."""
-    inverted_bits = ''.join('1' if b == '0' else '0' for b in bit_string)
+    inverted_bits = ~BitBuffer(bit_string)
     return decode_binary_to_ascii(inverted_bits)
 
 def send_to_backend(binary_data, decoded_text, text):
     """Send extracted binary and ASCII text to the backend."""
-    payload = {"binaryData": binary_data, "decodedText": decoded_text, "text": text}
-    try:
-        response = requests.post("http://localhost:8888/api/afsk/audio", json=payload)
-        print(f"Backend response: {response.status_code} - {response.json()}")
-    except requests.exceptions.RequestException as e:
-        print(f"Error sending data to backend: {e}")
+    payload = {"binaryData": str(binary_data), "decodedText": decoded_text, "text": text}
+    body = backend.send(payload)  # spooled and replayed later if the backend is down
+    if body is not None:
+        print(f"Backend response: {body}")
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
@@ -2,7 +2,6 @@ import numpy as np
 import sounddevice as sd
 import soundfile as sf
 import sys
-import requests
 import matplotlib.pyplot as plt
 import os
 import traceback
@@ -10,6 +9,13 @@ import time
 import scipy.signal as sp_signal
 import re
 import signal
+from filters import sos_bandpass
+from capture import RingBufferRecorder
+from tone_power import tone_powers
+from bitbuf import BitBuffer
+from uart import printable
+from scoring import rank_alignments
+from delivery import default_client
 import soundfile as sf
 from scipy.signal import firwin, lfilter
 
@@ -20,10 +26,12 @@ from scipy.signal import firwin, lfilter
 audio_data = []
 recording = False #recording or not
 stream = None
+recorder = None
 sample_rate = 48000 #audio signal recroded at 8000 times per sec
 #words that want to find
 EXPECTED_WORDS = ["volts", "3 volts", "4 volts", "8 volts", "5 volts", "6 volts", "V12", "?"]
 recorded_audio = "recorded_audio6.wav" #store recorded audio
+backend = default_client()
 
 def signal_handler(signum, frame):
     global recording, stream
@@ -35,35 +43,20 @@ def signal_handler(signum, frame):
 signal.signal(signal.SIGTERM, signal_handler)
 signal.signal(signal.SIGINT, signal_handler)
 
-def audio_callback(indata, frames, time, status):
-    if status:
-        print(f"status: {status}")
-
-    if recording:
-        try:
-            # Append to the file correctly
-            with sf.SoundFile(recorded_audio, mode='rb+') as file:
-                file.seek(0, sf.SEEK_END)  # Move to end before writing
-                file.write(indata)
-            print(f"got {len(indata.flatten())} samples...")
-
-        except sf.LibsndfileError:
-            print("cant write to wav file")
-
 def start_recording():
-    global recording, stream
+    global recording, stream, recorder
     print("Recording started")
 
     recording = True  # star trecording
 
     audio_data = []
 
-    # Create file
-    with sf.SoundFile(recorded_audio, mode='w', samplerate=sample_rate, channels=1, subtype='FLOAT') as file:
-        pass
+    # callback only copies into the ring; a writer thread does the disk I/O
+    recorder = RingBufferRecorder(recorded_audio, sample_rate, channels=1, subtype='FLOAT')
+    recorder.start()
 
     try:
-        stream = sd.InputStream(samplerate=sample_rate, channels=1, dtype='float32', callback=audio_callback)
+        stream = sd.InputStream(samplerate=sample_rate, channels=1, dtype='float32', callback=recorder.callback)
         stream.start()
 
         while recording:
@@ -73,6 +66,8 @@ def start_recording():
         print(f"Error starting recording")
         traceback.print_exc()
 
+    print(f"Capture stats: {recorder.stop()}")
+
 
 def normalize_audio(audio_data):
     if len(audio_data) == 0:
@@ -127,6 +122,7 @@ def process_recorded_audio():
     audio_data = np.array(audio_data, dtype=np.float32)
     audio_data = normalize_audio(audio_data)  # normalize
 
+    os.makedirs('static/plots', exist_ok=True)
     plt.figure(figsize=(12, 5))
     plt.specgram(audio_data, NFFT=1024, Fs=sample_rate, noverlap=512, cmap='plasma')
     plt.title("Spectrogram of Original Audio")
@@ -134,9 +130,8 @@ def process_recorded_audio():
     plt.ylabel("Frequency (Hz)")
     plt.colorbar(label='Intensity [dB]')
     plt.tight_layout()
-    plt.show()
-    #plt.savefig('static/plots/original_spectrogram.png')
-   # plt.close()
+    plt.savefig('static/plots/original_spectrogram.png')
+    plt.close()
 
 
     #  bandpass filter
@@ -150,9 +145,8 @@ def process_recorded_audio():
     plt.xlabel("Time (s)")
     plt.ylabel("Amplitude")
     plt.grid(True)
-    #plt.savefig(plot_filename)
-    #plt.close()
-    plt.show()
+    plt.savefig(plot_filename)
+    plt.close()
 
 
      # === Plot filtered audio spectrogram ===
@@ -163,9 +157,8 @@ def process_recorded_audio():
     plt.ylabel("Frequency (Hz)")
     plt.colorbar(label='Intensity [dB]')
     plt.tight_layout()
-    plt.show()
-    #plt.savefig('static/plots/filtered_spectrogram.png')
-    #plt.close()
+    plt.savefig('static/plots/filtered_spectrogram.png')
+    plt.close()
     #text1 = afsk_demod(audio_data)
     # demodulation
     possible_baud_rates = [50]  #test baud rates to find ebst one
@@ -185,6 +178,8 @@ def process_recorded_audio():
         
 
         text = try_all_decoding_variants(bit_string)
+        if text:
+            print(f"Best variant (offset {text[0]['offset']}, inverted {text[0]['inverted']}, score {text[0]['score']:.2f}): {text[0]['text']}")
 
 
         #inverted bits
@@ -198,26 +193,7 @@ def process_recorded_audio():
 
 
 def bandpass_filter(audio_data, sample_rate, low_cutoff=900, high_cutoff=2700):
-    nyquist = 0.5 * sample_rate
-    low = low_cutoff / nyquist
-    high = high_cutoff / nyquist
-    b, a = sp_signal.butter(6, [low, high], btype='band')
-    return sp_signal.filtfilt(b, a, audio_data)
-
-def goertzel(samples, sample_rate, target_freq):
-    """Goertzel algorithm to detect specific frequencies."""
-    N = len(samples)
-    k = int(0.5 + (N * target_freq / sample_rate))
-    omega = (2.0 * np.pi * k) / N
-    coeff = 2.0 * np.cos(omega)
-    
-    s1, s2 = 0.0, 0.0
-    for sample in samples:
-        s = sample + coeff * s1 - s2
-        s2, s1 = s1, s
-    
-    power = s2**2 + s1**2 - coeff * s1 * s2
-    return power
+    return sos_bandpass(audio_data, sample_rate, low_cutoff, high_cutoff)
 
 def fft_analysis(samples, sample_rate, target_freqs):
     spectrum = np.fft.rfft(samples)
@@ -237,7 +213,6 @@ def fft_analysis(samples, sample_rate, target_freqs):
 def demodulate_afsk(audio_data, sample_rate, mark_freq=1200, space_freq=2200, baud_rate=50):
     """Demodulate AFSK using Goertzel algorithm and apply majority voting."""
     samples_per_bit = int(sample_rate / baud_rate)
-    binary_data = []
 
 #analuze signal across the spectrum
     fft_magnitudes = fft_analysis(audio_data, sample_rate, [mark_freq, space_freq])
@@ -246,21 +221,9 @@ def demodulate_afsk(audio_data, sample_rate, mark_freq=1200, space_freq=2200, ba
         print("both mark and space tones present.")
 
 
-    for i in range(0, len(audio_data), samples_per_bit):
-        chunk = audio_data[i:i + samples_per_bit]
-        if len(chunk) < samples_per_bit // 2:
-            break
+    _, (power_mark, power_space) = tone_powers(audio_data, sample_rate, [mark_freq, space_freq], samples_per_bit)
 
-        power_mark = goertzel(chunk, sample_rate, mark_freq)
-        power_space = goertzel(chunk, sample_rate, space_freq)
-
-        # Majority voting to remove noise
-        if power_mark > power_space:
-            binary_data.append('1')
-        else:
-            binary_data.append('0')
-
-    bit_string = ''.join(binary_data)
+    bit_string = BitBuffer(power_mark > power_space)
 
     # Detect preamble ($ = "00100100") and remove everything before it
     preamble = "00100100"
@@ -282,31 +245,12 @@ def demodulate_afsk(audio_data, sample_rate, mark_freq=1200, space_freq=2200, ba
 
 
 def try_all_decoding_variants(bit_string):
-    results = []
-    
-    # Normal bits
-    normal = decode_binary_to_ascii(bit_string)
-    results.append(("Normal", normal))
-    
-    # Inverted bits
-    inverted = decode_binary_to_ascii(''.join('1' if b == '0' else '0' for b in bit_string))
-    results.append(("Inverted", inverted))
-    
-    # Try different offsets (to handle framing issues)
-    for offset in range(8):
-        shifted = decode_binary_to_ascii(bit_string[offset:])
-        results.append((f"Offset {offset}", shifted))
-        
-        # Also with inversion
-        inv_shifted = decode_binary_to_ascii(''.join('1' if b == '0' else '0' for b in bit_string[offset:]))
-        results.append((f"Inverted Offset {offset}", inv_shifted))
-    
-    # Return all results
-    return results
+    """Every bit offset and polarity at once, scored and ranked best first."""
+    return rank_alignments(bit_string, EXPECTED_WORDS)
 
 
 def remove_redundant_bits(bit_string):
-    return re.sub(r'1{8,}|0{8,}', '', bit_string)
+    return BitBuffer(bit_string).drop_runs(8)
 
 # Assume you have a known preamble like '01010101' or '01111110'
 def align_to_preamble(bitstream, preamble='00100100'):
@@ -329,19 +273,10 @@ def align_to_preamble(bitstream, preamble='00100100'):
 def decode_binary_to_ascii(bit_string):
     possible_texts = []
 
+    bit_string = BitBuffer(bit_string)
     for offset in range(8):
-        chars = []
-        for i in range(offset, len(bit_string) - 7, 8):
-            byte = bit_string[i:i+8]
-            try:
-                val = int(byte, 2)
-                if 32 <= val <= 126:
-                    chars.append(chr(val))
-                else:
-                    chars.append('.')  # placeholder for non-printable
-            except ValueError:
-                pass
-        text = ''.join(chars)
+        # 8-bit groups from this offset, '.' as placeholder for non-printable
+        text = printable(bit_string.pack(offset).astype(np.uint8).tobytes())
         possible_texts.append(text)
 
     # Choose the one with most readable characters
@@ -350,16 +285,14 @@ def decode_binary_to_ascii(bit_string):
  # Return the best match
 
 def try_inverted_bits(bit_string):
-    inverted_bits = ''.join('1' if b == '0' else '0' for b in bit_string)
+    inverted_bits = ~BitBuffer(bit_string)
     return decode_binary_to_ascii(inverted_bits)
 
 def send_to_backend(binary_data, decoded_text, text):
-    payload = {"binaryData": binary_data, "decodedText": decoded_text, "text": text }
-    try:
-        response = requests.post("http://localhost:8888/api/afsk/audio", json=payload)
-        print(f"Backend response: {response.status_code} - {response.json()}")
-    except requests.exceptions.RequestException as e:
-        print(f"Error sending data to backend: {e}")
+    payload = {"binaryData": str(binary_data), "decodedText": decoded_text, "text": text }
+    body = backend.send(payload)  # spooled and replayed later if the backend is down
+    if body is not None:
+        print(f"Backend response: {body}")
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
@@ -2,7 +2,6 @@ import numpy as np
 import sounddevice as sd
 import soundfile as sf
 import sys
-import requests
 import matplotlib.pyplot as plt
 import os
 import traceback
@@ -10,15 +9,23 @@ import time
 import scipy.signal as sp_signal
 import re
 import signal
+from filters import sos_bandpass
+from capture import RingBufferRecorder
+from bitbuf import BitBuffer
+from uart import printable
+from tone_power import scan_tone_powers
+from delivery import default_client
 
 
 # Global Variables
 audio_data = []
 recording = False
 stream = None
+recorder = None
 sample_rate = 48000
 EXPECTED_WORDS = ["volts", "3 volts", "4 volts", "8 volts", "5 volts", "6 volts", "V12"]
 recorded_audio = "recorded_audio6.wav"
+backend = default_client()
 
 
 def signal_handler(signum, frame):
@@ -33,31 +40,18 @@ signal.signal(signal.SIGTERM, signal_handler)
 signal.signal(signal.SIGINT, signal_handler)
 
 
-def audio_callback(indata, frames, time, status):
-    if status:
-        print(f"status: {status}")
-
-    if recording:
-        try:
-            with sf.SoundFile(recorded_audio, mode='rb+') as file:
-                file.seek(0, sf.SEEK_END)
-                file.write(indata)
-            print(f"got {len(indata.flatten())} samples...")
-        except sf.LibsndfileError:
-            print("can't write to wav file")
-
-
 def start_recording():
-    global recording, stream
+    global recording, stream, recorder
     print("Recording started")
 
     recording = True
 
-    with sf.SoundFile(recorded_audio, mode='w', samplerate=sample_rate, channels=1, subtype='PCM_16') as file:
-        pass
+    # callback only copies into the ring; a writer thread does the disk I/O
+    recorder = RingBufferRecorder(recorded_audio, sample_rate, channels=1, subtype='PCM_16')
+    recorder.start()
 
     try:
-        stream = sd.InputStream(samplerate=sample_rate, channels=1, dtype='float32', callback=audio_callback)
+        stream = sd.InputStream(samplerate=sample_rate, channels=1, dtype='float32', callback=recorder.callback)
         stream.start()
 
         while recording:
@@ -67,6 +61,8 @@ def start_recording():
         print("Error starting recording")
         traceback.print_exc()
 
+    print(f"Capture stats: {recorder.stop()}")
+
 
 def normalize_audio(audio_data):
     if len(audio_data) == 0:
@@ -139,37 +135,7 @@ def process_recorded_audio():
 
 
 def bandpass_filter(audio_data, sample_rate, low_cutoff=1000, high_cutoff=2500):
-    nyquist = 0.5 * sample_rate
-    low = low_cutoff / nyquist
-    high = high_cutoff / nyquist
-    b, a = sp_signal.butter(6, [low, high], btype='band')
-    return sp_signal.filtfilt(b, a, audio_data)
-
-
-def goertzel(samples, sample_rate, target_freq):
-    N = len(samples)
-    k = int(0.5 + (N * target_freq / sample_rate))
-    omega = (2.0 * np.pi * k) / N
-    coeff = 2.0 * np.cos(omega)
-
-    s1, s2 = 0.0, 0.0
-    for sample in samples:
-        s = sample + coeff * s1 - s2
-        s2, s1 = s1, s
-
-    power = s2**2 + s1**2 - coeff * s1 * s2
-    return power
-
-
-def scan_goertzel_range(chunk, sample_rate, target_freq, tolerance=50, step=10):
-    best_power = 0
-    best_freq = target_freq
-    for freq in range(target_freq - tolerance, target_freq + tolerance + 1, step):
-        power = goertzel(chunk, sample_rate, freq)
-        if power > best_power:
-            best_power = power
-            best_freq = freq
-    return best_power, best_freq
+    return sos_bandpass(audio_data, sample_rate, low_cutoff, high_cutoff)
 
 
 def fft_analysis(samples, sample_rate, target_freqs):
@@ -187,29 +153,20 @@ def fft_analysis(samples, sample_rate, target_freqs):
 
 def demodulate_afsk(audio_data, sample_rate, mark_freq=1200, space_freq=2200, baud_rate=1200):
     samples_per_bit = int(sample_rate / baud_rate)
-    binary_data = []
 
     fft_magnitudes = fft_analysis(audio_data, sample_rate, [mark_freq, space_freq])
     fft_threshold = 100
     if fft_magnitudes[mark_freq] > fft_threshold and fft_magnitudes[space_freq] > fft_threshold:
         print("Both mark and space tones present.")
 
-    for i in range(0, len(audio_data), samples_per_bit):
-        chunk = audio_data[i:i + samples_per_bit]
-        if len(chunk) < samples_per_bit // 2:
-            break
+    # strongest bin within +-50 Hz of each tone (10 Hz steps), all windows at once
+    _, [(power_mark, freq_mark), (power_space, freq_space)] = scan_tone_powers(
+        audio_data, sample_rate, [mark_freq, space_freq], samples_per_bit)
 
-        power_mark, freq_mark = scan_goertzel_range(chunk, sample_rate, mark_freq)
-        power_space, freq_space = scan_goertzel_range(chunk, sample_rate, space_freq)
+    min_power_threshold = 1e-4  # Adjust this as needed
+    keep = np.maximum(power_mark, power_space) >= min_power_threshold  # Skip noisy or silent chunks
 
-        min_power_threshold = 1e-4  # Adjust this as needed
-        if max(power_mark, power_space) < min_power_threshold:
-            continue  # Skip noisy or silent chunks
-
-        bit = '1' if power_mark > power_space else '0'
-        binary_data.append(bit)
-
-    bit_string = ''.join(binary_data)
+    bit_string = BitBuffer(power_mark[keep] > power_space[keep])
 
     preamble = "00100100"
     preamble_index = bit_string.find(preamble)
@@ -227,19 +184,14 @@ def demodulate_afsk(audio_data, sample_rate, mark_freq=1200, space_freq=2200, ba
 
 
 def remove_redundant_bits(bit_string):
-    return re.sub(r'1{8,}|0{8,}', '', bit_string)
+    return BitBuffer(bit_string).drop_runs(8)
 
 
 def decode_binary_to_ascii(bit_string):
     possible_texts = []
+    bit_string = BitBuffer(bit_string)
     for offset in range(8):
-        raw_text = ""
-        for i in range(offset, len(bit_string) - 7, 8):
-            char_code = int(bit_string[i:i + 8], 2)
-            if 32 <= char_code <= 126:
-                raw_text += chr(char_code)
-            else:
-                raw_text += "."
+        raw_text = printable(bit_string.pack(offset).astype(np.uint8).tobytes())
         possible_texts.append((offset, raw_text))
 
     best_text = max(possible_texts, key=lambda x: len(x[1]))[1]
@@ -247,17 +199,15 @@ def decode_binary_to_ascii(bit_string):
 
 
 def try_inverted_bits(bit_string):
-    inverted_bits = ''.join('1' if b == '0' else '0' for b in bit_string)
+    inverted_bits = ~BitBuffer(bit_string)
     return decode_binary_to_ascii(inverted_bits)
 
 
 def send_to_backend(binary_data, decoded_text):
-    payload = {"binaryData": binary_data, "decodedText": decoded_text}
-    try:
-        response = requests.post("http://localhost:8888/api/afsk/audio", json=payload)
-        print(f"Backend response: {response.status_code} - {response.json()}")
-    except requests.exceptions.RequestException as e:
-        print(f"Error sending data to backend: {e}")
+    payload = {"binaryData": str(binary_data), "decodedText": decoded_text}
+    body = backend.send(payload)  # spooled and replayed later if the backend is down
+    if body is not None:
+        print(f"Backend response: {body}")
 
 
 if __name__ == "__main__":
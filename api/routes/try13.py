@@ -1,32 +1,177 @@
 import numpy as np
-import queue
 import sounddevice as sd
 import sys
+import threading
+import time
+
+from tone_power import bit_windows, goertzel_windows
+from uart import ShiftRegisterFramer
+from rtlog import RealtimeLog, status_bits, status_names
 
 """
 AFSK decoder that listens to the default system microphone in real‑time.
-Tested with 300‑baud Bell 202 (space 1200 Hz, mark 2200 Hz) but the
+Tested with 300‑baud Bell 202 (space 1200 Hz, mark 2200 Hz) but the
 frequencies and baud rate are configurable.
 
+The audio callback only copies each block into a fixed ring buffer; the
+decoding loop takes whole bit periods out of it and frames bytes one bit at
+a time, so the work per sample stays the same however long the stream runs.
+Every character's latency (audio callback of its stop bit -> character
+written) is measured against the time one character takes on air.
+Stream status and ring overruns are logged through rtlog, so the callback
+never writes to stderr itself.
+
 Install requirements first:
     pip install sounddevice numpy
     
 Press Ctrl‑C or notebook stop (interrupt the kernel) to stop.
 """
 
-# ---------------- FFT helper -------------------------------------------------
-
-def get_fft_magnitude_at_freq(chunk: np.ndarray, sample_rate: int, freq: float) -> float:
-    """Return magnitude of *freq* in *chunk* using an rFFT."""
-    spectrum = np.fft.rfft(chunk)
-    N = len(chunk)
-    bin_index = int(round(freq * N / sample_rate))
-    if 0 <= bin_index < len(spectrum):
-        return abs(spectrum[bin_index])
-    return 0.0
+# ---------------- Ring buffer ------------------------------------------------
+
+class SampleRing:
+    """Fixed-size ring of samples, written by the audio callback, read by the decoder.
+
+    Every sample is stored twice (at i and i + capacity), so any run of up to
+    capacity unread samples is one contiguous slice. Only the callback moves
+    head and only the reader moves tail. The arrival time of each block is
+    kept in a second small ring for latency measurement.
+    """
+
+    def __init__(self, capacity: int, max_blocks: int = 256):
+        self.capacity = capacity
+        self.buf = np.zeros(2 * capacity, dtype=np.float32)
+        self.head = 0  # samples written
+        self.tail = 0  # samples consumed
+        self.overruns = 0
+        self.block_ends = np.full(max_blocks, -1, dtype=np.int64)
+        self.block_times = np.zeros(max_blocks)
+        self.blocks = 0
+        self.ready = threading.Event()
+
+    def write(self, samples: np.ndarray, arrival: float) -> bool:
+        n = len(samples)
+        if self.head + n - self.tail > self.capacity:  # reader fell behind: drop the block
+            self.overruns += 1
+            return False
+        pos = self.head % self.capacity
+        first = min(n, self.capacity - pos)
+        for base in (0, self.capacity):
+            self.buf[base + pos:base + pos + first] = samples[:first]
+            self.buf[base:base + n - first] = samples[first:]
+        self.head += n
+        slot = self.blocks % len(self.block_ends)
+        self.block_ends[slot] = self.head
+        self.block_times[slot] = arrival
+        self.blocks += 1
+        self.ready.set()
+        return True
+
+    def available(self) -> int:
+        return self.head - self.tail
+
+    def peek(self, n: int) -> np.ndarray:
+        pos = self.tail % self.capacity
+        return self.buf[pos:pos + n]
+
+    def consume(self, n: int):
+        self.tail += n
+
+    def arrival_time(self, sample_index: int) -> float:
+        """When the block holding sample_index reached the callback."""
+        later = self.block_ends > sample_index
+        if not later.any():
+            return time.perf_counter()
+        return float(self.block_times[later][np.argmin(self.block_ends[later])])
+
+# ---------------- Latency --------------------------------------------------
+
+class LatencyMeter:
+    """Callback-to-character latencies: running totals plus the most recent ones."""
+
+    def __init__(self, budget: float, keep: int = 1024):
+        self.budget = budget  # seconds one character takes on air
+        self.recent = np.zeros(keep)
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.over_budget = 0
+
+    def record(self, seconds: float):
+        self.recent[self.count % len(self.recent)] = seconds
+        self.count += 1
+        self.total += seconds
+        self.worst = max(self.worst, seconds)
+        self.over_budget += seconds > self.budget
+
+    def summary(self) -> dict:
+        recent = self.recent[:min(self.count, len(self.recent))]
+        return {
+            "characters": self.count,
+            "meanMs": 1000 * self.total / self.count if self.count else 0.0,
+            "p99Ms": 1000 * float(np.percentile(recent, 99)) if self.count else 0.0,
+            "maxMs": 1000 * self.worst,
+            "budgetMs": 1000 * self.budget,
+            "overBudget": self.over_budget,
+        }
 
 # ---------------- AFSK stream decoder ---------------------------------------
 
+class RealtimeAfskDecoder:
+    def __init__(self, baud: int = 1200, f_space: int = 1200, f_mark: int = 2200,
+                 sample_rate: int = 48000, msb_first: bool = False, out=None, ring_bits: int = 256):
+        self.sample_rate = sample_rate
+        self.f_mark = f_mark
+        self.f_space = f_space
+        self.samples_per_bit = int(sample_rate / baud)
+        self.ring = SampleRing(ring_bits * self.samples_per_bit)
+        self.framer = ShiftRegisterFramer(msb_first)  # start 0, 8 data bits LSB first, stop 1
+        self.latency = LatencyMeter(10 / baud)
+        self.out = out or sys.stdout
+        self.log = RealtimeLog(sys.stderr)
+        self.status_code = self.log.register("stream_status", lambda a, b: status_names(a))
+        self.overrun_code = self.log.register("ring_overrun", "decoder behind, dropped {a} samples")
+        self.log_ring = self.log.ring("callback")
+
+    def callback(self, indata, frames, time_info, status):  # pylint: disable=unused-argument
+        # indata shape: (frames, channels); only the first channel is decoded
+        if status:
+            self.log_ring.post(self.status_code, status_bits(status))
+        if not self.ring.write(indata[:, 0], time.perf_counter()):
+            self.log_ring.post(self.overrun_code, frames)
+
+    def process(self) -> str:
+        """Decide every whole bit period waiting in the ring and frame it."""
+        spb = self.samples_per_bit
+        n_bits = self.ring.available() // spb
+        if n_bits == 0:
+            return ''
+        first_sample = self.ring.tail
+        windows = bit_windows(self.ring.peek(n_bits * spb), spb)
+        bits = goertzel_windows(windows, self.sample_rate, self.f_mark) > \
+            goertzel_windows(windows, self.sample_rate, self.f_space)
+        self.ring.consume(n_bits * spb)
+
+        text, stop_samples = [], []
+        for i, bit in enumerate(bits):
+            byte_val = self.framer.push(int(bit))
+            if byte_val is not None:
+                text.append(chr(byte_val) if 32 <= byte_val < 127 else f"<{byte_val:02X}>")
+                stop_samples.append(first_sample + (i + 1) * spb - 1)
+        if not text:
+            return ''
+        chars = ''.join(text)
+        self.out.write(chars)
+        self.out.flush()
+        done = time.perf_counter()
+        for sample_index in stop_samples:
+            self.latency.record(done - self.ring.arrival_time(sample_index))
+        return chars
+
+    def stats(self) -> dict:
+        return {**self.latency.summary(), "ringOverruns": self.ring.overruns}
+
+
 def decode_afsk_stream(
     baud: int = 1200,
     f_space: int = 1200,
@@ -34,77 +179,31 @@ def decode_afsk_stream(
     sample_rate: int = 48000,
 ):
     """Listen to the microphone and decode an AFSK stream in real‑time."""
-    samples_per_bit = int(sample_rate / baud)
-
-    # Queue for audio callback -> processing thread
-    audio_q: queue.Queue[np.ndarray] = queue.Queue()
-
-    def audio_callback(indata, frames, time, status):  # pylint: disable=unused-argument
-        # indata shape: (frames, channels); we flatten to mono float32 [-1,1]
-        if status:
-            print(status, file=sys.stderr)
-        audio_q.put(indata[:, 0].copy())
-
-    # Buffer holding at least one bit‑period of samples
-    sample_buffer = np.empty(0, dtype=np.float32)
-    bits = []  # collected raw bits
+    decoder = RealtimeAfskDecoder(baud, f_space, f_mark, sample_rate)
 
     print(
-        f"Listening: baud={baud}, mark={f_mark} Hz, space={f_space} Hz, sample_rate={sample_rate}"
+        f"Listening: baud={baud}, mark={f_mark} Hz, space={f_space} Hz, sample_rate={sample_rate}"
     )
     print("Press Ctrl‑C to stop.")
 
+    decoder.log.start()
     try:
         with sd.InputStream(
             channels=1,
             samplerate=sample_rate,
-            callback=audio_callback,
-            blocksize=samples_per_bit,  # deliver roughly bit‑sized blocks
+            callback=decoder.callback,
+            blocksize=decoder.samples_per_bit,  # deliver roughly bit‑sized blocks
         ):
             while True:
-                # Wait for next chunk from audio thread
-                new_samples: np.ndarray = audio_q.get()
-                sample_buffer = np.concatenate((sample_buffer, new_samples))
-
-                # Process while we have at least one full bit period
-                while len(sample_buffer) >= samples_per_bit:
-                    chunk = sample_buffer[:samples_per_bit]
-                    sample_buffer = sample_buffer[samples_per_bit:]
-
-                    mag_mark = get_fft_magnitude_at_freq(chunk, sample_rate, f_mark)
-                    mag_space = get_fft_magnitude_at_freq(chunk, sample_rate, f_space)
-
-                    bits.append(1 if mag_mark > mag_space else 0)
-
-                    # Attempt to extract bytes whenever we have plenty of bits
-                    while len(bits) >= 10:
-                        # Search for start bit (0)
-                        if bits[0] != 0:
-                            bits.pop(0)
-                            continue
-
-                        frame = bits[:10]
-                        if frame[9] != 1:
-                            # Bad stop bit – discard first bit and resync
-                            bits.pop(0)
-                            continue
-
-                        # Convert 8 data bits (LSB first) to byte
-                        byte_val = 0
-                        for i, b in enumerate(frame[1:9]):
-                            byte_val |= b << i
-                        # Print byte
-                        if 32 <= byte_val < 127:
-                            sys.stdout.write(chr(byte_val))
-                            sys.stdout.flush()
-                        else:
-                            sys.stdout.write(f"<{byte_val:02X}>")
-                            sys.stdout.flush()
-                        # Remove processed bits
-                        bits = bits[10:]
+                decoder.ring.ready.wait(0.1)
+                decoder.ring.ready.clear()
+                decoder.process()
 
     except KeyboardInterrupt:
         print("\nStopped by user.")
+    decoder.log.close()
+    print(f"Latency: {decoder.stats()}", file=sys.stderr)
+    return decoder.stats()
 
 # ---------------- Main -------------------------------------------------------
 
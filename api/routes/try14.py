@@ -3,295 +3,327 @@ import sounddevice as sd
 import soundfile as sf
 import sys
 import requests
-import matplotlib.pyplot as plt
 import os
 import traceback
 import time
-import scipy.signal as sp_signal
-import re
 import signal
+from uart import uart_decode
+from bitbuf import BitBuffer
+from sync import PREAMBLE, best_sync, find_sync
+from filters import sos_bandpass, decimate
+import json
+import threading
+from stream_demod import MultiChannelDemodulator, StreamingDemodulator
+from capture import RingBufferRecorder
+from plots import PlotRenderer, render_signal_plot, render_goertzel_plot
+from hypotheses import HypothesisDecoder, score_bits
+from delivery import default_client
+from chunked import BlockReader, demodulate_file
+from metrics import Metrics
+from rtlog import RealtimeLog
 
 # Global Variables
 audio_data = []
 recording = False  # recording or not
 stream = None
 sample_rate = 48000  # audio signal recorded at 48000 samples per sec
+decimate_rate = 12000  # filter/demodulate at this rate (tones are < 2.5 kHz); None keeps the recorded rate
 EXPECTED_WORDS = ["volts", "3 volts", "4 volts", "8 volts", "5 volts", "6 volts", "V12", "antennas deployed"]
 recorded_audio = "recorded_audio6.wav"  # store recorded audio
+stream_result = "recorded_audio6.stream.json"  # live decode result left for the stop command
+live_decode = False  # decode blocks as they arrive (start --stream)
+capture_channels = 1  # receivers on the audio interface; >1 decodes every channel live (start --channels N)
+channel_sources = None  # telemetry source tag per channel (default ch0, ch1, ...)
+recorder = None
+live_demod = None
+plot_renderer = PlotRenderer(enabled=True)  # --no-plots skips rendering
+stop_requested = threading.Event()
+rt_log = RealtimeLog()  # capture-thread events (xruns, ring overflows), written off the callback
+hypothesis_decoder = HypothesisDecoder()  # process pool kept across decodes
+metrics = Metrics()  # stage timings and counters, returned with each result (decoderd serves /metrics)
+backend = default_client(metrics)
+chunked_decode_after = 600  # seconds; longer recordings are decoded block by block in constant memory
 
 ESC = bytes([0x1B])
 
-def signal_handler(signum, frame):
+def request_stop():
     global recording, stream
     recording = False
-    if stream:
-        stream.stop()
-        stream.close()
+    stop_requested.set()
+    # decoderd calls this and then stop_recording; the stream is closed only once
+    active, stream = stream, None
+    if active:
+        active.stop()
+        active.close()
+
+
+def signal_handler(signum, frame):
+    request_stop()
 
 signal.signal(signal.SIGTERM, signal_handler)
 signal.signal(signal.SIGINT, signal_handler)
 
-def audio_callback(indata, frames, time, status):
-    if status:
-        print(f"status: {status}")
-
-    if recording:
-        try:
-            with sf.SoundFile(recorded_audio, mode='rb+') as file:
-                file.seek(0, sf.SEEK_END)
-                file.write(indata)
-            print(f"got {len(indata.flatten())} samples...")
-        except sf.LibsndfileError:
-            print("cant write to wav file")
+def print_live_chars(chars):
+    print(f"live: {chars}", flush=True)
 
 
+def print_source_chars(source, chars):
+    print(f"live [{source}]: {chars}", flush=True)
 
 
 def start_recording():
-    global recording, stream
+    global recording, stream, recorder, live_demod
     print("Recording started")
 
     recording = True
-    with sf.SoundFile(recorded_audio, mode='w', samplerate=sample_rate, channels=1, subtype='PCM_16') as file:
-        pass
+    stop_requested.clear()
+    if os.path.exists(stream_result):
+        os.remove(stream_result)
+
+    demod = None
+    if live_decode and capture_channels > 1:
+        demod = MultiChannelDemodulator(sample_rate, capture_channels, baud_rate=50, sources=channel_sources,
+                                        on_chars=print_source_chars, decimate_to=decimate_rate)
+    elif live_decode:
+        demod = StreamingDemodulator(sample_rate, baud_rate=50, on_chars=print_live_chars,
+                                     decimate_to=decimate_rate)
+    live_demod = demod
+    # the callback only copies into the ring; the writer thread does disk I/O and live decoding
+    recorder = RingBufferRecorder(recorded_audio, sample_rate, channels=capture_channels, subtype='PCM_16',
+                                  on_block=metrics.timed("live_decode", demod.feed) if demod else None,
+                                  log=rt_log)
+    recorder.start()
+    rt_log.start()
 
     try:
-        stream = sd.InputStream(samplerate=sample_rate, channels=1, dtype='float32', callback=audio_callback)
+        stream = sd.InputStream(samplerate=sample_rate, channels=capture_channels, dtype='float32',
+                                callback=recorder.callback)
         stream.start()
         while recording:
-            time.sleep(1)
+            stop_requested.wait(1)
     except Exception:
         print("Error starting recording")
         traceback.print_exc()
 
+    stats = recorder.stop()
+    rt_log.close()
+    print(f"Capture stats: {stats}")
+    metrics.count("capture_blocks", stats["blocks"])
+    metrics.count("xruns", stats["inputOverflows"] + stats["inputUnderflows"] + stats["ringOverflows"])
+    metrics.count("dropped_frames", stats["droppedFrames"])
+    if demod:
+        demod.flush()
+        metrics.count("samples_filtered", demod.samples_filtered)
+        save_stream_result(demod)
+
+
+def save_stream_result(demod):
+    if isinstance(demod, MultiChannelDemodulator):
+        metrics.count("bits_decided", sum(len(demod.bits(ch)) for ch in range(demod.channels)))
+        result = {"sources": {source: {**r, "clean": extract_clean(r["decodedUart"])}
+                              for source, r in demod.results().items()}}
+        metrics.count("frames_found", sum(count_frames(r["decodedUart"]) for r in result["sources"].values()))
+        with open(stream_result, 'w') as f:
+            json.dump(result, f)
+        for source, r in result["sources"].items():
+            print(f"Live decode finished [{source}]: {r['decodedUart']}")
+        return
+    decoded_uart = demod.decoded_uart
+    bits = demod.bits
+    metrics.count("bits_decided", len(bits))
+    metrics.count("frames_found", count_frames(decoded_uart))
+    result = {"binaryData": str(bits), "decodedUart": decoded_uart, "clean": extract_clean(decoded_uart)}
+    with open(stream_result, 'w') as f:
+        json.dump(result, f)
+    print(f"Live decode finished: {decoded_uart}")
+
+
 def normalize_audio(audio_data):
     if len(audio_data) == 0:
         return audio_data
     max_val = np.max(np.abs(audio_data)) + 1e-6
     return (audio_data / max_val) * 4
 
-def stop_recording():
-    global recording, stream, audio_data
+def stop_recording(settle=1):
+    global recording
     recording = False
-    time.sleep(1)
-    if stream:
-        stream.stop()
-        stream.close()
+    time.sleep(settle)
+    request_stop()
     if not os.path.exists(recorded_audio) or os.path.getsize(recorded_audio) == 0:
         print("No audio recorded")
         return
+    if os.path.exists(stream_result):
+        # start --stream already decoded the pass while it was recorded
+        with open(stream_result) as f:
+            result = json.load(f)
+        os.remove(stream_result)
+        with metrics.recording() as decode_metrics:
+            for source, r in result.get("sources", {None: result}).items():
+                print(f"Decoded UART (live{f' {source}' if source else ''}): {r['decodedUart']}")
+                send_to_backend(r["binaryData"], r["decodedUart"], r["clean"], None, None, source=source)
+        result["metrics"] = decode_metrics.snapshot()
+        return result
     return process_recorded_audio()
 
-def find_preamble_fuzzy(bit_string, preamble="00100100", max_errors=1):
-    for i in range(len(bit_string) - len(preamble)):
-        window = bit_string[i:i+len(preamble)]
-        errors = sum(1 for a, b in zip(window, preamble) if a != b)
-        if errors <= max_errors:
-            return i
-    return -1
+def find_preamble_fuzzy(bits, preamble=PREAMBLE, max_errors=1):
+    matches = find_sync(bits, preamble, max_errors, polarity='normal')
+    return matches[0].index if matches else -1
 
 
-def sync_to_preamble(bit_string, preamble='00100100', search_window=100):
-    best_match = -1
-    lowest_errors = len(preamble)
-    for i in range(search_window):
-        window = bit_string[i:i+len(preamble)]
-        if len(window) < len(preamble):
-            break
-        errors = sum(a != b for a, b in zip(window, preamble))
-        if errors < lowest_errors:
-            best_match = i
-            lowest_errors = errors
-    if lowest_errors <= 1:  # allow 1 error
-        return best_match + len(preamble)
+def sync_to_preamble(bits, preamble=PREAMBLE, search_window=None):
+    match = best_sync(bits, preamble, search_window)
+    if match is not None and match.errors <= 1:  # allow 1 error
+        return match.index + len(preamble)
     return -1
 
 
 
-def process_recorded_audio():
+def process_recorded_audio(path=None, post=True, possible_baud_rates=(50,), plot_dir='static/plots', plot_prefix=''):
+    """Decode a recording (recorded_audio by default); post=False only returns the result."""
+    # the result carries this decode's metrics; the process totals stay in metrics
+    with metrics.recording() as decode_metrics:
+        result = decode_recording(path, post, possible_baud_rates, plot_dir, plot_prefix)
+    if result is not None:
+        result["metrics"] = decode_metrics.snapshot()
+    return result
+
+
+def decode_recording(path=None, post=True, possible_baud_rates=(50,), plot_dir='static/plots', plot_prefix=''):
     global audio_data
-    if not os.path.exists(recorded_audio):
+    path = path or recorded_audio
+    timings = {}
+    t0 = time.perf_counter()
+    if not os.path.exists(path):
         print("audio file not found.")
         return
-    audio_data, sample_rate = sf.read(recorded_audio, dtype='float32')
-    if sample_rate > 48000:
-        print(f"Resampling from {sample_rate} Hz to 48000 Hz...")
-        gcd = np.gcd(sample_rate, 48000)
-        up = 48000 // gcd
-        down = sample_rate // gcd
-        audio_data = sp_signal.resample_poly(audio_data, up, down)
-        sample_rate = 48000
-        print(f"Resampling complete. New length: {len(audio_data)} samples")
+    if chunked_decode_after and sf.info(path).duration > chunked_decode_after:
+        return process_long_recording(path, post, possible_baud_rates, plot_dir, plot_prefix)
+    with metrics.timer("load", timings):
+        audio_data, sample_rate = sf.read(path, dtype='float32')
+        if audio_data.ndim > 1:
+            audio_data = audio_data[:, 0]
+    with metrics.timer("decimate", timings):
+        if decimate_rate and sample_rate > decimate_rate:
+            print(f"Decimating from {sample_rate} Hz to {decimate_rate} Hz...")
+            audio_data, sample_rate = decimate(audio_data, sample_rate, decimate_rate)
+            print(f"Decimation complete. New length: {len(audio_data)} samples")
 
     if len(audio_data) == 0 or np.max(np.abs(audio_data)) < 1e-6:
         print("audio data empty")
         return
     print(f"Loaded {len(audio_data)} samples from file.")
-    audio_data = normalize_audio(audio_data)
-    filtered_data = bandpass_filter(audio_data, sample_rate)
-    # Plot
-    plt.figure(figsize=(12, 5))
-    plt.plot(np.arange(len(filtered_data)) / sample_rate, filtered_data)
-    plt.title("Filtered AFSK Signal")
-    plt.xlabel("Time (s)")
-    plt.ylabel("Amplitude")
-    plt.grid(True)
-    plot_filename = 'static/plots/audio_analysis.png'
-    #plt.savefig(plot_filename)
-    plt.savefig('static/plots/audio_analysis.png')
-   # plt.show()
-    plt.close()
-    #send_plot_to_backend(plot_filename)
-
-    possible_baud_rates = [50]
-    for baud_rate in possible_baud_rates:
-        bit_string, goertzel_plot_filename = demodulate_afsk(filtered_data, sample_rate, baud_rate=baud_rate)
-        print(f"\nBaud Rate: {baud_rate} bps")
-        print(f"Raw bits: {bit_string}")
-
-        # UART MSB-first decode
-        decoded_uart = uart_decode_msbf(bit_string)
-        print(f"Decoded UART (MSB-first): {decoded_uart}")
-
-        #offset = find_best_offset(audio_data, sample_rate, 1200, 2200, baud_rate)
-
-        # HDLC-style frame extraction (if using $ and # as frame markers)
-        frames = decoded_uart.split('$')[1:]  # Discard any noise before the first start-of-frame
-
-        clean = ""
-
-        for f in frames:
-            if '#' in f:
-                payload, _ = f.split('#', 1)
-                try:
-                    clean = destuff(payload.encode('latin1')).decode('ascii', 'ignore')
-                    print("RX payload:", clean)
-                    #send_to_backend(bit_string, clean)
-                except Exception as e:
-                    print(f"Failed to destuff and decode: {e}")
-
-
-
-        # fallback inverted
-        inv = invert_bits(bit_string)
-        inv_decoded = uart_decode_msbf(inv)
-        if any(w in inv_decoded.lower() for w in EXPECTED_WORDS):
-            print(f"Decoded (inverted MSB-first): {inv_decoded}")
-
-        send_to_backend(bit_string, decoded_uart, clean, plot_filename, goertzel_plot_filename)
+    with metrics.timer("filter", timings):
+        audio_data = normalize_audio(audio_data)
+        filtered_data = bandpass_filter(audio_data, sample_rate)
+    metrics.count("samples_filtered", len(filtered_data))
+    # plots render in the background; telemetry is posted without waiting for them
+    plot_filename = f'{plot_dir}/{plot_prefix}audio_analysis.png' if plot_renderer.enabled else None
+    signal_plot = plot_renderer.submit(metrics.timed("plot", render_signal_plot), filtered_data, sample_rate,
+                                       plot_filename)
+
+    # every (baud, polarity, bit order) is decoded and scored in parallel;
+    # the winner's bits and tone powers are kept, so nothing is demodulated twice
+    with metrics.timer("hypotheses", timings):
+        candidates, tracks = hypothesis_decoder.decode_tracks(filtered_data, sample_rate, possible_baud_rates,
+                                                              expected_words=EXPECTED_WORDS)
+    for c in candidates[:5]:
+        print(f"  score {c['score']:.2f}: {c['baudRate']} bps, "
+              f"{'inverted' if c['inverted'] else 'normal'}, {'MSB' if c['msbFirst'] else 'LSB'}-first: {c['text'][:40]}")
+    best = candidates[0]
+    track = tracks[(best["baudRate"], best["phase"])]
+    bits = invert_bits(track.bits) if best["inverted"] else track.bits
+    metrics.count("bits_decided", len(bits))
+
+    goertzel_plot_filename = f'{plot_dir}/{plot_prefix}goertzel_power_plot.png'
+    goertzel_plot = plot_renderer.submit(metrics.timed("plot", render_goertzel_plot),
+                                         track.bit_times / sample_rate, track.mark_powers,
+                                         track.space_powers, goertzel_plot_filename)
+    return finish_decode(bits, best, post, timings, t0, plot_filename, signal_plot,
+                         goertzel_plot_filename, goertzel_plot)
+
+
+def process_long_recording(path, post=True, possible_baud_rates=(50,), plot_dir='static/plots', plot_prefix=''):
+    """process_recorded_audio in constant memory: the file is filtered and demodulated window by window."""
+    timings = {}
+    t0 = time.perf_counter()
+    with metrics.timer("load", timings):
+        reader = BlockReader(path, target_rate=decimate_rate)
+        peak = reader.peak()
+    if peak < 1e-6:
+        print("audio data empty")
+        return
+    print(f"Decoding {path} block by block at {reader.sample_rate} Hz...")
+    with metrics.timer("demodulate", timings):
+        tracks = demodulate_file(reader, possible_baud_rates, peak=peak)
+    metrics.count("samples_filtered", sf.info(path).frames * reader.sample_rate // reader.input_rate)
+
+    with metrics.timer("hypotheses", timings):
+        candidates = [c for baud, track in tracks.items()
+                      for c in score_bits(track.bits, baud, expected_words=EXPECTED_WORDS)]
+        candidates.sort(key=lambda c: c["score"], reverse=True)
+    best = candidates[0]
+    track = tracks[best["baudRate"]]
+    bits = invert_bits(track.bits) if best["inverted"] else track.bits
+    metrics.count("bits_decided", len(bits))
+
+    # the filtered signal is never held whole, so only the per-bit power plot is drawn
+    goertzel_plot_filename = f'{plot_dir}/{plot_prefix}goertzel_power_plot.png'
+    goertzel_plot = plot_renderer.submit(metrics.timed("plot", render_goertzel_plot),
+                                         track.bit_times / reader.sample_rate, track.mark_powers,
+                                         track.space_powers, goertzel_plot_filename)
+    return finish_decode(bits, best, post, timings, t0, None, None, goertzel_plot_filename, goertzel_plot)
+
+
+def finish_decode(bits, best, post, timings, t0, plot_filename, signal_plot, goertzel_plot_filename, goertzel_plot):
+    baud_rate = best["baudRate"]
+    if not goertzel_plot:
+        goertzel_plot_filename = None
+    print(f"\nBaud Rate: {baud_rate} bps")
+    print(f"Raw bits: {bits}")
+
+    # UART decode in the winning bit order (MSB-first for our transmitter)
+    with metrics.timer("uart", timings):
+        decoded_uart = uart_decode(bits, msb_first=best["msbFirst"])
+    print(f"Decoded UART ({'MSB' if best['msbFirst'] else 'LSB'}-first): {decoded_uart}")
+
+    clean = extract_clean(decoded_uart)
+    metrics.count("frames_found", count_frames(decoded_uart))
+    timings["total"] = time.perf_counter() - t0
+    metrics.observe("total", timings["total"])
+
+    if post:
+        telemetry_id = send_to_backend(bits, decoded_uart, clean, None, None)
+        plot_renderer.when_done([signal_plot, goertzel_plot],
+                                lambda paths, tid=telemetry_id: send_plot_paths(tid, *paths))
+    return {"binaryData": str(bits), "decodedUart": decoded_uart, "clean": clean,
+            "plotPath": plot_filename, "goertzelPlotPath": goertzel_plot_filename,
+            "hypothesis": {k: v for k, v in best.items() if k != "text"}, "timings": timings}
+
+
+def count_frames(decoded_uart):
+    return sum('#' in f for f in decoded_uart.split('$')[1:])
+
+
+def extract_clean(decoded_uart):
+    # HDLC-style frame extraction (if using $ and # as frame markers)
+    frames = decoded_uart.split('$')[1:]  # Discard any noise before the first start-of-frame
+
+    clean = ""
+
+    for f in frames:
+        if '#' in f:
+            payload, _ = f.split('#', 1)
+            try:
+                clean = destuff(payload.encode('latin1')).decode('ascii', 'ignore')
+                print("RX payload:", clean)
+                #send_to_backend(bit_string, clean)
+            except Exception as e:
+                print(f"Failed to destuff and decode: {e}")
+    return clean
 
 
 def bandpass_filter(audio_data, sample_rate, low_cutoff=1000, high_cutoff=2500):
-    nyquist = 0.5 * sample_rate
-    low = low_cutoff / nyquist
-    high = high_cutoff / nyquist
-    b, a = sp_signal.butter(6, [low, high], btype='band')
-    return sp_signal.filtfilt(b, a, audio_data)
-
-def goertzel(samples, sample_rate, target_freq):
-    N = len(samples)
-    k = int(0.5 + (N * target_freq / sample_rate))
-    omega = (2.0 * np.pi * k) / N
-    coeff = 2.0 * np.cos(omega)
-    s1, s2 = 0.0, 0.0
-    for sample in samples:
-        s = sample + coeff * s1 - s2
-        s2, s1 = s1, s
-    return s2**2 + s1**2 - coeff * s1 * s2
-
-
-
-
-def demodulate_afsk(audio_data, sample_rate, mark_freq=1200, space_freq=2200, baud_rate=50):
-    samples_per_bit = int(sample_rate / baud_rate)
-    bits = []
-    bit_times = []
-    mark_powers = []
-    space_powers = []
-
-    for i in range(0, len(audio_data), samples_per_bit):
-        chunk = audio_data[i:i+samples_per_bit]
-        if len(chunk) < samples_per_bit // 2:
-            break
-        pm = goertzel(chunk, sample_rate, mark_freq)
-        ps = goertzel(chunk, sample_rate, space_freq)
-        bit = '1' if pm > ps else '0'
-        bits.append(bit)
-        bit_times.append(i + samples_per_bit // 2)
-        mark_powers.append(pm)
-        space_powers.append(ps)
-
-    bit_string = ''.join(bits)
-
-
-    
-    # Detect preamble ($ = "00100100") and remove everything before it
-    # preamble = "00100100"
-    # preamble_index = bit_string.find(preamble)
-    # #preamble_index = sync_to_preamble(bit_string)
-    # if preamble_index != -1:
-    #     bit_string = bit_string[preamble_index + len(preamble):]  # Start decoding after preamble
-    #     print(f"Preamble found at index {preamble_index}, decoding starts after it.")
-    # else:
-    #     print("Preamble not found, decoding might be inaccurate.")
-
-    # # Detect tail (# = "00100011") and remove everything after it
-    # tail = "00100011"
-    # tail_index = bit_string.find(tail)
-    # if tail_index != -1:
-    #     bit_string = bit_string[:tail_index]  # Stop decoding before the tail
-    #     print(f"Tail found at index {tail_index}, decoding stops before it.")
-
-
-    # Plot power at each bit window
-    bit_t = np.array(bit_times) / sample_rate
-    plt.figure(figsize=(14, 6))
-    plt.plot(bit_t, mark_powers, label="1200 Hz (Mark) Power", color='green', marker='o')
-    plt.plot(bit_t, space_powers, label="2200 Hz (Space) Power", color='red', marker='x')
-    plt.fill_between(bit_t, mark_powers, space_powers, where=np.array(mark_powers) > np.array(space_powers), 
-                     color='green', alpha=0.2)
-    plt.fill_between(bit_t, space_powers, mark_powers, where=np.array(space_powers) > np.array(mark_powers), 
-                     color='red', alpha=0.2)
-    plt.title("Goertzel Tone Power per Bit Window")
-    plt.xlabel("Time (s)")
-    plt.ylabel("Power")
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    #plt.show()
-
-    goertzel_plot_filename = 'static/plots/goertzel_power_plot.png'
-    #plt.savefig(goertzel_plot_filename)
-    plt.savefig('static/plots/goertzel_power_plot.png')
-    plt.close()
-
-    # Send the plot to the backend
-    #send_plot_to_backend(goertzel_plot_filename)
-
-    return bit_string, goertzel_plot_filename
-
-
-def uart_decode_msbf(bit_string):
-    i = 0
-    chars = []
-    while i + 10 <= len(bit_string):
-        if bit_string[i] == '0':  # start bit
-            data = bit_string[i+1:i+9]
-            stop_bit = bit_string[i+9]
-            if stop_bit == '1':
-                try:
-                    val = int(data, 2)
-                    if 32 <= val <= 126:
-                        chars.append(chr(val))
-                    else:
-                        chars.append('.')
-                    i += 10
-                    continue
-                except:
-                    pass
-        i += 1  # shift forward by 1 if invalid
-    return ''.join(chars)
-
+    return sos_bandpass(audio_data, sample_rate, low_cutoff, high_cutoff)
 
 def destuff(rx_bytes: bytes) -> bytes:
     out, esc = bytearray(), False
@@ -306,22 +338,45 @@ def destuff(rx_bytes: bytes) -> bytes:
     return bytes(out)
 
 
-def invert_bits(bit_string):
-    return ''.join('1' if b=='0' else '0' for b in bit_string)
+def invert_bits(bits):
+    return ~BitBuffer(bits)
 
-def send_to_backend(binary_data, decoded_uart, clean, plot_filename, goertzel_plot_filename):
-    payload = {"binaryData": binary_data, "decodedUart": decoded_uart, "clean": clean, "plotPath": plot_filename, "goertzelPlotPath": goertzel_plot_filename}
+def send_to_backend(binary_data, decoded_uart, clean, plot_filename, goertzel_plot_filename, source=None):
+    payload = {"binaryData": str(binary_data), "decodedUart": decoded_uart, "clean": clean, "plotPath": plot_filename, "goertzelPlotPath": goertzel_plot_filename}
+    if source is not None:
+        payload["source"] = source  # which receiver the frame came from
+    body = backend.send(payload)
+    if body is None:
+        return None
+    print(f"Backend response: {body}")
+    return body.get("id")
+
+
+def send_plot_paths(telemetry_id, plot_filename, goertzel_plot_filename):
+    if telemetry_id is None:
+        return
+    payload = {key: path for key, path in (("plotPath", plot_filename), ("goertzelPlotPath", goertzel_plot_filename))
+               if path is not None}  # long recordings have no signal plot
+    if not payload:
+        return
     try:
-        resp = requests.post("http://localhost:8888/api/afsk/audio", json=payload)
-        print(f"Backend response: {resp.status_code} - {resp.json()}")
+        resp = backend.post(f"/afsk/audio/{telemetry_id}/plots", payload)
+        print(f"Plot paths stored: {resp.status_code}")
     except requests.exceptions.RequestException as e:
-        print(f"Error sending data to backend: {e}")
+        print(f"Error sending plot paths to backend: {e}")
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         if sys.argv[1] == "start":
+            live_decode = "--stream" in sys.argv[2:]
+            if "--channels" in sys.argv[2:]:
+                capture_channels = int(sys.argv[sys.argv.index("--channels") + 1])
             start_recording()
         elif sys.argv[1] == "stop":
+            plot_renderer.enabled = "--no-plots" not in sys.argv[2:]
             stop_recording()
+            plot_renderer.wait()  # let background plots finish before exiting
+            hypothesis_decoder.close()
+            backend.close()
     else:
-        print("Usage: python script.py start|stop")
\ No newline at end of file
+        print("Usage: python script.py start [--stream] [--channels N]|stop [--no-plots]")
\ No newline at end of file
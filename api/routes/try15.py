@@ -1,15 +1,19 @@
+import asyncio
 import numpy as np
-import queue
 import sounddevice as sd
 import soundfile as sf
-import sys
-import requests
-import matplotlib.pyplot as plt
 import os
-import traceback
 import time
-import scipy.signal as sp_signal
 import signal
+from uart import ShiftRegisterFramer, printable, uart_decode
+from bitbuf import BitBuffer
+from filters import StreamingBandpass, sos_bandpass
+from delivery import default_client
+from pipeline import Pipeline
+from metrics import Metrics
+from rtlog import RealtimeLog, status_bits, status_names
+from capture import RingBufferRecorder
+from plots import render_signal_plot
 
 # Global Variables
 audio_data = []
@@ -18,55 +22,50 @@ stream = None
 sample_rate = 48000  # samples per second
 EXPECTED_WORDS = ["volts", "3 volts", "4 volts", "8 volts", "5 volts", "6 volts", "V12", "antennas deployed"]
 recorded_audio = "recorded_audio6.wav"
-bit_queue = queue.Queue()
+recorder = None
+metrics = Metrics()  # stage timings and counters, printed when the stream ends
+backend = default_client(metrics)
+queue_policy = "drop-oldest"  # what capture does when filtering falls behind (drop-oldest|drop-newest|block)
+stats_interval = 5  # seconds between pipeline queue-depth reports
+rt_log = RealtimeLog()  # the audio callbacks log through this; nothing is printed from them
+STREAM_STATUS = rt_log.register("stream_status", lambda a, b: status_names(a))
 
 # ----- Backend Recording & Processing -----
 def signal_handler(signum, frame):
     global recording, stream
     recording = False
-    if stream:
-        stream.stop()
-        stream.close()
+    active, stream = stream, None  # stop_recording must not close it again
+    if active:
+        active.stop()
+        active.close()
 
 signal.signal(signal.SIGTERM, signal_handler)
 signal.signal(signal.SIGINT, signal_handler)
 
-def audio_callback(indata, frames, time, status):
-    if status:
-        print(f"status: {status}")
-    if recording:
-        try:
-            with sf.SoundFile(recorded_audio, mode='rb+') as f:
-                f.seek(0, sf.SEEK_END)
-                f.write(indata)
-        except sf.LibsndfileError:
-            print("Cannot write to WAV file")
-    # push to FFT queue
-    try:
-        bit_queue.put(indata.copy())
-    except Exception as e:
-        print(f"Queue error: {e}")
-
-
 def start_recording():
-    global recording, stream
+    global recording, stream, recorder
     recording = True
-    # create/clear file
-    with sf.SoundFile(recorded_audio, mode='w', samplerate=sample_rate, channels=1, subtype='PCM_16'):
-        pass
-    # start stream
-    stream = sd.InputStream(samplerate=sample_rate, channels=1, dtype='float32', callback=audio_callback)
+    # the callback only copies into the recorder's ring; its writer thread writes the WAV
+    recorder = RingBufferRecorder(recorded_audio, sample_rate, channels=1, subtype='PCM_16', log=rt_log)
+    recorder.start()
+    rt_log.start()
+    stream = sd.InputStream(samplerate=sample_rate, channels=1, dtype='float32', callback=recorder.callback)
     stream.start()
     print("Recording started")
 
 
 def stop_recording():
-    global recording, stream
+    global recording, stream, recorder
     recording = False
     time.sleep(0.5)
-    if stream:
-        stream.stop()
-        stream.close()
+    active, stream = stream, None
+    if active:
+        active.stop()
+        active.close()
+    if recorder:
+        print(f"Capture: {recorder.stop()}")
+        recorder = None
+    rt_log.close()
     print("Recording stopped")
     if not os.path.exists(recorded_audio) or os.path.getsize(recorded_audio) == 0:
         print("No audio recorded")
@@ -83,14 +82,7 @@ def process_recorded_audio():
     norm = normalize_audio(data)
     filtered = bandpass_filter(norm, sr)
     # plot
-    plt.figure(figsize=(12,5))
-    plt.plot(np.arange(len(filtered)) / sr, filtered)
-    plt.title("Filtered AFSK Signal")
-    plt.xlabel("Time (s)")
-    plt.ylabel("Amplitude")
-    plt.grid(True)
-    plt.savefig('audio_analysis.png')
-    plt.close()
+    render_signal_plot(filtered, sr, 'audio_analysis.png')
 
     for baud in [100]:
         bits = demodulate_afsk_fft(filtered, sr, baud_rate=baud)
@@ -110,10 +102,7 @@ def normalize_audio(audio):
 
 
 def bandpass_filter(data, sr, low_cut=1000, high_cut=2500):
-    nyq = 0.5 * sr
-    low, high = low_cut/nyq, high_cut/nyq
-    b, a = sp_signal.butter(6, [low, high], btype='band')
-    return sp_signal.filtfilt(b, a, data)
+    return sos_bandpass(data, sr, low_cut, high_cut)
 
 
 def get_fft_magnitude_at_freq(chunk: np.ndarray, sample_rate: int, freq: float) -> float:
@@ -125,7 +114,7 @@ def get_fft_magnitude_at_freq(chunk: np.ndarray, sample_rate: int, freq: float)
     return np.abs(yf[idx])
 
 
-def demodulate_afsk_fft(audio: np.ndarray, sample_rate: int, mark_freq=1200, space_freq=2200, baud_rate=1200) -> str:
+def demodulate_afsk_fft(audio: np.ndarray, sample_rate: int, mark_freq=1200, space_freq=2200, baud_rate=1200) -> BitBuffer:
     spb = int(sample_rate / baud_rate)
     bits = []
     for i in range(0, len(audio), spb):
@@ -134,8 +123,8 @@ def demodulate_afsk_fft(audio: np.ndarray, sample_rate: int, mark_freq=1200, spa
             break
         pm = get_fft_magnitude_at_freq(chunk, sample_rate, mark_freq)
         ps = get_fft_magnitude_at_freq(chunk, sample_rate, space_freq)
-        bits.append('1' if pm > ps else '0')
-    bitstr = ''.join(bits)
+        bits.append(pm > ps)
+    bitstr = BitBuffer(bits)
     pre, tail = '00100100', '00100011'
     si = bitstr.find(pre)
     if si != -1:
@@ -146,56 +135,149 @@ def demodulate_afsk_fft(audio: np.ndarray, sample_rate: int, mark_freq=1200, spa
     return bitstr
 
 # ----- UART & Backend -----
-def uart_decode_msbf(bitstr: str) -> str:
-    i, chars = 0, []
-    while i + 10 <= len(bitstr):
-        if bitstr[i] == '0':
-            data = bitstr[i+1:i+9]
-            if bitstr[i+9] == '1':
-                val = int(data, 2)
-                chars.append(chr(val) if 32 <= val <= 126 else '.')
-                i += 10
-                continue
-        i += 1
-    return ''.join(chars)
+def uart_decode_msbf(bitstr: BitBuffer) -> str:
+    return uart_decode(bitstr, msb_first=True)
 
 
-def invert_bits(bitstr: str) -> str:
-    return ''.join('1' if b=='0' else '0' for b in bitstr)
+def invert_bits(bitstr: BitBuffer) -> BitBuffer:
+    return ~BitBuffer(bitstr)
 
 
-def send_to_backend(binary_data: str, decoded_text: str):
-    payload = {"binaryData": binary_data, "decodedText": decoded_text}
-    try:
-        resp = requests.post("http://localhost:8888/api/afsk/audio", json=payload)
-        print(f"Backend response: {resp.status_code} - {resp.json()}")
-    except Exception as e:
-        print(f"Send error: {e}")
+def send_to_backend(binary_data: BitBuffer, decoded_text: str):
+    payload = {"binaryData": str(binary_data), "decodedText": decoded_text}
+    backend.submit(payload)  # batched in the background; spooled if the backend is down
 
 # ----- Real‑Time FFT AFSK Decoding -----
-def decode_afsk_stream(baud: int, f_space: float, f_mark: float, sample_rate: int):
-    spb = int(sample_rate / baud)
-    stream_rt = sd.InputStream(samplerate=sample_rate, channels=1, callback=audio_callback)
-    stream_rt.start()
+# capture -> filter -> demod -> frame -> deliver, as an asyncio pipeline with
+# bounded queues (pipeline.py). Filtering and the FFTs run on the executor;
+# while the filter stage is backed up it passes blocks through unfiltered.
+
+class FftBitSlicer:
+    """demodulate_afsk_fft for a stream: whole bits per block, the remainder carried over."""
+
+    def __init__(self, sample_rate: int, baud: int, f_mark: float, f_space: float):
+        self.spb = int(sample_rate / baud)
+        self.window = np.hamming(self.spb)
+        freqs = np.fft.rfftfreq(self.spb, 1 / sample_rate)
+        self.mark_bin = int(np.argmin(np.abs(freqs - f_mark)))
+        self.space_bin = int(np.argmin(np.abs(freqs - f_space)))
+        self.residual = np.zeros(0)
+
+    def process(self, block: np.ndarray):
+        samples = np.concatenate((self.residual, block))
+        n_bits = len(samples) // self.spb
+        self.residual = samples[n_bits * self.spb:]
+        if n_bits == 0:
+            return None
+        spectra = np.fft.rfft(samples[:n_bits * self.spb].reshape(n_bits, self.spb) * self.window, axis=1)
+        return (np.abs(spectra[:, self.mark_bin]) > np.abs(spectra[:, self.space_bin])).astype(np.uint8)
+
+
+class FrameCollector:
+    """MSB-first UART framing that prints characters live and returns complete $...# frames."""
+
+    def __init__(self, max_frame=256):
+        self.framer = ShiftRegisterFramer(msb_first=True)
+        self.max_frame = max_frame
+        self.frame = None  # bytes of the frame being received, None between frames
+        self.frame_bits = []
+
+    def feed(self, bits: np.ndarray):
+        chars, frames = [], []
+        for bit in bits.tolist():
+            if self.frame is not None:
+                self.frame_bits.append(bit)
+            byte_val = self.framer.push(bit)
+            if byte_val is None:
+                continue
+            chars.append(byte_val)
+            if byte_val == ord('$'):
+                self.frame = bytearray()
+                self.frame_bits = [int(b) for b in f"{self.framer.register:010b}"]
+            elif self.frame is not None:
+                self.frame.append(byte_val)
+                if byte_val == ord('#'):
+                    frames.append((BitBuffer(self.frame_bits), printable(bytes(self.frame[:-1]))))
+                    self.frame = None
+                elif len(self.frame) > self.max_frame:
+                    self.frame = None  # lost the end marker
+        if chars:
+            print(f"live: {printable(bytes(chars))}", flush=True)
+        return frames or None
+
+
+def deliver_frames(frames):
+    metrics.count("frames_found", len(frames))
+    for bits, text in frames:
+        print(f"Frame: {text}")
+        send_to_backend(bits, text)
+
+
+def build_pipeline(baud: int, f_space: float, f_mark: float, sample_rate: int, policy: str = queue_policy) -> Pipeline:
+    bandpass = StreamingBandpass(sample_rate)
+    slicer = FftBitSlicer(sample_rate, baud, f_mark, f_space)
+    collector = FrameCollector()
+
+    def filter_block(block):
+        filtered = bandpass.process(block)
+        metrics.count("samples_filtered", len(filtered))
+        return filtered
+
+    def decide_bits(block):
+        bits = slicer.process(block)
+        if bits is not None:
+            metrics.count("bits_decided", len(bits))
+        return bits
+
+    pipeline = Pipeline(metrics=metrics)
+    pipeline.stage("filter", filter_block, maxsize=64, policy=policy, offload=True,
+                   degraded=lambda block: block)
+    pipeline.stage("demod", decide_bits, maxsize=32, offload=True)
+    pipeline.stage("frame", collector.feed, maxsize=32)
+    pipeline.stage("deliver", deliver_frames, maxsize=16)
+    return pipeline
+
+
+async def decode_afsk_stream_async(baud: int, f_space: float, f_mark: float, sample_rate: int):
+    pipeline = build_pipeline(baud, f_space, f_mark, sample_rate)
+    xruns = 0
+    log = rt_log.ring("decode")
+
+    def capture(indata, frames, time_info, status):
+        nonlocal xruns
+        if status:
+            xruns += 1
+            log.post(STREAM_STATUS, status_bits(status))
+        pipeline.offer(indata[:, 0])  # copied into the pipeline's preallocated ring; never blocks
+
+    runner = asyncio.create_task(pipeline.run())
+    await asyncio.sleep(0)  # let run() pick up the loop before audio arrives
     print(f"Real‑time FFT AFSK: baud={baud}, space={f_space}, mark={f_mark}")
+    with sd.InputStream(samplerate=sample_rate, channels=1, callback=capture):
+        last_report = time.monotonic()
+        while recording:
+            await asyncio.sleep(0.2)
+            if time.monotonic() - last_report >= stats_interval:
+                last_report = time.monotonic()
+                depths = {name: stage["depth"] for name, stage in pipeline.stats().items()}
+                print(f"Queue depths: {depths}")
+    await pipeline.close()  # drain what was captured
+    await runner
+    stats = pipeline.stats()
+    metrics.count("capture_blocks", pipeline.ring.blocks)
+    metrics.count("xruns", xruns)
+    metrics.count("blocks_dropped", sum(stage["dropped"] for stage in stats.values()) + pipeline.lost)
+    print(f"Pipeline: {stats}")
+    print(f"Delivery: {backend.stats()}")
+    print(metrics.prometheus(), end="")
+    return {**stats, "metrics": metrics.snapshot()}
+
+
+def decode_afsk_stream(baud: int, f_space: float, f_mark: float, sample_rate: int):
     try:
-        while True:
-            data = bit_queue.get()
-            samples = data.flatten()
-            bitstr = ''
-            for i in range(0, len(samples), spb):
-                chunk = samples[i:i+spb]
-                if len(chunk) < spb:
-                    break
-                pm = get_fft_magnitude_at_freq(chunk, sample_rate, f_mark)
-                ps = get_fft_magnitude_at_freq(chunk, sample_rate, f_space)
-                bitstr += '1' if pm > ps else '0'
-            print(f"Bits: {bitstr}")
+        return asyncio.run(decode_afsk_stream_async(baud, f_space, f_mark, sample_rate))
     except KeyboardInterrupt:
         print("\nStopped by user.")
-    finally:
-        stream_rt.stop()
-        stream_rt.close()
 
 if __name__ == "__main__":
     BAUD = 100
@@ -211,3 +293,4 @@ if __name__ == "__main__":
         print(f"Error: {e}")
     finally:
         stop_recording()
+        backend.close()  # deliver what is still queued
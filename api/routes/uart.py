@@ -0,0 +1,112 @@
+import numpy as np
+
+
+# Vectorized UART framing (start bit 0, 8 data bits, stop bit 1).
+# Same greedy scan as uart_decode_msbf - take the first valid frame, jump past
+# it, repeat - but done with array operations: candidate frames come from two
+# masks, the greedy chain is followed by pointer doubling, and the data bits
+# of every frame are packed into bytes in one call.
+
+PRINTABLE = bytes(b if 32 <= b <= 126 else ord('.') for b in range(256))
+BIT_REVERSED = bytes(int(f"{b:08b}"[::-1], 2) for b in range(256))
+
+
+def as_bit_array(bits):
+    """uint8 0/1 array from a '0'/'1' string, a sequence or an array."""
+    if isinstance(bits, str):
+        return (np.frombuffer(bits.encode('ascii'), dtype=np.uint8) - ord('0')).astype(np.uint8)
+    return np.asarray(bits, dtype=np.uint8)
+
+
+def frame_offsets(bits, data_bits=8):
+    """Start-bit offsets of the frames a greedy left-to-right scan accepts."""
+    bits = as_bit_array(bits)
+    n = len(bits)
+    frame_len = data_bits + 2
+    if n < frame_len:
+        return np.zeros(0, dtype=np.int64)
+    valid = (bits[:n - frame_len + 1] == 0) & (bits[frame_len - 1:] == 1)
+    candidates = np.flatnonzero(valid)
+    if len(candidates) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # successor of each candidate = first candidate at or after its end
+    jump = np.searchsorted(candidates, candidates + frame_len)
+    return candidates[greedy_chain(jump)]
+
+
+def greedy_chain(jump):
+    """Indices 0, jump[0], jump[jump[0]], ... until the chain runs off the end.
+
+    jump[i] is the next item a greedy scan takes after item i (any value >=
+    len(jump) means none). Followed by pointer doubling, so the cost is
+    log(chain length) array operations rather than one step per item.
+    """
+    k = len(jump)
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    # len(jump) acts as a sink meaning "no more items"
+    jump = np.append(np.minimum(jump, k), k)
+    chain = np.array([0])
+    while chain[-1] != k:
+        chain = np.concatenate((chain, jump[chain]))
+        jump = jump[jump]
+    return chain[chain < k]
+
+
+def frame_uart(bits, msb_first=True, data_bits=8):
+    """Greedy UART framing. Returns (data bytes, start-bit offsets)."""
+    bits = as_bit_array(bits)
+    offsets = frame_offsets(bits, data_bits)
+    if len(offsets) == 0:
+        return b'', offsets
+    data = bits[offsets[:, np.newaxis] + 1 + np.arange(data_bits)]
+    packed = np.packbits(data, axis=1, bitorder='big' if msb_first else 'little')
+    return packed[:, 0].tobytes(), offsets
+
+
+def printable(data):
+    """Bytes to text with non-printable bytes shown as '.' (like the decoders print them)."""
+    return data.translate(PRINTABLE).decode('ascii')
+
+
+def uart_decode(bits, msb_first=True):
+    data, _ = frame_uart(bits, msb_first)
+    return printable(data)
+
+
+def consumed_bits(n_bits, offsets, data_bits=8):
+    """How far the greedy scan got: bits before this index can never start a new frame."""
+    frame_len = data_bits + 2
+    end = offsets[-1] + frame_len if len(offsets) else 0
+    return max(end, n_bits - frame_len + 1, 0)
+
+
+class ShiftRegisterFramer:
+    """frame_uart one bit at a time, in constant time per bit.
+
+    The last ten bits sit in a shift register (oldest at bit 9). Once ten
+    bits have arrived since the previous frame, a register with a 0 start
+    bit and a 1 stop bit is the next frame - the same greedy scan as
+    frame_uart, so the same bits give the same bytes.
+    """
+
+    def __init__(self, msb_first=True):
+        self.msb_first = msb_first
+        self.register = 0
+        self.fresh = 0  # bits since the last frame ended
+
+    def push(self, bit):
+        """Shift one bit in; returns the byte it completes, or None."""
+        self.register = ((self.register << 1) | bit) & 0x3FF
+        self.fresh += 1
+        if self.fresh < 10 or self.register & 0x201 != 0x001:
+            return None
+        self.fresh = 0
+        data = (self.register >> 1) & 0xFF
+        return data if self.msb_first else BIT_REVERSED[data]
+
+    def feed(self, bits):
+        """Push a run of bits; returns the completed bytes."""
+        completed = (self.push(int(bit)) for bit in as_bit_array(bits))
+        return bytes(b for b in completed if b is not None)
@@ -0,0 +1,15 @@
+import os
+import sys
+
+
+# The scripts in api/ use the decoder modules in api/routes, which import
+# each other by bare name (from uart import ...). Importing this module puts
+# api/routes on sys.path once, wherever the script is started from:
+#
+#   import shared_modules  # noqa: F401
+#   from filters import sos_bandpass
+
+ROUTES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'routes')
+
+if ROUTES_DIR not in sys.path:
+    sys.path.insert(0, ROUTES_DIR)
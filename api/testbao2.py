@@ -1,6 +1,5 @@
 import sounddevice as sd
 import numpy as np
-from scipy.signal import butter, lfilter
 from scipy.fftpack import fft
 import matplotlib.pyplot as plt
 import requests
@@ -11,6 +10,10 @@ import traceback
 import os
 from datetime import datetime
 import codecs
+import shared_modules  # noqa: F401  (puts api/routes on sys.path)
+from filters import sos_bandpass
+from samplelog import SampleLog, read_samples
+from rtlog import RealtimeLog, status_bits, status_names
 
 
 DEVICE_INDEX = 24
@@ -33,6 +36,11 @@ sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
 audio_data = []
 recording = False
 stream = None #audio input stream using sounddevice- used to capture audio real time from mic
+sample_log = None #append-only log the stop command reads the recording back from
+SAMPLE_LOG = 'audio_data.log'
+rt_log = RealtimeLog() #the callback only queues log records - this writes them from its own thread
+STREAM_STATUS = rt_log.register("stream_status", lambda a, b: status_names(a))
+callback_log = rt_log.ring("callback")
 
 def signal_handler(signum, frame):
     global recording, stream
@@ -44,14 +52,8 @@ signal.signal(signal.SIGTERM, signal_handler)
 signal.signal(signal.SIGINT, signal_handler)
 
 def bandpass_filter(data, lowcut, highcut, sample_rate, order=6):
-       #maximum freq that can be represented in digital signal; normalizes filter cutoff frequencies
-    nyquist = 0.5 * sample_rate#nyquist frequency - half of sample rate
-    #normalizes target frequencies
-    low, high = lowcut / nyquist, highcut / nyquist#butter function expects normalized frequencies in range 0,1
-        #designs 6th order bandpass filter
-
-    b, a = butter(order, [low, high], btype='band')
-    return lfilter(b, a, data) # apply filter
+    #cached butterworth design in second-order sections - causal like the old lfilter
+    return sos_bandpass(data, sample_rate, lowcut, highcut, order=order, zero_phase=False)
 
 
 def normalize_audio(audio_data):
@@ -151,27 +153,27 @@ def demodulate_afsk(audio_data, sample_rate, mark_freq=1200, space_freq=2200, ba
 
 
 #callback for sounddevice audio stream
-def audio_callback(indata,status, frames, time):
+def audio_callback(indata, frames, time, status):
 
-    global audio_data
     if status:
-        print('Error:', status)
-        #if recording true - append incoming data to the audio_data list
+        callback_log.post(STREAM_STATUS, status_bits(status)) #printing here could block the audio thread
+        #if recording true - append incoming block to the sample log
     if recording:
         indata = indata - np.mean(indata)
-        audio_data.extend(indata.flatten()) #flatten - store data as 1D array
        # audio_data = audio_data / np.max(np.abs(audio_data))
-        np.save('audio_data.npy', np.array(audio_data)) #data is stored in numpy file 
+        sample_log.append(indata[:, 0]) #only this block is written, not the whole recording
         #print(f"Captured {len(indata.flatten())} samples, Total: {len(audio_data)}", flush=True)
 
 def start_recording():
-    global recording, stream, audio_data
+    global recording, stream, audio_data, sample_log
 
    
     
     print("Starting recording...", flush=True)
     try:
 
+        sample_log = SampleLog.create(SAMPLE_LOG, 44100) #replaces the previous recording
+        rt_log.start()
         recording = True
         audio_data = [] #resets audio_data 
         
@@ -192,7 +194,7 @@ def start_recording():
         time.sleep(2) # wait for audio to be captured
  
     #no audio data captured - smth wrong
-        if not audio_data:
+        if sample_log.frames == 0:
             print("WARNING: No audio data received! Check microphone access or settings.")
 
        
@@ -216,6 +218,8 @@ def start_recording():
                 stream.close()
             except:
                 pass
+        if sample_log:
+            sample_log.close()
         print(f"Error during recording: {str(e)}")
         raise e
 
@@ -226,19 +230,18 @@ def stop_recording():
     print("Stopping recording...")
    # print(f"Before stopping, collected samples: {len(audio_data)}", flush=True)
     recording = False 
+    rt_log.close()
     #print("hi")
 
     time.sleep(1) # wait to ensure audio data saved
 
-#load numpy file and convert back to python list
-    if os.path.exists('audio_data.npy'):
-        audio_data = np.load('audio_data.npy', allow_pickle=True).tolist() 
-        audio_data = np.array(audio_data)
-        if np.max(np.abs(audio_data)) < 1e-6:
+#map the committed samples of the log - no copy until they are normalized
+    if os.path.exists(SAMPLE_LOG):
+        audio_data = read_samples(SAMPLE_LOG)
+        if len(audio_data) and np.max(np.abs(audio_data)) < 1e-6:
             print("Warning: Audio data is too small or zero. Check recording.")
-        audio_data = audio_data / np.max(np.abs(audio_data))
-        #allow_pickle - numpy can load objects stored using pickle module - good when file contains complex objs like lists
-        #ensurs that numpy loads array without errors - was getting error before
+        if len(audio_data):
+            audio_data = audio_data / np.max(np.abs(audio_data))
 
     print(f"After sleep, collected samples: {len(audio_data)}", flush=True)
 
@@ -284,9 +287,11 @@ def process_audio():
         sample_rate = 44100
         
 
+        os.makedirs('static/plots', exist_ok=True)
         plt.plot(audio_data[:1000])
         plt.title("Raw Audio Signal")
-        plt.show()
+        plt.savefig('static/plots/raw_audio.png')  # plt.show() blocks a headless process
+        plt.close()
         # Apply bandpass filter
             #removes unwanted freq
 #call bandpass filter 
@@ -295,7 +300,8 @@ def process_audio():
 
         plt.plot(filtered_audio[:1000])
         plt.title("Filtered Audio Signal")
-        plt.show()
+        plt.savefig('static/plots/filtered_audio.png')
+        plt.close()
         
         # Calculate FFT
             #fft to visualize freq content
@@ -377,6 +383,7 @@ if __name__ == "__main__":
         if command == "start":
             print('about to start recording')
             start_recording() # call start_recording()
+            rt_log.close() #write out what the callback logged
             print('recording fuction executed')
         elif command == "stop":
             print('recording stop')
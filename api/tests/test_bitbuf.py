@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from bitbuf import BitBuffer
+from uart import printable
+
+
+def aligned_texts(bit_string):
+    """decode_binary_to_ascii's candidates before BitBuffer.pack: one text per bit offset."""
+    texts = []
+    for offset in range(8):
+        raw_text = ""
+        for i in range(offset, len(bit_string) - 7, 8):
+            char_code = int(bit_string[i:i + 8], 2)
+            raw_text += chr(char_code) if 32 <= char_code <= 126 else "."
+        texts.append(raw_text)
+    return texts
+
+
+def random_bits(seed, n):
+    rng = np.random.default_rng(seed)
+    return ''.join('1' if b else '0' for b in rng.random(n) < 0.5)
+
+
+@pytest.mark.parametrize("n", [0, 1, 7, 8, 9, 15, 16, 17, 63, 64, 65, 1001])
+def test_pack_matches_the_string_decoder(n):
+    bit_string = random_bits(n, n)
+    bits = BitBuffer(bit_string)
+    for offset, text in enumerate(aligned_texts(bit_string)):
+        codes = bits.pack(offset)
+        assert len(codes) == len(text)
+        assert printable(codes.astype(np.uint8).tobytes()) == text
+
+
+def test_pack_lsb_first_reverses_each_group():
+    bits = BitBuffer(random_bits(1, 80))
+    msb = bits.pack(msb_first=True)
+    lsb = bits.pack(msb_first=False)
+    assert [int(f"{b:08b}"[::-1], 2) for b in msb] == lsb.tolist()
+
+
+def test_equal_to_its_bit_string_but_unhashable():
+    bits = BitBuffer('0110')
+    assert bits == '0110' and bits == BitBuffer([0, 1, 1, 0]) and bits != '011'
+    with pytest.raises(TypeError):
+        hash(bits)
+    assert {str(bits): 1}['0110'] == 1
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+import synth
+from chunked import BlockReader, demodulate_file
+from filters import decimate, sos_bandpass
+from timing import symbol_timing
+
+
+def whole_file_bits(path, baud_rate, target_rate):
+    """try14's in-memory path: read, decimate, normalize, zero-phase bandpass, symbol timing."""
+    audio, sample_rate = sf.read(path, dtype='float32')
+    audio, sample_rate = decimate(audio, sample_rate, target_rate)
+    audio = audio / (np.max(np.abs(audio)) + 1e-6) * 4
+    filtered = sos_bandpass(audio, sample_rate)
+    _, mark, space = symbol_timing(filtered, sample_rate, baud_rate)
+    return (mark > space).astype(np.uint8)
+
+
+@pytest.fixture
+def recording(tmp_path):
+    bits = synth.message_bits("$V12 3 volts antennas deployed#" * 12, preamble='U' * 8)
+    path = tmp_path / "pass.wav"
+    synth.write_wav(path, bits, 48000, 50, amplitude=0.8)
+    return path
+
+
+@pytest.mark.parametrize("chunk_seconds", [3, 7.5, 1000])
+def test_demodulate_file_matches_the_whole_file_decode(recording, chunk_seconds):
+    reader = BlockReader(recording, target_rate=12000, block_size=5000)
+    tracks = demodulate_file(reader, [50], chunk_seconds=chunk_seconds)
+    expected = whole_file_bits(recording, 50, 12000)
+    np.testing.assert_array_equal(tracks[50].bits.bits, expected)
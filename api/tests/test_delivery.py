@@ -0,0 +1,108 @@
+import json
+
+import pytest
+import requests
+
+from delivery import TelemetryClient
+
+
+class StubResponse:
+    def __init__(self, status, body=None):
+        self.status_code = status
+        self.body = body or {}
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}", response=self)
+
+
+class StubSession:
+    """Stands in for requests.Session: refuses frames with empty binaryData, like the backend."""
+
+    def __init__(self):
+        self.up = True
+        self.stored = []
+        self.posts = 0
+
+    def post(self, url, data=None, timeout=None, headers=None):
+        self.posts += 1
+        if not self.up:
+            raise requests.exceptions.ConnectionError("backend down")
+        body = json.loads(data)
+        frames = body["frames"] if url.endswith('/batch') else [body]
+        if any(not frame["binaryData"] for frame in frames):
+            return StubResponse(400, {"error": "binaryData required"})
+        self.stored.extend(frame["decodedUart"] for frame in frames)
+        return StubResponse(201, {"id": len(self.stored)})
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = TelemetryClient("http://backend/api", spool_path=str(tmp_path / "spool.jsonl"))
+    client.session = StubSession()
+    yield client
+    client.close()
+
+
+def frame(bits, text):
+    return {"binaryData": bits, "decodedUart": text}
+
+
+def test_send_delivers_and_returns_reply(client):
+    assert client.send(frame("0101", "a")) == {"id": 1}
+    assert client.session.stored == ["a"]
+
+
+def test_unreachable_backend_spools_then_replays_in_order(client, tmp_path):
+    client.session.up = False
+    assert client.send(frame("01", "a")) is None
+    assert client.send(frame("10", "b")) is None
+    assert client.spool.pending == 2
+    client.session.up = True
+    assert client.send(frame("11", "c")) == {"id": 3}
+    assert client.session.stored == ["a", "b", "c"]
+    assert not (tmp_path / "spool.jsonl").exists()
+
+
+def test_refused_frame_does_not_block_the_spool(client, tmp_path):
+    client.session.up = False
+    client.send(frame("", "empty"))  # the backend will refuse this one with 400
+    client.send(frame("01", "good"))
+    client.session.up = True
+    assert client.replay()
+    assert client.session.stored == ["good"]
+    assert client.send(frame("10", "next")) == {"id": 2}
+    assert client.session.stored == ["good", "next"]
+    assert not (tmp_path / "spool.jsonl").exists()
+    bad = (tmp_path / "spool.jsonl.bad").read_text().splitlines()
+    assert [json.loads(line)["decodedUart"] for line in bad] == ["empty"]
+
+
+def test_refused_send_is_not_spooled(client, tmp_path):
+    assert client.send(frame("", "empty")) is None
+    assert not (tmp_path / "spool.jsonl").exists()
+    assert client.send(frame("01", "good")) == {"id": 1}
+
+
+def test_torn_last_line_is_cut_before_appending(client, tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    spool.write_text('{"binaryData": "0", "decodedUart": "ok"}\n{"binaryData": "0101", "decodedUart": "ab')
+    client.session.up = False
+    client.send(frame("1", "x"))
+    client.session.up = True
+    assert client.replay()
+    assert client.session.stored == ["ok", "x"]
+
+
+def test_submitted_batches_skip_refused_frames(client):
+    for payload in (frame("01", "a"), frame("", "empty"), frame("10", "b")):
+        client.submit(payload)
+    client.flush()
+    assert client.session.stored == ["a", "b"]
+    assert client.stats()["delivered"] == 2
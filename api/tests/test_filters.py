@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from filters import StreamingBandpass, StreamingDecimator, decimate, sos_bandpass
+
+
+def blocks_of(signal, sizes):
+    start = 0
+    for size in sizes:
+        yield signal[start:start + size]
+        start += size
+    yield signal[start:]
+
+
+@pytest.fixture
+def signal():
+    rng = np.random.default_rng(0)
+    t = np.arange(48000 * 2) / 48000
+    return (np.sin(2 * np.pi * 1200 * t) + 0.5 * np.sin(2 * np.pi * 2200 * t)
+            + 0.1 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+@pytest.mark.parametrize("sizes", [[1024] * 90, [0, 1, 7, 4096, 0, 333, 20000], [48000 * 2]])
+def test_streaming_bandpass_matches_the_causal_whole_signal_filter(signal, sizes):
+    bandpass = StreamingBandpass(48000)
+    streamed = np.concatenate([bandpass.process(block) for block in blocks_of(signal, sizes)])
+    np.testing.assert_allclose(streamed, sos_bandpass(signal, 48000, zero_phase=False), rtol=1e-9, atol=1e-12)
+
+
+def test_streaming_bandpass_channels_filter_independently(signal):
+    stereo = np.stack((signal, -0.5 * signal), axis=1)
+    bandpass = StreamingBandpass(48000, channels=2)
+    streamed = np.concatenate([bandpass.process(block) for block in blocks_of(stereo, [1000] * 50)])
+    for ch in range(2):
+        np.testing.assert_allclose(streamed[:, ch], sos_bandpass(stereo[:, ch], 48000, zero_phase=False),
+                                   rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("target", [12000, 8000, 16000])
+@pytest.mark.parametrize("sizes", [[1024] * 90, [0, 1, 3, 5000, 17, 65536]])
+def test_streaming_decimator_matches_whole_signal_decimate(signal, target, sizes):
+    decimator = StreamingDecimator(48000, target)
+    parts = [decimator.process(block) for block in blocks_of(signal, sizes)]
+    streamed = np.concatenate(parts + [decimator.flush()])
+    whole, rate = decimate(signal, 48000, target)
+    assert rate == target
+    assert len(streamed) == len(whole)
+    np.testing.assert_allclose(streamed, whole, rtol=1e-5, atol=1e-6)
+
+
+def test_streaming_decimator_needs_an_integer_factor():
+    with pytest.raises(ValueError):
+        StreamingDecimator(44100, 12000)
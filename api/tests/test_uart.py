@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import synth
+from uart import frame_offsets, uart_decode
+
+
+def greedy_offsets(bit_string, data_bits=8):
+    """The scan frame_offsets replaced: take the first valid frame, jump past it, repeat."""
+    frame_len = data_bits + 2
+    i, offsets = 0, []
+    while i + frame_len <= len(bit_string):
+        if bit_string[i] == '0' and bit_string[i + frame_len - 1] == '1':
+            offsets.append(i)
+            i += frame_len
+        else:
+            i += 1
+    return offsets
+
+
+def uart_decode_msbf(bit_string):
+    """try14's decoder before uart.py."""
+    i = 0
+    chars = []
+    while i + 10 <= len(bit_string):
+        if bit_string[i] == '0' and bit_string[i + 9] == '1':
+            val = int(bit_string[i + 1:i + 9], 2)
+            chars.append(chr(val) if 32 <= val <= 126 else '.')
+            i += 10
+            continue
+        i += 1
+    return ''.join(chars)
+
+
+def random_bits(seed, n, ones=0.5):
+    rng = np.random.default_rng(seed)
+    return ''.join('1' if b else '0' for b in rng.random(n) < ones)
+
+
+CASES = [
+    '', '0', '0111111111', '0000000000', '1111111111', '01111111110111111111',
+    str(synth.message_bits("$hello 5 volts#", preamble='U' * 4)),
+    str(synth.message_bits("V12 antennas deployed", frame=True, preamble='1' * 13)),
+] + [random_bits(seed, n, ones) for seed, (n, ones) in enumerate(
+    [(9, 0.5), (10, 0.5), (11, 0.5), (997, 0.5), (5000, 0.2), (5000, 0.8), (20000, 0.5)])]
+
+
+@pytest.mark.parametrize("bits", CASES)
+def test_frame_offsets_match_the_greedy_scan(bits):
+    assert frame_offsets(bits).tolist() == greedy_offsets(bits)
+
+
+@pytest.mark.parametrize("data_bits", [5, 7])
+def test_frame_offsets_other_widths(data_bits):
+    bits = random_bits(99, 3000)
+    assert frame_offsets(bits, data_bits).tolist() == greedy_offsets(bits, data_bits)
+
+
+@pytest.mark.parametrize("bits", CASES)
+def test_uart_decode_matches_the_old_decoder(bits):
+    assert uart_decode(bits, msb_first=True) == uart_decode_msbf(bits)
@@ -3,14 +3,14 @@ import sounddevice as sd
 import soundfile as sf
 import sys
 import requests
-import matplotlib.pyplot as plt
 import os
 import traceback
 import time
-import scipy.signal as sp_signal
 import re
 import signal
-import soundfile as sf
+import shared_modules  # noqa: F401  (puts api/routes on sys.path)
+from filters import sos_bandpass
+from plots import render_signal_plot
 
 
 
@@ -145,14 +145,8 @@ def process_recorded_audio():
     filtered_data = bandpass_filter(audio_data, sample_rate)
     print("Bandpass filter applied.")
 
-    # Plot filtered signal
-    plt.figure(figsize=(12, 5))
-    plt.plot(np.arange(len(filtered_data)) / sample_rate, filtered_data)
-    plt.title("Filtered AFSK Signal")
-    plt.xlabel("Time (s)")
-    plt.ylabel("Amplitude")
-    plt.grid(True)
-    plt.show()
+    # Plot filtered signal (saved, not shown: this runs headless)
+    render_signal_plot(filtered_data, sample_rate, 'audio_analysis.png')
 
     # Perform AFSK demodulation
     possible_baud_rates = [300]  
@@ -175,16 +169,6 @@ def process_recorded_audio():
 
         send_to_backend(bit_string, decoded_text)
 
-    # Plot filtered signal
-    time = np.arange(len(filtered_data)) / sample_rate
-    plt.figure(figsize=(12, 5))
-    plt.plot(time, filtered_data)
-    plt.title("Filtered AFSK Signal")
-    plt.xlabel("Time (s)")
-    plt.ylabel("Amplitude")
-    plt.grid(True)
-    plt.show()
-
 
 def adaptive_sampling(audio_data, sample_rate, baud_rate):
     samples_per_bit = int(sample_rate / baud_rate)
@@ -193,11 +177,7 @@ def adaptive_sampling(audio_data, sample_rate, baud_rate):
 
 def bandpass_filter(audio_data, sample_rate, low_cutoff=1000, high_cutoff=2500):
     """Apply a bandpass filter to extract AFSK tones."""
-    nyquist = 0.5 * sample_rate
-    low = low_cutoff / nyquist
-    high = high_cutoff / nyquist
-    b, a = sp_signal.butter(6, [low, high], btype='band')
-    return sp_signal.filtfilt(b, a, audio_data)
+    return sos_bandpass(audio_data, sample_rate, low_cutoff, high_cutoff)
 
 def goertzel(samples, sample_rate, target_freq):
     """Goertzel algorithm to detect specific frequencies."""
@@ -10,6 +10,9 @@ import sys
 import signal
 import time
 import re
+import os
+import shared_modules  # noqa: F401  (puts api/routes on sys.path)
+from filters import sos_bandpass
 
 
 
@@ -124,11 +127,7 @@ def read_wav_file(filename):
 
 def bandpass_filter(audio_data, sample_rate, low_cutoff=400, high_cutoff=3000):
     """Apply a bandpass filter to extract AFSK tones."""
-    nyquist = 0.5 * sample_rate
-    low = low_cutoff / nyquist
-    high = high_cutoff / nyquist
-    b, a = signal.butter(4, [low, high], btype='band')
-    return signal.filtfilt(b, a, audio_data)
+    return sos_bandpass(audio_data, sample_rate, low_cutoff, high_cutoff, order=4)
 
 def goertzel(samples, sample_rate, target_freq):
     """Goertzel algorithm to detect specific frequencies."""
@@ -269,7 +268,9 @@ def plot_signals(original, filtered):
     plt.grid()
 
     plt.tight_layout()
-    plt.show()
+    os.makedirs('static/plots', exist_ok=True)
+    plt.savefig('static/plots/try9_signals.png')  # plt.show() blocks a headless process
+    plt.close()
 
 # def main():
 #    # filename = "4volts.wav"  # Update this to match your input file